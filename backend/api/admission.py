@@ -0,0 +1,40 @@
+"""
+Admission-control dependency for API routes
+    @router.get("/expiring", dependencies=[admit("batches.expiring")])
+The slot is taken before the route's own dependencies (the DB session) and released once the
+response has been sent, so a streamed export holds its slot until the last byte.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from typing import AsyncIterator
+
+from fastapi import Depends, HTTPException
+
+from app.config import settings
+from services import admission_control
+
+
+def admit(endpoint: str):
+    """Dependency that admits the request through the endpoint's limiter, or answers 503 + Retry-After"""
+    async def admission() -> AsyncIterator[None]:
+        if not settings.ADMISSION_CONTROL_ENABLED:
+            yield
+            return
+        limiter = admission_control.get_limiter(endpoint)
+        try:
+            await limiter.acquire()
+        except admission_control.Overloaded as exc:
+            raise HTTPException(status_code=503, detail=f"Too many concurrent requests ({exc.reason}), retry shortly",
+                                headers={"Retry-After": str(exc.retry_after)})
+        try:
+            yield
+        finally:
+            limiter.release()
+
+    return Depends(admission)
@@ -0,0 +1,32 @@
+"""
+Top-level API router: collects the feature routers under /api
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from fastapi import APIRouter
+
+from api import batch_routes, chat_routes
+from services import admission_control, cache_service, single_flight
+
+
+api_router = APIRouter(prefix="/api")
+api_router.include_router(batch_routes.router)
+api_router.include_router(chat_routes.router)
+
+
+@api_router.get("/cache/stats")
+def get_cache_stats():
+    """Hit/miss/eviction counters for the lookup cache tiers"""
+    return cache_service.stats()
+
+
+@api_router.get("/admission/stats")
+def get_admission_stats():
+    """Per-endpoint limiter state (active, waiting, shed) and single-flight sharing counters"""
+    return {"limiters": admission_control.stats(), "single_flight": single_flight.stats()}
@@ -0,0 +1,278 @@
+"""
+Batch API routes
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from datetime import date, datetime, timezone
+from typing import AsyncIterator, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.admission import admit
+from api.responses import ORJSONResponse
+from api.schemas import BatchPage, TrackingPage, BatchLookup, EmployeeLookup, ProductLookup
+from app.config import settings
+from database.async_database import get_async_db
+from models.user_models import BatchStatus
+from services import async_crud_service, export_service, ingestion_service, projections
+from services.single_flight import AsyncSingleFlight
+
+
+router = APIRouter(prefix="/batches", tags=["batches"], default_response_class=ORJSONResponse)
+tracking_flight = AsyncSingleFlight("batches.tracking")
+
+MAX_LOOKUP_KEYS = 5000
+
+
+class BatchCodesRequest(BaseModel):
+    batch_codes: List[str] = Field(..., min_length=1, max_length=MAX_LOOKUP_KEYS)
+
+
+class EmployeeIdsRequest(BaseModel):
+    employee_ids: List[str] = Field(..., min_length=1, max_length=MAX_LOOKUP_KEYS)
+
+
+class ProductIdsRequest(BaseModel):
+    product_ids: List[int] = Field(..., min_length=1, max_length=MAX_LOOKUP_KEYS)
+
+
+async def _line_batches(request: Request, batch_size: int) -> AsyncIterator[List[str]]:
+    """Split the streamed request body into lists of at most batch_size decoded lines"""
+    buffer = b""
+    lines: List[str] = []
+    async for chunk in request.stream():
+        buffer += chunk
+        *complete, buffer = buffer.split(b"\n")
+        for line in complete:
+            lines.append(line.decode("utf-8-sig").rstrip("\r"))
+            if len(lines) >= batch_size:
+                yield lines
+                lines = []
+    if buffer:
+        lines.append(buffer.decode("utf-8-sig").rstrip("\r"))
+    if lines:
+        yield lines
+
+
+def _detect_format(request: Request, format: Optional[str]) -> str:
+    if format:
+        return format
+    content_type = request.headers.get("content-type", "")
+    return "csv" if "csv" in content_type else "ndjson"
+
+
+@router.get("", response_model=BatchPage, dependencies=[admit("batches.list")])
+async def list_batches(
+    status: Optional[BatchStatus] = None,
+    location: Optional[str] = None,
+    product_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """One page of batch summaries ordered by batch ID; manufactured date range is inclusive"""
+    page = await db.run_sync(projections.list_batch_summaries, status=status, location=location,
+                             product_id=product_id, start_date=start_date, end_date=end_date,
+                             limit=limit, cursor=cursor)
+    return ORJSONResponse({"items": page.items, "next_cursor": page.next_cursor})
+
+
+@router.post("/tracking/bulk", dependencies=[admit("batches.ingest")])
+async def bulk_ingest_tracking_events(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    chunk_size: Optional[int] = Query(None, ge=1, le=50000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Ingest a stream of tracking events as NDJSON (application/x-ndjson) or CSV (text/csv)
+    The body is read and written chunk by chunk; the response lists every rejected row
+    """
+    fmt = _detect_format(request, format)
+    chunk_size = chunk_size or settings.INGEST_CHUNK_SIZE
+    report = ingestion_service.IngestReport()
+    received_at = datetime.now(timezone.utc)
+    header = None
+    next_row = 1
+
+    async for lines in _line_batches(request, chunk_size):
+        start_row = next_row
+        next_row += len(lines)
+        if fmt == "csv":
+            if header is None:
+                try:
+                    header = ingestion_service.parse_csv_header(lines[0])
+                except (ValueError, StopIteration) as e:
+                    raise HTTPException(status_code=400, detail=f"Invalid CSV header: {e}")
+                lines, start_row = lines[1:], start_row + 1
+            rows = list(ingestion_service.parse_csv(lines, header=header, start_row=start_row))
+        else:
+            rows = list(ingestion_service.parse_ndjson(lines, start_row=start_row))
+
+        await db.run_sync(ingestion_service.ingest_chunk, rows, report, received_at)
+
+    await db.commit()
+    return report.as_dict()
+
+
+def _export_response(db: AsyncSession, stmt, name: str, fmt: str, gzip: bool, chunk_size: Optional[int],
+                     archived: Optional[export_service.ArchivedTracking] = None):
+    """Chunked StreamingResponse over a server-side cursor; gzip sets Content-Encoding"""
+    headers = {"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    body = export_service.aexport_rows(db, stmt, fmt=fmt, gzip=gzip,
+                                       chunk_size=chunk_size or export_service.DEFAULT_CHUNK_SIZE, archived=archived)
+    return StreamingResponse(body, media_type=export_service.MEDIA_TYPES[fmt], headers=headers)
+
+
+@router.get("/tracking/export", dependencies=[admit("batches.tracking_export")])
+async def export_tracking_history(
+    product_id: Optional[int] = None,
+    batch_code: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    format: str = Query("csv", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    chunk_size: Optional[int] = Query(None, ge=1, le=50000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Stream tracking history for auditors, oldest first
+    Filter by product, batch and/or event date range (inclusive); months archived out of
+    batch_tracking are read back from their archive files and included in order
+    """
+    stmt = export_service.tracking_export_query(product_id, batch_code, start_date, end_date)
+    archived = export_service.ArchivedTracking(product_id, batch_code, start_date, end_date)
+    return _export_response(db, stmt, "tracking_history", format, gzip, chunk_size, archived)
+
+
+@router.get("/export", dependencies=[admit("batches.export")])
+async def export_batches(
+    status: Optional[BatchStatus] = None,
+    location: Optional[str] = None,
+    product_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    format: str = Query("csv", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    chunk_size: Optional[int] = Query(None, ge=1, le=50000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Stream batch summaries ordered by batch ID; manufactured date range is inclusive"""
+    stmt = export_service.batch_export_query(status, location, product_id, start_date, end_date)
+    return _export_response(db, stmt, "batches", format, gzip, chunk_size)
+
+
+@router.get("/suggest", dependencies=[admit("batches.suggest")])
+async def suggest_similar(
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: str = Query("batch", pattern="^(batch|product|employee)$"),
+    limit: int = Query(5, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Top "did you mean" candidates for a misspelled batch code, product name or employee name"""
+    return {"query": q, "kind": kind, "suggestions": await async_crud_service.suggest_similar(db, kind, q, limit=limit)}
+
+
+@router.get("/expiring", dependencies=[admit("batches.expiring")])
+async def list_expiring_batches(
+    within_days: int = Query(30, ge=0, le=3650),
+    include_delivered: bool = False,
+    location: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Batches expiring in the next `within_days` days with their current status and location"""
+    page = await async_crud_service.get_expiring_batches(
+        db, within_days, include_delivered=include_delivered, location=location, limit=limit, cursor=cursor
+    )
+    return ORJSONResponse({"items": page.items, "next_cursor": page.next_cursor})
+
+
+@router.get("/expiry-risk", dependencies=[admit("batches.expiry_risk")])
+async def get_expiry_risk(include_delivered: bool = False, db: AsyncSession = Depends(get_async_db)):
+    """Batch counts and quantities per expiry bucket (expired, 0-30d, 31-60d, 61-90d, 90d+) and location"""
+    return await async_crud_service.get_expiry_risk_summary(db, include_delivered=include_delivered)
+
+
+@router.get("/snapshot", dependencies=[admit("batches.snapshot")])
+async def get_batch_state_snapshot(
+    status: Optional[List[BatchStatus]] = Query(None),
+    location: Optional[List[str]] = Query(None),
+    product_id: Optional[List[int]] = Query(None),
+    expiry_from: Optional[date] = None,
+    expiry_to: Optional[date] = None,
+    limit: int = Query(100, ge=0, le=1000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Current state of every live batch for dashboards: totals per status and location, plus the
+    `limit` soonest-expiring matches. Repeat status / location / product_id to match any of them;
+    the expiry window is inclusive
+    """
+    return ORJSONResponse(await async_crud_service.get_batch_state_snapshot(
+        db, status=status, location=location, product_id=product_id,
+        expiry_from=expiry_from, expiry_to=expiry_to, limit=limit
+    ))
+
+
+# =============================================================================
+# MULTI-KEY LOOKUPS
+# =============================================================================
+
+@router.post("/lookup", response_model=BatchLookup, dependencies=[admit("batches.lookup")])
+async def lookup_batches(request: BatchCodesRequest, db: AsyncSession = Depends(get_async_db)):
+    """Resolve many batch codes in one round trip; items keep the request order, unknown codes are in `missing`"""
+    found = await async_crud_service.get_batches_by_codes(db, request.batch_codes)
+    return ORJSONResponse({"items": [projections.batch_summary_of(batch) for batch in found.items],
+                           "missing": found.missing})
+
+
+@router.post("/lookup/employees", response_model=EmployeeLookup, dependencies=[admit("batches.lookup")])
+async def lookup_employees(request: EmployeeIdsRequest, db: AsyncSession = Depends(get_async_db)):
+    """Resolve many employee IDs (e.g. tracking handlers) in one round trip"""
+    found = await async_crud_service.get_employees_by_ids(db, request.employee_ids)
+    return ORJSONResponse({"items": [projections.employee_summary_of(employee) for employee in found.items],
+                           "missing": found.missing})
+
+
+@router.post("/lookup/products", response_model=ProductLookup, dependencies=[admit("batches.lookup")])
+async def lookup_products(request: ProductIdsRequest, db: AsyncSession = Depends(get_async_db)):
+    """Resolve many product IDs in one round trip"""
+    found = await async_crud_service.get_products_by_ids(db, request.product_ids)
+    return ORJSONResponse({"items": [projections.product_summary_of(product) for product in found.items],
+                           "missing": found.missing})
+
+
+@router.get("/{batch_code}/tracking", response_model=TrackingPage, dependencies=[admit("batches.tracking")])
+async def get_tracking_history(
+    batch_code: str,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    One page of a batch's tracking history, oldest first, with handler names and departments
+    Concurrent requests for the same page share one query (the page holds plain dataclasses)
+    """
+    async def load():
+        return await db.run_sync(projections.list_tracking_entries, batch_code, limit=limit, cursor=cursor)
+
+    if settings.SINGLE_FLIGHT_ENABLED:
+        page = await tracking_flight.do((batch_code, limit, cursor), load)
+    else:
+        page = await load()
+    return ORJSONResponse({"items": page.items, "next_cursor": page.next_cursor})
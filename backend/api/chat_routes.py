@@ -0,0 +1,41 @@
+"""
+Chatbot API routes
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+
+from api.admission import admit
+from database.database import get_db
+from services import chatbot_services
+
+
+router = APIRouter(prefix="/chat", tags=["chat"])
+
+
+class ChatRequest(BaseModel):
+    question: str = Field(..., min_length=1, max_length=2000)
+
+
+@router.post("", dependencies=[admit("chat")])
+def ask(request: ChatRequest, db: Session = Depends(get_db)):
+    """
+    Answer a chatbot question
+    Sync route: it runs in the threadpool, so a slow LLM call never blocks the event loop
+    """
+    return chatbot_services.answer_question(db, request.question)
+
+
+@router.get("/stats")
+def get_router_stats():
+    """How many questions took the fast path vs the LLM, per intent, and answer-cache hit ratio"""
+    return {**chatbot_services.router_stats.snapshot(), "answer_cache": chatbot_services.answer_cache.stats(),
+            "single_flight": chatbot_services.answer_flight.stats()}
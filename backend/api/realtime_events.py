@@ -0,0 +1,116 @@
+"""
+Socket.IO endpoint for live tracking updates (mounted at /socket.io)
+Clients emit "subscribe" with any of batch_codes / product_ids / locations and receive
+"tracking" messages: {"events": [...]} with the newest event per batch since the last push.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import asyncio
+from typing import List, Optional
+
+import socketio
+from sqlalchemy.engine import make_url
+
+from app.config import settings
+from services import realtime_service
+from services.realtime_service import PostgresListener, TrackingHub
+
+
+_origins = settings.REALTIME_CORS_ORIGINS
+sio = socketio.AsyncServer(
+    async_mode="asgi",
+    cors_allowed_origins="*" if _origins == "*" else [origin.strip() for origin in _origins.split(",")]
+)
+asgi_app = socketio.ASGIApp(sio, socketio_path=None)  # the mount point supplies the path
+
+
+async def _send(client_id: str, events: List[dict]) -> None:
+    await sio.emit("tracking", {"events": events}, to=client_id)
+
+
+async def _resync() -> None:
+    """Tell every client to re-read state after the listener missed notifications"""
+    await sio.emit("resync", {})
+
+
+hub = TrackingHub(_send)
+_tasks: List[asyncio.Task] = []
+_local_feeds: list = []
+
+
+# =============================================================================
+# SOCKET.IO EVENTS
+# =============================================================================
+
+@sio.event
+async def subscribe(sid, data):
+    """Add subscriptions; the ack lists everything the client is now subscribed to"""
+    data = data or {}
+    try:
+        topics = hub.subscribe(
+            sid,
+            batch_codes=data.get("batch_codes", ()),
+            product_ids=data.get("product_ids", ()),
+            locations=data.get("locations", ())
+        )
+    except (ValueError, TypeError) as e:
+        return {"error": str(e)}
+    return {"topics": sorted(topics)}
+
+
+@sio.event
+async def unsubscribe(sid, data):
+    """Remove the given topics (e.g. "batch:VDT-052025-A"), or all of them when none are given"""
+    topics: Optional[list] = (data or {}).get("topics")
+    return {"topics": sorted(hub.unsubscribe(sid, topics))}
+
+
+@sio.event
+async def disconnect(sid):
+    hub.unsubscribe(sid)
+
+
+# =============================================================================
+# LIFECYCLE
+# =============================================================================
+
+def _feed_from_loop(loop: asyncio.AbstractEventLoop):
+    def feed(events):
+        loop.call_soon_threadsafe(hub.feed, events)  # after_commit may run in a threadpool worker
+    return feed
+
+
+def _relay(events):
+    """Listener callback: the hub, plus in-process subscribers (e.g. services/batch_snapshot.py)"""
+    hub.feed(events)
+    realtime_service.local_notifier.deliver(events)
+
+
+async def start() -> None:
+    """Start the flush loop and the event source for this process"""
+    if _tasks:
+        return
+    _tasks.append(asyncio.create_task(hub.run()))
+    dialect = make_url(settings.DATABASE_URL).get_backend_name()
+    if realtime_service.resolve_backend(dialect) == "postgres":
+        listener = PostgresListener(settings.DATABASE_URL, _relay, on_reconnect=_resync)
+        _tasks.append(asyncio.create_task(listener.run()))
+    else:
+        feed = _feed_from_loop(asyncio.get_running_loop())
+        realtime_service.local_notifier.subscribe(feed)
+        _local_feeds.append(feed)
+
+
+async def stop() -> None:
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+    while _local_feeds:
+        realtime_service.local_notifier.unsubscribe(_local_feeds.pop())
@@ -0,0 +1,92 @@
+"""
+Response models for the batch endpoints
+These are the declared contract (OpenAPI docs, and what the tests validate responses against).
+At runtime the routes hand the projection dataclasses (services/projections.py, same field
+names) straight to api/responses.py: orjson writes dataclasses natively, several times faster
+than validating every row into a model first (see benchmarks/bench_serialization.py), and
+nothing touches an ORM relationship, so serializing can never trigger a lazy load.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class _Out(BaseModel):
+    model_config = ConfigDict(from_attributes=True)  # validates projection rows and dataclasses too
+
+
+class ProductOut(_Out):
+    id: int
+    name: str
+    category: str
+    unit_price: Decimal
+
+
+class EmployeeOut(_Out):
+    id: str
+    name: str
+    email: str
+    designation: str
+    department: str
+
+
+class TrackingOut(_Out):
+    id: int
+    timestamp: Optional[datetime]
+    status: str
+    location: str
+    handler_name: str
+    handler_department: str
+    notes: Optional[str] = None
+
+
+class BatchOut(_Out):
+    id: int
+    batch_code: str
+    product_id: int
+    product_name: str
+    category: str
+    quantity: int
+    manufactured_date: date
+    expiry_date: date
+    status: Optional[str] = None
+    location: Optional[str] = None
+
+
+# =============================================================================
+# RESPONSES
+# =============================================================================
+
+class BatchPage(_Out):
+    items: List[BatchOut]
+    next_cursor: Optional[str] = None
+
+
+class TrackingPage(_Out):
+    items: List[TrackingOut]
+    next_cursor: Optional[str] = None
+
+
+class BatchLookup(_Out):
+    items: List[BatchOut]
+    missing: List[str]
+
+
+class EmployeeLookup(_Out):
+    items: List[EmployeeOut]
+    missing: List[str]
+
+
+class ProductLookup(_Out):
+    items: List[ProductOut]
+    missing: List[int]
@@ -1,12 +1,33 @@
 """
 Configuration settings for the ERP Chatbot application
+Values come from the environment, plus the nearest .env file above this module (ENV_FILE
+names one explicitly; ENV_FILE="" skips it). Nothing else happens at import: no connections, no output.
 """
 import os
-from dotenv import load_dotenv
 from urllib.parse import quote_plus
 
-# Load environment variables from .env file
-load_dotenv()
+
+def _env_file() -> str:
+    if "ENV_FILE" in os.environ:
+        return os.environ["ENV_FILE"]
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for _ in range(3):  # app/, backend/, repository root
+        candidate = os.path.join(directory, ".env")
+        if os.path.isfile(candidate):
+            return candidate
+        directory = os.path.dirname(directory)
+    return ""
+
+
+def _load_env_file() -> None:
+    """Read the .env file into os.environ without overriding variables that are already set"""
+    path = _env_file()
+    if path and os.path.isfile(path):
+        from dotenv import load_dotenv  # only imported when there is a file to read
+        load_dotenv(path, override=False)
+
+
+_load_env_file()
 
 class Settings:
     # Database Configuration Components
@@ -19,11 +40,34 @@ class Settings:
     # Properly encode password for URL (handles special characters like @)
     _encoded_password = quote_plus(DB_PASSWORD)
 
-    # Construct DATABASE_URL with proper encoding
-    DATABASE_URL = f"postgresql://{DB_USER}:{_encoded_password}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    # Construct DATABASE_URL with proper encoding, unless it is set directly
+    # (e.g. DATABASE_URL=sqlite:// for an in-memory stand-in; see database/database.py)
+    DATABASE_URL = os.getenv("DATABASE_URL", f"postgresql://{DB_USER}:{_encoded_password}@{DB_HOST}:{DB_PORT}/{DB_NAME}")
 
-    # Alternative: You can also set DATABASE_URL directly from environment
-    # DATABASE_URL = os.getenv("DATABASE_URL", f"postgresql://{DB_USER}:{_encoded_password}@{DB_HOST}:{DB_PORT}/{DB_NAME}")
+    # Read replicas (database/routing.py): comma-separated URLs; empty means every query uses the primary
+    DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+
+    # Connection pools (ignored for SQLite)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_REPLICA_POOL_SIZE = int(os.getenv("DB_REPLICA_POOL_SIZE", "20"))
+    DB_REPLICA_MAX_OVERFLOW = int(os.getenv("DB_REPLICA_MAX_OVERFLOW", "20"))
+
+    # Replica routing: lag above REPLICA_MAX_LAG_SECONDS sends reads to the primary; after a write,
+    # reads stay on the primary for the observed lag (at least READ_YOUR_WRITES_SECONDS)
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+    REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "5"))
+    READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "0.5"))
+
+    # Async driver URL for the async data-access layer (database/async_database.py)
+    ASYNC_DATABASE_URL = os.getenv(
+        "ASYNC_DATABASE_URL",
+        f"postgresql+asyncpg://{DB_USER}:{_encoded_password}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    )
+    # asyncpg prepares every statement; this many stay prepared per connection (0 turns it off,
+    # e.g. behind PgBouncer in transaction mode)
+    ASYNC_PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv("ASYNC_PREPARED_STATEMENT_CACHE_SIZE", "500"))
 
     # Application Settings
     APP_NAME = "ERP Chatbot - Batch Control"
@@ -33,15 +77,93 @@ class Settings:
     API_HOST = os.getenv("API_HOST", "127.0.0.1")
     API_PORT = int(os.getenv("API_PORT", "8000"))
 
+    # SQL logging and instrumentation (services/query_metrics_service.py)
+    SQL_ECHO = os.getenv("SQL_ECHO", "False").lower() == "true"  # dumps every statement to stdout
+    SQL_METRICS_ENABLED = os.getenv("SQL_METRICS_ENABLED", "True").lower() == "true"
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+
+    # Pagination (list endpoints and crud_service list functions)
+    DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "50"))
+    MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+
+    # Bulk tracking-event ingestion (scanner feeds)
+    INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "1000"))
+    INGEST_MAX_REPORTED_REJECTS = int(os.getenv("INGEST_MAX_REPORTED_REJECTS", "1000"))
+
+    # batch_tracking partitioning and archival (services/tracking_partition_service.py)
+    TRACKING_PARTITION_MONTHS_AHEAD = int(os.getenv("TRACKING_PARTITION_MONTHS_AHEAD", "3"))
+    TRACKING_ARCHIVE_AFTER_MONTHS = int(os.getenv("TRACKING_ARCHIVE_AFTER_MONTHS", "6"))
+    TRACKING_ARCHIVE_DIR = os.getenv(
+        "TRACKING_ARCHIVE_DIR",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "archive", "batch_tracking")
+    )
+    TRACKING_ARCHIVE_FORMAT = os.getenv("TRACKING_ARCHIVE_FORMAT", "csv.gz")  # or "parquet" (needs pyarrow)
+    # Parsed archive rows are cached per (file, batch); archive files never change once written
+    TRACKING_ARCHIVE_CACHE_MAX_BATCHES = int(os.getenv("TRACKING_ARCHIVE_CACHE_MAX_BATCHES", "10000"))
+
     # Security
     SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production")
 
     # AI/ML Settings (for later phases)
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
+    GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-pro")
+
+    # Incremental readers (analytics, batch snapshot, fuzzy index) re-read this many IDs below their
+    # high-water mark, so a row whose transaction drew a lower ID but committed later is not skipped
+    INCREMENTAL_OVERLAP_IDS = int(os.getenv("INCREMENTAL_OVERLAP_IDS", "1000"))
+
+    # Chat answer cache (services/chatbot_services.py). Entries are checked against data versions that
+    # are only shared between workers through Redis (CACHE_REDIS_ENABLED); with process-local versions
+    # another worker's write would not reach them and answers could stay stale for the whole TTL.
+    # "auto" therefore enables it only with Redis; "true" forces it on (single-worker deployments)
+    _chat_cache = os.getenv("CHAT_CACHE_ENABLED", "auto").lower()
+    CHAT_CACHE_ENABLED = (os.getenv("CACHE_REDIS_ENABLED", "False").lower() == "true" if _chat_cache == "auto"
+                          else _chat_cache == "true")
+    CHAT_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "5000"))
+    CHAT_CACHE_TTL_SECONDS = float(os.getenv("CHAT_CACHE_TTL_SECONDS", "600"))
+
+    # "Did you mean" index over batch codes and names (services/fuzzy_index.py)
+    FUZZY_INDEX_WARM_ON_STARTUP = os.getenv("FUZZY_INDEX_WARM_ON_STARTUP", "True").lower() == "true"
+
+    # Columnar in-memory batch state for dashboards (services/batch_snapshot.py)
+    SNAPSHOT_CATCH_UP_SECONDS = float(os.getenv("SNAPSHOT_CATCH_UP_SECONDS", "5"))
+
+    # Real-time tracking updates over Socket.IO (services/realtime_service.py)
+    REALTIME_ENABLED = os.getenv("REALTIME_ENABLED", "True").lower() == "true"
+    REALTIME_BACKEND = os.getenv("REALTIME_BACKEND", "auto")  # "postgres" (LISTEN/NOTIFY), "memory" (single process) or "auto"
+    REALTIME_CHANNEL = os.getenv("REALTIME_CHANNEL", "batch_tracking")
+    REALTIME_FLUSH_INTERVAL_SECONDS = float(os.getenv("REALTIME_FLUSH_INTERVAL_SECONDS", "0.5"))
+    REALTIME_MAX_TOPICS_PER_CLIENT = int(os.getenv("REALTIME_MAX_TOPICS_PER_CLIENT", "200"))
+    REALTIME_CORS_ORIGINS = os.getenv("REALTIME_CORS_ORIGINS", "*")
 
     # Redis Settings (optional - for Phase 6)
     REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
 
+    # Read-through lookup cache (services/cache_service.py)
+    CACHE_ENABLED = os.getenv("CACHE_ENABLED", "True").lower() == "true"
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+    CACHE_LOCAL_TTL_SECONDS = float(os.getenv("CACHE_LOCAL_TTL_SECONDS", "30"))
+    CACHE_REDIS_ENABLED = os.getenv("CACHE_REDIS_ENABLED", "False").lower() == "true"
+    CACHE_REDIS_TTL_SECONDS = int(os.getenv("CACHE_REDIS_TTL_SECONDS", "600"))
+
+    # Identical concurrent lookups share one in-flight query (services/single_flight.py)
+    SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "True").lower() == "true"
+
+    # Per-endpoint admission control (services/admission_control.py): at most ADMISSION_MAX_CONCURRENT
+    # requests per endpoint run at once (default: the pool size), ADMISSION_MAX_QUEUE more wait up to
+    # ADMISSION_QUEUE_TIMEOUT_SECONDS, the rest get 503. ADMISSION_LIMITS overrides the concurrency
+    # per endpoint, e.g. "chat=8,batches.export=2"
+    ADMISSION_CONTROL_ENABLED = os.getenv("ADMISSION_CONTROL_ENABLED", "True").lower() == "true"
+    ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", str(DB_POOL_SIZE)))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "100"))
+    ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "5"))
+    ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+    ADMISSION_LIMITS = {
+        name.strip(): int(limit)
+        for name, _, limit in (item.partition("=") for item in os.getenv("ADMISSION_LIMITS", "").split(","))
+        if name.strip() and limit.strip()
+    }
+
 # Create settings instance
 settings = Settings()
 
@@ -1,24 +1,51 @@
-from fastapi import FastAPI, Depends
-from sqlalchemy.orm import Session
-from backend.database.database import SessionLocal, engine
+import sys, os
 
-# Create tables
-models.Base.metadata.create_all(bind=engine)
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
 
-app = FastAPI()
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
+from app.config import settings
+from api.api_routes import api_router
+from api import realtime_events
+from database.async_database import dispose_async_engine
+from database.database import dispose_engine
+from services.query_metrics_service import QueryMetricsMiddleware, render_metrics
+from services.fuzzy_index import warm_fuzzy_index
+
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.FUZZY_INDEX_WARM_ON_STARTUP:
+        await asyncio.to_thread(warm_fuzzy_index)
+    if settings.REALTIME_ENABLED:
+        await realtime_events.start()
+    yield
+    await realtime_events.stop()
+    await dispose_async_engine()
+    dispose_engine()
+
+
+app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
+app.add_middleware(QueryMetricsMiddleware)
+app.include_router(api_router)
+app.mount("/socket.io", realtime_events.asgi_app)
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 @app.get("/")
 def read_root():
     return {"message": "FastAPI + PostgreSQL is connected!"}
 
-@app.get("/users")
-def get_users(db: Session = Depends(get_db)):
-    return db.query(models.User).all()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """SQL instrumentation histograms in Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,184 @@
+"""
+Benchmark every read function in services/crud_service.py against a populated database
+Usage (from backend/):
+    python -m benchmarks.bench_crud --scale 10k --load            # populate empty tables first
+    python -m benchmarks.bench_crud --scale 1m --save-baseline
+    python -m benchmarks.bench_crud --scale 1m --compare           # exit code 1 on regressions
+The database comes from --database-url or settings.DATABASE_URL.
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import argparse
+import itertools
+import random
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import create_engine, select, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from benchmarks import harness
+from database.database import Base
+from database.sample_data import SCALES, load_sample_data
+from models.user_models import Batch, Employee, Product, Department, BatchCurrentState, BatchStatus
+from services import crud_service
+
+
+BASELINE_DIR = os.path.join(current_dir, "baselines")
+# Answered from in-process indexes: once warm they run no queries per call, only a periodic refresh
+IN_MEMORY_CASES = {"suggest_similar", "get_batch_state_snapshot"}
+# Read through the lookup cache (services/cache_service.py): a key already read runs no queries
+CACHED_CASES = {"get_current_batch_location", "get_batch_current_status", "get_employee_by_id",
+                "get_product_by_id", "get_department_by_id"}
+
+
+def sample_keys(engine: Engine, seed: int, size: int = 200) -> Dict[str, list]:
+    """A fixed random sample of existing keys to feed the lookups"""
+    rng = random.Random(seed)
+
+    def sample(column):
+        with engine.connect() as connection:
+            values = list(connection.execute(select(column).order_by(column).limit(size * 20)).scalars())
+        return rng.sample(values, min(size, len(values))) or [None]
+
+    return {
+        "batch_codes": sample(Batch.batch_code),
+        "batch_ids": sample(Batch.id),
+        "employee_ids": sample(Employee.id),
+        "employee_emails": sample(Employee.email),
+        "product_ids": sample(Product.id),
+        "product_names": [name.split()[0] for name in sample(Product.name) if name],
+        "categories": sample(Product.category),
+        "department_ids": sample(Department.id),
+        "department_names": sample(Department.name),
+        "locations": sample(BatchCurrentState.location),
+    }
+
+
+def build_cases(session_factory, keys: Dict[str, list]) -> Dict[str, Callable[[], object]]:
+    """One zero-argument callable per crud function; each call uses a fresh session like a request would"""
+    cycles = {name: itertools.cycle(values) for name, values in keys.items()}
+    statuses = itertools.cycle(list(BatchStatus))
+
+    def case(fn, *key_names, **kwargs):
+        def call():
+            with session_factory() as db:
+                return fn(db, *(next(cycles[key]) for key in key_names), **kwargs)
+        return call
+
+    def status_case():
+        with session_factory() as db:
+            return crud_service.get_batches_by_status(db, next(statuses))
+
+    def many_case(fn, key_name, count=50):
+        def call():
+            with session_factory() as db:
+                return fn(db, [next(cycles[key_name]) for _ in range(count)])
+        return call
+
+    def misspelled_code_case():
+        with session_factory() as db:
+            code = next(cycles["batch_codes"])
+            return crud_service.suggest_similar(db, "batch", code[:-2] + code[-1:])
+
+    def date_range_case():
+        from datetime import date
+        with session_factory() as db:
+            return crud_service.get_batches_by_date_range(db, date(2023, 1, 1), date(2023, 3, 31))
+
+    return {
+        "get_batch_by_code": case(crud_service.get_batch_by_code, "batch_codes"),
+        "get_batch_by_id": case(crud_service.get_batch_by_id, "batch_ids"),
+        "get_batches_by_status": status_case,
+        "get_batches_by_location": case(crud_service.get_batches_by_location, "locations"),
+        "get_batches_by_product": case(crud_service.get_batches_by_product, "product_names"),
+        "search_batches": case(crud_service.search_batches, "product_names"),
+        "search_batches_code_prefix": case(crud_service.search_batches, "batch_codes"),
+        "get_batch_tracking_history": case(crud_service.get_batch_tracking_history, "batch_codes"),
+        "get_batch_current_state": case(crud_service.get_batch_current_state, "batch_codes"),
+        "get_current_batch_location": case(crud_service.get_current_batch_location, "batch_codes"),
+        "get_batch_current_status": case(crud_service.get_batch_current_status, "batch_codes"),
+        "get_employee_by_id": case(crud_service.get_employee_by_id, "employee_ids"),
+        "get_employee_by_email": case(crud_service.get_employee_by_email, "employee_emails"),
+        "get_employees_by_department": case(crud_service.get_employees_by_department, "department_names"),
+        "get_batch_handlers": case(crud_service.get_batch_handlers, "batch_codes"),
+        "get_product_by_id": case(crud_service.get_product_by_id, "product_ids"),
+        "get_products_by_category": case(crud_service.get_products_by_category, "categories"),
+        "search_products": case(crud_service.search_products, "product_names"),
+        "get_department_by_id": case(crud_service.get_department_by_id, "department_ids"),
+        "get_department_by_name": case(crud_service.get_department_by_name, "department_names"),
+        "get_batch_statistics": case(crud_service.get_batch_statistics),
+        "get_batches_by_date_range": date_range_case,
+        "get_batches_by_codes": many_case(crud_service.get_batches_by_codes, "batch_codes"),
+        "get_employees_by_ids": many_case(crud_service.get_employees_by_ids, "employee_ids"),
+        "get_products_by_ids": many_case(crud_service.get_products_by_ids, "product_ids"),
+        "get_expiring_batches": case(crud_service.get_expiring_batches, within_days=365),
+        "get_expiry_risk_summary": case(crud_service.get_expiry_risk_summary),
+        "suggest_similar": misspelled_code_case,
+        "get_batch_state_snapshot": case(crud_service.get_batch_state_snapshot),
+    }
+
+
+def run_benchmarks(engine: Engine, scale: str, seed: int = 42, iterations: int = 50,
+                   warmup: int = 5, only: List[str] = None) -> Tuple[dict, List[harness.CaseResult]]:
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    cases = build_cases(session_factory, sample_keys(engine, seed))
+    results = [
+        harness.run_case(name, fn, engine, iterations=iterations, warmup=warmup)
+        for name, fn in cases.items() if not only or name in only
+    ]
+    return harness.report(results, scale=scale, seed=seed, dialect=engine.dialect.name,
+                          iterations=iterations), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark crud_service read functions")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="10k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="run just these cases")
+    parser.add_argument("--load", action="store_true", help="create tables and load the scale if batches is empty")
+    parser.add_argument("--baseline", help="baseline file (default benchmarks/baselines/crud_<dialect>_<scale>.json)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    if args.load:
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            if not connection.execute(select(func.count()).select_from(Batch)).scalar():
+                load_sample_data(connection, scale=args.scale, seed=args.seed)
+
+    data, results = run_benchmarks(engine, args.scale, args.seed, args.iterations, args.warmup, args.only)
+    print(harness.format_table(results))
+
+    path = args.baseline or os.path.join(BASELINE_DIR, f"crud_{engine.dialect.name}_{args.scale}.json")
+    if args.save_baseline:
+        harness.save_baseline(path, data)
+        print(f"💾 Baseline saved to {path}")
+    if args.compare:
+        baseline = harness.load_baseline(path)
+        if baseline is None:
+            print(f"❌ No baseline at {path}")
+            sys.exit(2)
+        regressions = harness.compare(data, baseline, tolerance=args.tolerance)
+        for line in regressions:
+            print(f"❌ {line}")
+        if regressions:
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
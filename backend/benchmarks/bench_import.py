@@ -0,0 +1,128 @@
+"""
+Cold-start import benchmark: how long a fresh interpreter takes to import the entry modules
+Each module is imported in a new subprocess with -X importtime; the median of several runs is
+checked against a per-module budget. A run also fails if the import prints anything or pulls in
+a module that must stay deferred (AI SDKs, dataframes, database drivers), since that is how
+cold start usually regresses.
+Usage (from backend/):
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --module app.main --budget-ms 1500 --runs 7 --top 15
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import argparse
+import statistics
+import subprocess
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+
+# Median cumulative import time budgets, in milliseconds
+BUDGETS_MS = {
+    "app.config": 50,
+    "database.database": 600,
+    "app.main": 2500,
+}
+
+# Imported lazily where they are used; none of them may load at import time
+DEFERRED_MODULES = (
+    "google.generativeai", "langchain", "sentence_transformers", "faiss", "chromadb",
+    "pandas", "numpy", "pyarrow", "psycopg2", "asyncpg",
+)
+
+
+@dataclass
+class ImportProfile:
+    module: str
+    total_ms: float
+    output: str
+    modules: Dict[str, Tuple[float, float]] = field(default_factory=dict)  # name -> (self ms, cumulative ms)
+
+    def deferred_loaded(self) -> List[str]:
+        return sorted(name for name in DEFERRED_MODULES if name in self.modules)
+
+    def slowest(self, n: int = 10) -> List[Tuple[str, float]]:
+        """Modules with the largest self time"""
+        ranked = sorted(self.modules.items(), key=lambda item: item[1][0], reverse=True)
+        return [(name, times[0]) for name, times in ranked[:n]]
+
+
+@dataclass
+class ImportResult:
+    module: str
+    median_ms: float
+    budget_ms: float
+    output: str
+    deferred_loaded: List[str]
+
+    @property
+    def ok(self) -> bool:
+        return self.median_ms <= self.budget_ms and not self.output and not self.deferred_loaded
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[float, float]]:
+    """`import time: self | cumulative | name` lines (microseconds) as name -> (self ms, cumulative ms)"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if self_us.isdigit():
+            modules[name] = (int(self_us) / 1000, int(cumulative_us) / 1000)
+    return modules
+
+
+def measure_import(module: str, env: Optional[dict] = None) -> ImportProfile:
+    """Import `module` in a fresh interpreter (from backend/) and profile it"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=parent_dir, env={**os.environ, **(env or {})}, capture_output=True, text=True, check=True
+    )
+    modules = parse_importtime(completed.stderr)
+    return ImportProfile(module, modules.get(module, (0.0, 0.0))[1], completed.stdout, modules)
+
+
+def check_budget(module: str, budget_ms: float, runs: int = 5, env: Optional[dict] = None) -> ImportResult:
+    profiles = [measure_import(module, env) for _ in range(runs)]
+    return ImportResult(
+        module=module,
+        median_ms=statistics.median(profile.total_ms for profile in profiles),
+        budget_ms=budget_ms,
+        output=profiles[0].output,
+        deferred_loaded=profiles[0].deferred_loaded()
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold-start import time")
+    parser.add_argument("--module", action="append", help="module to import (default: every module in BUDGETS_MS)")
+    parser.add_argument("--budget-ms", type=float, help="budget for --module (default: BUDGETS_MS entry)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="show the slowest modules of the last profile")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.module or list(BUDGETS_MS):
+        budget = args.budget_ms or BUDGETS_MS.get(module, BUDGETS_MS["app.main"])
+        result = check_budget(module, budget, runs=args.runs)
+        mark = "✅" if result.ok else "❌"
+        print(f"{mark} {module}: median {result.median_ms:.1f} ms (budget {budget:.0f} ms)")
+        if result.output:
+            print(f"   prints at import: {result.output.strip()[:200]!r}")
+        if result.deferred_loaded:
+            print(f"   loads deferred modules: {', '.join(result.deferred_loaded)}")
+        if args.top:
+            for name, self_ms in measure_import(module).slowest(args.top):
+                print(f"   {self_ms:8.1f} ms  {name}")
+        failed = failed or not result.ok
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Serialization benchmark for large batch lists and long tracking histories
+Compares, on the same synthetic projection rows, FastAPI's default path (jsonable_encoder +
+json.dumps), validating into the api/schemas.py models and dumping them with pydantic-core,
+and the path the batch routes use (the rows straight through api/responses.py, i.e. orjson).
+Reports rows per second for each.
+Usage (from backend/):
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --batches 50000 --tracking 200000 --runs 7
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import argparse
+import json
+import statistics
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+
+from api import responses
+from api.schemas import BatchPage, TrackingPage
+from services.projections import BatchSummary, TrackingEntry
+
+
+STATUSES = ("Manufactured", "In Transit", "Delivered")
+
+
+@dataclass
+class Result:
+    case: str
+    encoder: str
+    rows: int
+    median_ms: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / (self.median_ms / 1000) if self.median_ms else float("inf")
+
+
+def batch_rows(n: int) -> List[BatchSummary]:
+    return [
+        BatchSummary(id=i, batch_code=f"VDT-{i:06d}-A", product_id=i % 500, product_name=f"Product {i % 500}",
+                     category="Supplements", quantity=100 + i % 900,
+                     manufactured_date=date(2025, 1, 1) + timedelta(days=i % 365),
+                     expiry_date=date(2027, 1, 1) + timedelta(days=i % 365),
+                     status=STATUSES[i % 3], location=f"Warehouse {i % 40}")
+        for i in range(n)
+    ]
+
+
+def tracking_rows(n: int) -> List[TrackingEntry]:
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        TrackingEntry(id=i, timestamp=start + timedelta(minutes=i), status=STATUSES[i % 3],
+                      location=f"Checkpoint {i % 60}", handler_name=f"Handler {i % 80}",
+                      handler_department="Logistics", notes=None if i % 4 else "temperature checked")
+        for i in range(n)
+    ]
+
+
+def encoders(rows: list, page_model) -> Dict[str, Callable[[], bytes]]:
+    """Each callable turns the same page of rows into JSON bytes"""
+    content = {"items": rows, "next_cursor": None}
+    return {
+        "jsonable_encoder": lambda: json.dumps(jsonable_encoder(content)).encode(),
+        "pydantic_models": lambda: responses.dumps(page_model.model_validate(content)),
+        "orjson_rows": lambda: responses.dumps(content),
+    }
+
+
+def time_encoder(fn: Callable[[], bytes], runs: int) -> float:
+    fn()  # warm-up (schema and serializer caches)
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def run(batches: int = 10_000, tracking: int = 50_000, runs: int = 5) -> List[Result]:
+    cases = {
+        "batch_list": (batch_rows(batches), BatchPage),
+        "tracking_history": (tracking_rows(tracking), TrackingPage),
+    }
+    results = []
+    for case, (rows, page_model) in cases.items():
+        for name, fn in encoders(rows, page_model).items():
+            results.append(Result(case, name, len(rows), round(time_encoder(fn, runs), 3)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON serialization of batch endpoints")
+    parser.add_argument("--batches", type=int, default=10_000)
+    parser.add_argument("--tracking", type=int, default=50_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'case':18} {'encoder':18} {'rows':>8} {'median ms':>10} {'rows/s':>12}")
+    for r in run(args.batches, args.tracking, args.runs):
+        print(f"{r.case:18} {r.encoder:18} {r.rows:8d} {r.median_ms:10.2f} {r.rows_per_second:12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Micro-benchmark: Python overhead per hot lookup, Query chain vs prebuilt statement
+Runs against an in-memory SQLite database, where the database work per lookup is tiny, so the
+time per call is almost all SQLAlchemy: building the query and its loader options, the
+compiled-cache lookup, and loading the row. "query_chain" is how the lookups were written before
+(db.query(...).options(...).filter(...).first()); "statement" is the crud_service function now.
+Usage (from backend/):
+    python -m benchmarks.bench_statements
+    python -m benchmarks.bench_statements --calls 5000 --repeats 7
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import argparse
+import itertools
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database.database import Base
+from database.sample_data import load_sample_data
+from models.user_models import Batch, Employee, Product
+from services import crud_service, loader_profiles, statements
+
+
+@dataclass
+class Result:
+    lookup: str
+    query_chain_us: float
+    statement_us: float
+
+    @property
+    def speedup(self) -> float:
+        return self.query_chain_us / self.statement_us if self.statement_us else float("inf")
+
+
+# The pre-statement implementations, kept here as the "before" side
+def _batch_by_code_query(db: Session, batch_code: str, profile: str = loader_profiles.DETAIL):
+    return db.query(Batch).options(*loader_profiles.batch_options(profile)).filter(Batch.batch_code == batch_code).first()
+
+
+def _employee_by_email_query(db: Session, email: str):
+    return db.query(Employee).options(*loader_profiles.employee_options()).filter(Employee.email == email).first()
+
+
+def _product_by_id_query(db: Session, product_id: int):
+    return db.query(Product).filter(Product.id == product_id).first()
+
+
+def create_sample_engine(scale: str = "tiny", seed: int = 42) -> Engine:
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        load_sample_data(connection, scale=scale, seed=seed)
+    return engine
+
+
+def lookups(engine: Engine) -> Dict[str, Tuple[Callable, Callable, List]]:
+    """name -> (before, after, keys)"""
+    with engine.connect() as connection:
+        codes = list(connection.execute(select(Batch.batch_code)).scalars())
+        emails = list(connection.execute(select(Employee.email)).scalars())
+        product_ids = list(connection.execute(select(Product.id)).scalars())
+    return {
+        "get_batch_by_code[detail]": (_batch_by_code_query, crud_service.get_batch_by_code, codes),
+        "get_batch_by_code[summary]": (
+            lambda db, code: _batch_by_code_query(db, code, loader_profiles.SUMMARY),
+            lambda db, code: crud_service.get_batch_by_code(db, code, loader_profiles.SUMMARY),
+            codes
+        ),
+        "get_employee_by_email": (_employee_by_email_query, crud_service.get_employee_by_email, emails),
+        "get_product_by_id": (  # crud_service.get_product_by_id reads the lookup cache, so time the statement itself
+            _product_by_id_query,
+            lambda db, product_id: db.execute(statements.product_by_id(), {"product_id": product_id}).scalars().first(),
+            product_ids
+        ),
+    }
+
+
+def time_per_call(session_factory, fn: Callable, keys: List, calls: int, repeats: int) -> float:
+    """Median microseconds per call; each repeat uses a fresh session and cycles through the keys"""
+    timings = []
+    for _ in range(repeats + 1):  # the first repeat warms the compiled cache and is dropped
+        key_cycle = itertools.cycle(keys)
+        with session_factory() as db:
+            started = time.perf_counter()
+            for _ in range(calls):
+                fn(db, next(key_cycle))
+                db.expunge_all()  # load the row every time, as a new request would
+            timings.append((time.perf_counter() - started) / calls * 1_000_000)
+    return statistics.median(timings[1:])
+
+
+def run(engine: Engine = None, calls: int = 1000, repeats: int = 5) -> List[Result]:
+    engine = engine or create_sample_engine()
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    return [
+        Result(name,
+               round(time_per_call(session_factory, before, keys, calls, repeats), 1),
+               round(time_per_call(session_factory, after, keys, calls, repeats), 1))
+        for name, (before, after, keys) in lookups(engine).items()
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Python overhead of hot crud_service lookups")
+    parser.add_argument("--scale", default="tiny")
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'lookup':28} {'query chain µs':>15} {'statement µs':>13} {'speedup':>8}")
+    for r in run(create_sample_engine(args.scale), args.calls, args.repeats):
+        print(f"{r.lookup:28} {r.query_chain_us:15.1f} {r.statement_us:13.1f} {r.speedup:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Small benchmark harness: latency percentiles, SQL statements per call, peak Python
+memory, and comparison against a stored JSON baseline.
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import json
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from typing import Callable, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@dataclass
+class CaseResult:
+    name: str
+    iterations: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    queries_per_call: float
+    peak_kib: float
+
+
+class QueryCounter:
+    """Counts statements sent to the database while active"""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of an unsorted list (pct in 0..100)"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def run_case(name: str, fn: Callable[[], object], engine: Engine,
+             iterations: int = 50, warmup: int = 5) -> CaseResult:
+    """
+    Time `fn` `iterations` times after `warmup` untimed calls
+    Peak memory is measured in one extra call under tracemalloc, since tracing slows every allocation
+    """
+    for _ in range(warmup):
+        fn()
+
+    timings = []
+    with QueryCounter(engine) as counter:
+        for _ in range(iterations):
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return CaseResult(
+        name=name,
+        iterations=iterations,
+        p50_ms=round(percentile(timings, 50), 4),
+        p95_ms=round(percentile(timings, 95), 4),
+        p99_ms=round(percentile(timings, 99), 4),
+        mean_ms=round(sum(timings) / len(timings), 4),
+        queries_per_call=round(counter.count / iterations, 2),
+        peak_kib=round(peak / 1024, 1)
+    )
+
+
+# =============================================================================
+# BASELINES
+# =============================================================================
+
+def report(results: List[CaseResult], **meta) -> dict:
+    return {**meta, "cases": {result.name: asdict(result) for result in results}}
+
+
+def save_baseline(path: str, data: dict) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.25, min_delta_ms: float = 0.5) -> List[str]:
+    """
+    Regressions of `current` against `baseline`
+    A case regresses when its p95 grows by more than `tolerance` (fraction) and by at least
+    `min_delta_ms` (to ignore timer noise on sub-millisecond calls), or when it issues more queries.
+    """
+    regressions = []
+    for name, base in baseline.get("cases", {}).items():
+        case = current.get("cases", {}).get(name)
+        if case is None:
+            regressions.append(f"{name}: missing from current run")
+            continue
+        delta = case["p95_ms"] - base["p95_ms"]
+        if delta > base["p95_ms"] * tolerance and delta >= min_delta_ms:
+            regressions.append(f"{name}: p95 {base['p95_ms']:.2f}ms -> {case['p95_ms']:.2f}ms")
+        if case["queries_per_call"] > base["queries_per_call"]:
+            regressions.append(
+                f"{name}: queries/call {base['queries_per_call']} -> {case['queries_per_call']}"
+            )
+    return regressions
+
+
+def format_table(results: List[CaseResult]) -> str:
+    lines = [f"{'case':36} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8} {'peak KiB':>9}"]
+    for r in results:
+        lines.append(f"{r.name:36} {r.p50_ms:9.3f} {r.p95_ms:9.3f} {r.p99_ms:9.3f} "
+                     f"{r.queries_per_call:8.2f} {r.peak_kib:9.1f}")
+    return "\n".join(lines)
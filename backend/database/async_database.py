@@ -0,0 +1,84 @@
+"""
+Async database engine and session management
+Mirrors database.py for async FastAPI routes; the sync engine and SessionLocal keep working.
+The engine is created on first use so importing this module never needs the async driver.
+"""
+import sys
+import os
+
+# Add the parent directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing import AsyncIterator, Optional
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from services.query_metrics_service import instrument_engine
+
+
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def _async_url(url: str):
+    """The URL with asyncpg's prepared statement cache size set, unless the URL sets it already"""
+    url = make_url(url)
+    if url.drivername == "postgresql+asyncpg" and "prepared_statement_cache_size" not in url.query:
+        url = url.update_query_dict({
+            "prepared_statement_cache_size": str(settings.ASYNC_PREPARED_STATEMENT_CACHE_SIZE)
+        })
+    return url
+
+
+def get_async_engine() -> AsyncEngine:
+    """Create the async engine on first use and reuse it afterwards"""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            _async_url(settings.ASYNC_DATABASE_URL),
+            echo=settings.SQL_ECHO,
+            pool_pre_ping=True,
+            pool_recycle=300
+        )
+        instrument_engine(_async_engine.sync_engine)
+    return _async_engine
+
+
+def get_async_session_factory() -> async_sessionmaker:
+    """Session factory bound to the async engine"""
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(
+            bind=get_async_engine(),
+            autoflush=False,
+            expire_on_commit=False  # returned objects stay readable after commit without a lazy refresh
+        )
+    return _async_session_factory
+
+
+def configure_async_engine(engine: AsyncEngine) -> None:
+    """Point the async layer at a specific engine (e.g. an aiosqlite engine in tests)"""
+    global _async_engine, _async_session_factory
+    _async_engine = engine
+    instrument_engine(engine.sync_engine)
+    _async_session_factory = None
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    Async database session dependency for FastAPI
+    Drop-in replacement for get_db in async routes
+    """
+    async with get_async_session_factory()() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    """Close pooled connections, e.g. on application shutdown"""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _async_session_factory = None
@@ -9,7 +9,7 @@ parent_dir = os.path.dirname(current_dir)
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
-from database.database import engine
+from database.database import get_engine
 from sqlalchemy import text, inspect
 
 
@@ -19,7 +19,7 @@ def check_table_schema():
     tables_to_check = ['departments', 'employees', 'products', 'batches', 'batch_tracking']
 
     try:
-        inspector = inspect(engine)
+        inspector = inspect(get_engine())
 
         for table_name in tables_to_check:
             print(f"\n📋 Table: {table_name}")
@@ -45,7 +45,7 @@ def check_with_sql():
     tables_to_check = ['departments', 'employees', 'products', 'batches', 'batch_tracking']
 
     try:
-        with engine.connect() as connection:
+        with get_engine().connect() as connection:
             for table_name in tables_to_check:
                 print(f"\n📋 Table: {table_name}")
                 print("-" * 40)
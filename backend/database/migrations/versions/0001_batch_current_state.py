@@ -0,0 +1,49 @@
+"""add batch_current_state projection
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    batch_status = postgresql.ENUM("MANUFACTURED", "IN_TRANSIT", "DELIVERED", name="batchstatus", create_type=False)
+
+    op.create_table(
+        "batch_current_state",
+        sa.Column("batch_id", sa.Integer(), sa.ForeignKey("batches.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("status", batch_status, nullable=False),
+        sa.Column("location", sa.String(200), nullable=False),
+        sa.Column("handled_by", postgresql.UUID(as_uuid=True), sa.ForeignKey("employees.id"), nullable=False),
+        sa.Column("last_timestamp", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_tracking_id", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_batch_current_state_status", "batch_current_state", ["status"])
+    op.create_index("ix_batch_current_state_location", "batch_current_state", ["location"])
+
+    # Backfill from the existing history: latest record per batch
+    op.execute("""
+        INSERT INTO batch_current_state (batch_id, status, location, handled_by, last_timestamp, last_tracking_id)
+        SELECT DISTINCT ON (batch_id) batch_id, status, location, handled_by, timestamp, id
+        FROM batch_tracking
+        ORDER BY batch_id, timestamp DESC, id DESC
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_batch_current_state_location", table_name="batch_current_state")
+    op.drop_index("ix_batch_current_state_status", table_name="batch_current_state")
+    op.drop_table("batch_current_state")
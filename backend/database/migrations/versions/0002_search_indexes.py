@@ -0,0 +1,54 @@
+"""add trigram and prefix indexes for search
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TRIGRAM_INDEXES = [
+    ("ix_batches_batch_code_trgm", "batches", "batch_code"),
+    ("ix_products_name_trgm", "products", "name"),
+    ("ix_products_category_trgm", "products", "category"),
+    ("ix_departments_name_trgm", "departments", "name"),
+    ("ix_batch_current_state_location_trgm", "batch_current_state", "location"),
+]
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # GIN trigram indexes serve ILIKE '%term%' filters and the % similarity operator
+    for index_name, table_name, column_name in TRIGRAM_INDEXES:
+        op.create_index(
+            index_name,
+            table_name,
+            [column_name],
+            postgresql_using="gin",
+            postgresql_ops={column_name: "gin_trgm_ops"}
+        )
+
+    # Pattern-ops B-tree for the batch code prefix fast path (LIKE 'VDT-05%')
+    op.create_index(
+        "ix_batches_batch_code_prefix",
+        "batches",
+        ["batch_code"],
+        postgresql_ops={"batch_code": "varchar_pattern_ops"}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_batches_batch_code_prefix", table_name="batches")
+    for index_name, table_name, _ in reversed(TRIGRAM_INDEXES):
+        op.drop_index(index_name, table_name=table_name)
@@ -0,0 +1,112 @@
+"""partition batch_tracking by month and add archive catalog
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 1. Swap the plain table for a RANGE (timestamp) partitioned one.
+    #    The primary key must include the partition key, so it becomes (id, timestamp).
+    op.execute("ALTER SEQUENCE batch_tracking_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE batch_tracking RENAME TO batch_tracking_legacy")
+    op.execute("""
+        CREATE TABLE batch_tracking (
+            id INTEGER NOT NULL DEFAULT nextval('batch_tracking_id_seq'),
+            batch_id INTEGER NOT NULL REFERENCES batches (id),
+            location VARCHAR(200) NOT NULL,
+            status batchstatus NOT NULL,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            handled_by UUID NOT NULL REFERENCES employees (id),
+            notes VARCHAR(500),
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.execute("ALTER SEQUENCE batch_tracking_id_seq OWNED BY batch_tracking.id")
+    op.execute("CREATE INDEX ix_batch_tracking_batch_id_timestamp ON batch_tracking (batch_id, timestamp)")
+
+    # 2. One partition per month from the oldest row through three months ahead, plus a DEFAULT
+    #    partition so an unexpected timestamp never fails an insert.
+    op.execute("""
+        DO $$
+        DECLARE
+            month_start DATE := date_trunc('month', COALESCE(
+                (SELECT min(timestamp) FROM batch_tracking_legacy), now()))::date;
+            last_month DATE := (date_trunc('month', now()) + interval '3 months')::date;
+        BEGIN
+            WHILE month_start <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF batch_tracking FOR VALUES FROM (%L) TO (%L)',
+                    'batch_tracking_y' || to_char(month_start, 'YYYY') || 'm' || to_char(month_start, 'MM'),
+                    month_start::timestamptz,
+                    (month_start + interval '1 month')::timestamptz
+                );
+                month_start := (month_start + interval '1 month')::date;
+            END LOOP;
+        END $$
+    """)
+    op.execute("CREATE TABLE batch_tracking_default PARTITION OF batch_tracking DEFAULT")
+
+    op.execute("""
+        INSERT INTO batch_tracking (id, batch_id, location, status, timestamp, handled_by, notes)
+        SELECT id, batch_id, location, status, COALESCE(timestamp, now()), handled_by, notes
+        FROM batch_tracking_legacy
+    """)
+    op.execute("DROP TABLE batch_tracking_legacy")
+
+    # 3. Catalog of archived months and the batches each archive contains
+    op.create_table(
+        "batch_tracking_archives",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("partition_name", sa.String(100), nullable=False, unique=True),
+        sa.Column("range_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("range_end", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("file_path", sa.String(500), nullable=False),
+        sa.Column("file_format", sa.String(20), nullable=False),
+        sa.Column("row_count", sa.Integer(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "batch_tracking_archive_batches",
+        sa.Column("archive_id", sa.Integer(),
+                  sa.ForeignKey("batch_tracking_archives.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("batch_id", sa.Integer(), sa.ForeignKey("batches.id"), primary_key=True),
+    )
+    op.create_index("ix_batch_tracking_archive_batches_batch_id", "batch_tracking_archive_batches", ["batch_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_batch_tracking_archive_batches_batch_id", table_name="batch_tracking_archive_batches")
+    op.drop_table("batch_tracking_archive_batches")
+    op.drop_table("batch_tracking_archives")
+
+    # Archived months are not restored; only rows still in live partitions come back
+    op.execute("ALTER SEQUENCE batch_tracking_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE batch_tracking RENAME TO batch_tracking_partitioned")
+    op.execute("""
+        CREATE TABLE batch_tracking (
+            id INTEGER PRIMARY KEY DEFAULT nextval('batch_tracking_id_seq'),
+            batch_id INTEGER NOT NULL REFERENCES batches (id),
+            location VARCHAR(200) NOT NULL,
+            status batchstatus NOT NULL,
+            timestamp TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            handled_by UUID NOT NULL REFERENCES employees (id),
+            notes VARCHAR(500)
+        )
+    """)
+    op.execute("INSERT INTO batch_tracking SELECT * FROM batch_tracking_partitioned")
+    op.execute("DROP TABLE batch_tracking_partitioned")
+    op.execute("ALTER SEQUENCE batch_tracking_id_seq OWNED BY batch_tracking.id")
@@ -0,0 +1,43 @@
+"""index batches.expiry_date and add expiry_risk_buckets
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    batch_status = postgresql.ENUM("MANUFACTURED", "IN_TRANSIT", "DELIVERED", name="batchstatus", create_type=False)
+
+    op.create_index("ix_batches_expiry_date", "batches", ["expiry_date"])
+
+    op.create_table(
+        "expiry_risk_buckets",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("as_of", sa.Date(), nullable=False),
+        sa.Column("bucket", sa.String(20), nullable=False),
+        sa.Column("location", sa.String(200), nullable=True),
+        sa.Column("status", batch_status, nullable=True),
+        sa.Column("batches", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("source_batch_id", sa.Integer(), nullable=False),
+        sa.Column("source_tracking_id", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("expiry_risk_buckets")
+    op.drop_index("ix_batches_expiry_date", table_name="batches")
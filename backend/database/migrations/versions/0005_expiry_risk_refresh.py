@@ -0,0 +1,48 @@
+"""key expiry_risk_buckets uniquely and track its freshness with a version row
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The table is a rebuildable summary; emptying it clears any rows doubled by concurrent refreshes
+    op.execute("DELETE FROM expiry_risk_buckets")
+    op.drop_column("expiry_risk_buckets", "source_batch_id")
+    op.drop_column("expiry_risk_buckets", "source_tracking_id")
+    op.create_index(
+        "ux_expiry_risk_buckets_key",
+        "expiry_risk_buckets",
+        ["as_of", "bucket", sa.text("coalesce(location, '')"), sa.text("coalesce(CAST(status AS VARCHAR), '')")],
+        unique=True
+    )
+
+    op.create_table(
+        "expiry_risk_state",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.Column("built_version", sa.BigInteger(), nullable=True),
+        sa.Column("as_of", sa.Date(), nullable=True),
+    )
+    op.execute("INSERT INTO expiry_risk_state (id, version) VALUES (1, 0)")
+
+
+def downgrade() -> None:
+    op.drop_table("expiry_risk_state")
+    op.drop_index("ux_expiry_risk_buckets_key", table_name="expiry_risk_buckets")
+    op.execute("DELETE FROM expiry_risk_buckets")
+    op.add_column("expiry_risk_buckets", sa.Column("source_tracking_id", sa.Integer(), nullable=False))
+    op.add_column("expiry_risk_buckets", sa.Column("source_batch_id", sa.Integer(), nullable=False))
@@ -0,0 +1,30 @@
+"""record the batch and tracking ID watermarks each expiry_risk_buckets build saw
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("expiry_risk_state", sa.Column("built_batch_id", sa.Integer(), nullable=True))
+    op.add_column("expiry_risk_state", sa.Column("built_tracking_id", sa.Integer(), nullable=True))
+    # Inserts no longer bump the version, so a build from before this migration must not count as current
+    op.execute("UPDATE expiry_risk_state SET as_of = NULL")
+
+
+def downgrade() -> None:
+    op.drop_column("expiry_risk_state", "built_tracking_id")
+    op.drop_column("expiry_risk_state", "built_batch_id")
@@ -0,0 +1,189 @@
+"""
+Read/write splitting between a primary and read replicas
+RoutingSession sends SELECTs to a replica and everything else (flushes, INSERT/UPDATE/DELETE,
+raw SQL, SELECT ... FOR UPDATE, Session.connection()) to the primary; primary_bind_arguments()
+sends a single read there too (e.g. cache fills, which must not store a lagging replica's rows). A session that has
+written stays on the primary, and for a short window after any committed write so does the
+whole process (read-your-writes). Replicas whose measured lag exceeds the limit, or whose
+lag check fails, are skipped; with none left, reads fall back to the primary.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+
+ROUTER = "replica_router"
+READ_ENGINE = "replica_read_engine"
+PINNED = "replica_pinned"            # the session has written (or asked to): it reads from the primary from now on
+UNCOMMITTED = "replica_uncommitted"  # ... and that write is not committed yet
+
+# Seconds the replica is behind; 0 when it has replayed everything it received
+POSTGRES_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+def measure_lag(engine: Engine) -> float:
+    """Replication lag in seconds (PostgreSQL); other databases have no replication to measure"""
+    if engine.dialect.name != "postgresql":
+        return 0.0
+    with engine.connect() as connection:
+        return float(connection.execute(POSTGRES_LAG_SQL).scalar() or 0.0)
+
+
+class ReplicaRouter:
+    """The primary, the replicas and what is known about their lag"""
+
+    def __init__(self, primary: Engine, replicas: List[Engine],
+                 lag_probe: Callable[[Engine], float] = measure_lag,
+                 max_lag: Optional[float] = None, check_interval: Optional[float] = None,
+                 read_your_writes: Optional[float] = None):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.lag_probe = lag_probe
+        self.max_lag = settings.REPLICA_MAX_LAG_SECONDS if max_lag is None else max_lag
+        self.check_interval = settings.REPLICA_LAG_CHECK_SECONDS if check_interval is None else check_interval
+        self.read_your_writes = settings.READ_YOUR_WRITES_SECONDS if read_your_writes is None else read_your_writes
+        self.lag: Dict[Engine, float] = {replica: 0.0 for replica in self.replicas}
+        self.primary_until = 0.0
+        self.checked_at = 0.0
+        self.counters = {"primary_read_sessions": 0, "replica_read_sessions": 0, "writes": 0, "fallbacks": 0}
+        self._cycle = itertools.cycle(self.replicas) if self.replicas else None
+        self._probe_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    def check_lag(self, force: bool = False) -> Dict[Engine, float]:
+        """Re-measure lag every check_interval; a failed probe counts as infinitely behind"""
+        now = time.monotonic()
+        if not force and now - self.checked_at < self.check_interval:
+            return self.lag
+        if not self._probe_lock.acquire(blocking=force):
+            return self.lag  # another thread is probing; use the last numbers
+        try:
+            for replica in self.replicas:
+                try:
+                    self.lag[replica] = self.lag_probe(replica)
+                except SQLAlchemyError:
+                    self.lag[replica] = float("inf")
+            self.checked_at = time.monotonic()
+        finally:
+            self._probe_lock.release()
+        return self.lag
+
+    def healthy_replicas(self) -> List[Engine]:
+        lag = self.check_lag()
+        return [replica for replica in self.replicas if lag[replica] <= self.max_lag]
+
+    def read_engine(self) -> Engine:
+        """A replica in round-robin order, or the primary when none is usable or a write just happened"""
+        if not self.replicas or time.monotonic() < self.primary_until:
+            return self._count("primary_read_sessions", self.primary)
+        healthy = self.healthy_replicas()
+        if not healthy:
+            self._count("fallbacks", None)
+            return self._count("primary_read_sessions", self.primary)
+        with self._lock:
+            for _ in range(len(self.replicas)):
+                replica = next(self._cycle)
+                if replica in healthy:
+                    break
+        return self._count("replica_read_sessions", replica)
+
+    def note_write(self) -> None:
+        """Keep reads on the primary until the replicas have (probably) caught up"""
+        lag = [value for value in self.lag.values() if value <= self.max_lag]
+        window = max([self.read_your_writes] + lag)
+        self.primary_until = max(self.primary_until, time.monotonic() + window)
+
+    def _count(self, counter: str, engine: Optional[Engine]) -> Optional[Engine]:
+        with self._lock:
+            self.counters[counter] += 1
+        return engine
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.counters,
+                "replicas": len(self.replicas),
+                "replica_lag_seconds": [round(value, 3) for value in self.lag.values()],
+            }
+
+
+# =============================================================================
+# ROUTING SESSION
+# =============================================================================
+
+def _is_plain_read(clause) -> bool:
+    return getattr(clause, "is_select", False) and getattr(clause, "_for_update_arg", None) is None
+
+
+def pin_to_primary(db: Session) -> Session:
+    """Send all of this session's reads to the primary, e.g. before read-then-write work"""
+    db.info[PINNED] = True
+    return db
+
+
+def primary_bind_arguments(db: Session) -> dict:
+    """bind_arguments for Session.execute that send one statement to the primary without pinning the session"""
+    router: Optional[ReplicaRouter] = db.info.get(ROUTER)
+    return {"bind": router.primary} if router is not None else {}
+
+
+class RoutingSession(Session):
+    """Session whose statements go to the primary or a replica (see the module docstring)"""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if kw.get("bind") is not None:  # an explicit bind_arguments={"bind": engine} wins
+            return kw["bind"]
+        router: Optional[ReplicaRouter] = self.info.get(ROUTER)
+        if router is None:
+            return super().get_bind(mapper, clause=clause, **kw)
+        if self._flushing or not _is_plain_read(clause):
+            if getattr(clause, "is_dml", False):
+                self.info[PINNED] = self.info[UNCOMMITTED] = True
+            return router.primary
+        if self.info.get(PINNED):
+            return router.primary
+        engine = self.info.get(READ_ENGINE)
+        if engine is None:
+            # one replica per session, so a request never mixes two replicas' views
+            engine = self.info[READ_ENGINE] = router.read_engine()
+        return engine
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_written(session, flush_context):
+    session.info[PINNED] = session.info[UNCOMMITTED] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _start_read_your_writes(session):
+    router = session.info.get(ROUTER)
+    if router is not None and session.info.pop(UNCOMMITTED, False):
+        router.note_write()
+        router._count("writes", None)
+
+
+@event.listens_for(RoutingSession, "after_soft_rollback")
+def _forget_rolled_back_write(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(UNCOMMITTED, None)
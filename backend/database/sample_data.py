@@ -0,0 +1,255 @@
+"""
+Deterministic synthetic data for development, tests and benchmarks
+The same (scale, seed) always produces byte-identical rows. Rows are streamed in
+chunks and bulk loaded (COPY on PostgreSQL, multi-row INSERT elsewhere), so the
+1m and 10m scales never hold a whole table in memory.
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import io
+import csv
+import uuid
+import random
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from models.user_models import (
+    Department, Employee, Product, Batch, BatchTracking, BatchStatus,
+    current_state_upsert, latest_tracking_source
+)
+
+
+@dataclass(frozen=True)
+class Scale:
+    departments: int
+    employees: int
+    products: int
+    batches: int  # tracking rows are ~3.3 per batch
+
+
+SCALES: Dict[str, Scale] = {
+    "tiny": Scale(departments=3, employees=12, products=6, batches=30),
+    "10k": Scale(departments=8, employees=200, products=100, batches=3_000),
+    "1m": Scale(departments=20, employees=2_000, products=1_000, batches=300_000),
+    "10m": Scale(departments=40, employees=10_000, products=5_000, batches=3_000_000),
+}
+
+DEPARTMENT_NAMES = ["Quality Assurance", "Logistics", "Production", "Warehouse", "Procurement",
+                    "Regulatory Affairs", "Research", "Distribution"]
+DESIGNATIONS = ["Operator", "Supervisor", "Driver", "Analyst", "Manager", "Technician"]
+PRODUCT_BASES = ["Paracetamol", "Ibuprofen", "Amoxicillin", "Vitamin D", "Metformin", "Cetirizine",
+                 "Omeprazole", "Azithromycin", "Atorvastatin", "Losartan", "Insulin", "Salbutamol"]
+PRODUCT_FORMS = ["Tablets", "Capsules", "Syrup", "Injection", "Drops", "Gel"]
+CATEGORIES = ["Analgesics", "Antibiotics", "Supplements", "Antidiabetics", "Antihistamines",
+              "Cardiovascular", "Respiratory", "Gastrointestinal"]
+PLANTS = ["Chennai Plant", "Hyderabad Plant", "Pune Plant", "Ahmedabad Plant"]
+HUBS = ["Highway NH48", "Highway NH44", "Bangalore Hub", "Mumbai Hub", "Delhi Hub", "Kolkata Hub"]
+WAREHOUSES = ["Bangalore Warehouse", "Mumbai Warehouse", "Delhi Warehouse", "Kolkata Warehouse",
+              "Chennai Warehouse", "Jaipur Warehouse"]
+
+FIRST_DATE = date(2023, 1, 1)
+DATE_SPAN_DAYS = 3 * 365
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _rng(seed: int, *parts) -> random.Random:
+    return random.Random(":".join(str(part) for part in (seed,) + parts))
+
+
+# =============================================================================
+# ROW GENERATORS
+# =============================================================================
+
+def department_rows(scale: Scale, seed: int) -> List[dict]:
+    rng = _rng(seed, "departments")
+    rows = []
+    for i in range(scale.departments):
+        base = DEPARTMENT_NAMES[i % len(DEPARTMENT_NAMES)]
+        name = base if i < len(DEPARTMENT_NAMES) else f"{base} {i // len(DEPARTMENT_NAMES) + 1}"
+        rows.append({"id": _uuid(rng), "name": name, "head_id": None})
+    return rows
+
+
+def employee_rows(scale: Scale, seed: int, departments: List[dict]) -> List[dict]:
+    rng = _rng(seed, "employees")
+    return [
+        {
+            "id": _uuid(rng),
+            "name": f"Employee {i:06d}",
+            "email": f"employee{i:06d}@example.com",
+            "department_id": departments[rng.randrange(len(departments))]["id"],
+            "designation": rng.choice(DESIGNATIONS),
+            "date_joined": FIRST_DATE - timedelta(days=rng.randrange(2000)),
+        }
+        for i in range(scale.employees)
+    ]
+
+
+def product_rows(scale: Scale, seed: int) -> List[dict]:
+    rng = _rng(seed, "products")
+    rows = []
+    for product_id in range(1, scale.products + 1):
+        base = PRODUCT_BASES[(product_id - 1) % len(PRODUCT_BASES)]
+        form = PRODUCT_FORMS[(product_id - 1) // len(PRODUCT_BASES) % len(PRODUCT_FORMS)]
+        rows.append({
+            "id": product_id,
+            "name": f"{base} {form} {product_id}",
+            "category": rng.choice(CATEGORIES),
+            "unit_price": f"{rng.uniform(5, 900):.2f}",
+        })
+    return rows
+
+
+def _batch_prefix(product: dict) -> str:
+    return "".join(word[0] for word in product["name"].split()[:2]).upper() + f"{product['id'] % 100:02d}"
+
+
+def _batch_basics(seed: int, batch_id: int, product_count: int):
+    """The per-batch draws shared by batch_rows and tracking_rows: (rng, product index, manufactured date)"""
+    rng = _rng(seed, "batch", batch_id)
+    product_index = rng.randrange(product_count)
+    manufactured = FIRST_DATE + timedelta(days=rng.randrange(DATE_SPAN_DAYS))
+    return rng, product_index, manufactured
+
+
+def batch_rows(scale: Scale, seed: int, products: List[dict], employees: List[dict]) -> Iterator[dict]:
+    for batch_id in range(1, scale.batches + 1):
+        rng, product_index, manufactured = _batch_basics(seed, batch_id, len(products))
+        product = products[product_index]
+        yield {
+            "id": batch_id,
+            "product_id": product["id"],
+            "batch_code": f"{_batch_prefix(product)}-{manufactured:%m%Y}-{batch_id:X}",
+            "quantity": rng.randrange(50, 5000, 10),
+            "manufactured_date": manufactured,
+            "expiry_date": manufactured + timedelta(days=rng.randrange(365, 1096)),
+            "created_by": employees[rng.randrange(len(employees))]["id"],
+        }
+
+
+def tracking_rows(scale: Scale, seed: int, employees: List[dict]) -> Iterator[dict]:
+    """
+    Manufactured at a plant, 0-4 In Transit hops, then (for most batches) Delivered to a warehouse
+    IDs are assigned in generation order so the stream can be loaded with explicit keys
+    """
+    tracking_id = 0
+    for batch_id in range(1, scale.batches + 1):
+        _, _, manufactured = _batch_basics(seed, batch_id, scale.products)
+        rng = _rng(seed, "tracking", batch_id)
+
+        moment = datetime.combine(manufactured, time(8), tzinfo=timezone.utc) + timedelta(minutes=rng.randrange(600))
+        steps = [(rng.choice(PLANTS), BatchStatus.MANUFACTURED)]
+        outcome = rng.random()
+        if outcome > 0.1:
+            steps += [(rng.choice(HUBS), BatchStatus.IN_TRANSIT) for _ in range(rng.randint(1, 4))]
+        if outcome > 0.3:
+            steps.append((rng.choice(WAREHOUSES), BatchStatus.DELIVERED))
+
+        for location, status in steps:
+            tracking_id += 1
+            yield {
+                "id": tracking_id,
+                "batch_id": batch_id,
+                "location": location,
+                "status": status,
+                "timestamp": moment,
+                "handled_by": employees[rng.randrange(len(employees))]["id"],
+                "notes": None,
+            }
+            moment += timedelta(hours=rng.randint(2, 72))
+
+
+# =============================================================================
+# BULK LOADING
+# =============================================================================
+
+def _chunks(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _copy_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, BatchStatus):
+        return value.name
+    return str(value)
+
+
+def _copy_rows(connection: Connection, table, rows: List[dict]) -> None:
+    """PostgreSQL COPY ... FROM STDIN through the raw psycopg2 cursor"""
+    columns = list(rows[0].keys())
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row[column]) for column in columns])
+    buffer.seek(0)
+    with connection.connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '')",
+            buffer
+        )
+
+
+def _load(connection: Connection, model, rows: Iterable[dict], chunk_size: int) -> int:
+    table = model.__table__
+    use_copy = connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2"
+    count = 0
+    for chunk in _chunks(rows, chunk_size):
+        if use_copy:
+            _copy_rows(connection, table, chunk)
+        else:
+            connection.execute(table.insert(), chunk)
+        count += len(chunk)
+    return count
+
+
+def _reset_sequences(connection: Connection) -> None:
+    if connection.dialect.name != "postgresql":
+        return
+    for table in ("products", "batches", "batch_tracking"):
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table}"
+        ))
+
+
+def load_sample_data(connection: Connection, scale: str = "10k", seed: int = 42,
+                     chunk_size: int = 10_000) -> Dict[str, int]:
+    """
+    Bulk load a generated dataset into empty tables and build batch_current_state
+    Returns the number of rows written per table
+    """
+    sizes = SCALES[scale]
+    departments = department_rows(sizes, seed)
+    employees = employee_rows(sizes, seed, departments)
+    products = product_rows(sizes, seed)
+
+    counts = {
+        "departments": _load(connection, Department, departments, chunk_size),
+        "employees": _load(connection, Employee, employees, chunk_size),
+        "products": _load(connection, Product, products, chunk_size),
+        "batches": _load(connection, Batch, batch_rows(sizes, seed, products, employees), chunk_size),
+        "batch_tracking": _load(connection, BatchTracking, tracking_rows(sizes, seed, employees), chunk_size),
+    }
+    connection.execute(current_state_upsert(connection.dialect.name, latest_tracking_source()))
+    _reset_sequences(connection)
+    return counts
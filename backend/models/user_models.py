@@ -11,10 +11,12 @@ if parent_dir not in sys.path:
 
 
 
-from sqlalchemy import Column, Integer, String, DateTime, Date, Numeric, ForeignKey, Enum
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Date, Numeric, ForeignKey, Enum, Index, cast
+from sqlalchemy import event, select, or_, and_
 from decimal import Decimal
 from sqlalchemy import Column, DateTime, func
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database.database import Base
@@ -109,21 +111,27 @@ class Batch(Base):
     product = relationship("Product", back_populates="batches")
     creator = relationship("Employee", back_populates="created_batches")
     tracking_records = relationship("BatchTracking", back_populates="batch", order_by="BatchTracking.timestamp")
+    current_state = relationship("BatchCurrentState", back_populates="batch", uselist=False, viewonly=True)
+
+    __table_args__ = (
+        Index("ix_batches_expiry_date", "expiry_date"),
+    )
+
     def __repr__(self):
         return f"<Batch(batch_code='{self.batch_code}', quantity={self.quantity})>"
 
     @property
     def current_status(self):
-        """Get the current status of the batch"""
-        if self.tracking_records:
-            return self.tracking_records[-1].status
+        """Get the current status of the batch (read from the current-state projection)"""
+        if self.current_state is not None:
+            return self.current_state.status
         return None
 
     @property
     def current_location(self):
-        """Get the current location of the batch"""
-        if self.tracking_records:
-            return self.tracking_records[-1].location
+        """Get the current location of the batch (read from the current-state projection)"""
+        if self.current_state is not None:
+            return self.current_state.location
         return None
 
 
@@ -136,13 +144,204 @@ class BatchTracking(Base):
     batch_id = Column(Integer, ForeignKey("batches.id"), nullable=False)
     location = Column(String(200), nullable=False)
     status = Column(Enum(BatchStatus), nullable=False)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    timestamp = Column(DateTime(timezone=True), nullable=False, server_default=func.now())  # partition key
     handled_by = Column(UUID(as_uuid=True), ForeignKey("employees.id"), nullable=False)
     notes = Column(String(500), nullable=True)  # Optional field for additional info
 
+    __table_args__ = (
+        Index("ix_batch_tracking_batch_id_timestamp", "batch_id", "timestamp"),
+    )
+
     # Relationships
     batch = relationship("Batch", back_populates="tracking_records")
     handler = relationship("Employee", back_populates="handled_trackings")
 
     def __repr__(self):
-        return f"<BatchTracking(batch_id={self.batch_id}, status='{self.status.value}', location='{self.location}')>"
\ No newline at end of file
+        return f"<BatchTracking(batch_id={self.batch_id}, status='{self.status.value}', location='{self.location}')>"
+
+
+# MODEL 6: BatchCurrentState
+# Denormalized projection of the latest tracking record for each batch.
+# Maintained by the BatchTracking after_insert listener below, so it is
+# always written in the same transaction as the tracking row itself.
+
+class BatchCurrentState(Base):
+    __tablename__ = "batch_current_state"
+
+    batch_id = Column(Integer, ForeignKey("batches.id", ondelete="CASCADE"), primary_key=True)
+    status = Column(Enum(BatchStatus), nullable=False)
+    location = Column(String(200), nullable=False)
+    handled_by = Column(UUID(as_uuid=True), ForeignKey("employees.id"), nullable=False)
+    last_timestamp = Column(DateTime(timezone=True), nullable=True)
+    last_tracking_id = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_batch_current_state_status", "status"),
+        Index("ix_batch_current_state_location", "location"),
+    )
+
+    # Relationships
+    batch = relationship("Batch", back_populates="current_state", viewonly=True)
+    handler = relationship("Employee", viewonly=True)
+
+    def __repr__(self):
+        return f"<BatchCurrentState(batch_id={self.batch_id}, status='{self.status.value}', location='{self.location}')>"
+
+
+# MODEL 7: TrackingArchive
+# One row per archived month of batch_tracking (see services/tracking_partition_service.py)
+
+class TrackingArchive(Base):
+    __tablename__ = "batch_tracking_archives"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    partition_name = Column(String(100), nullable=False, unique=True)
+    range_start = Column(DateTime(timezone=True), nullable=False)
+    range_end = Column(DateTime(timezone=True), nullable=False)
+    file_path = Column(String(500), nullable=False)
+    file_format = Column(String(20), nullable=False)
+    row_count = Column(Integer, nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    batches = relationship("TrackingArchiveBatch", back_populates="archive")
+
+    def __repr__(self):
+        return f"<TrackingArchive(partition_name='{self.partition_name}', row_count={self.row_count})>"
+
+
+# MODEL 8: TrackingArchiveBatch
+# Which batches have history inside each archive, so history reads only open the files they need
+
+class TrackingArchiveBatch(Base):
+    __tablename__ = "batch_tracking_archive_batches"
+
+    archive_id = Column(Integer, ForeignKey("batch_tracking_archives.id", ondelete="CASCADE"), primary_key=True)
+    batch_id = Column(Integer, ForeignKey("batches.id"), primary_key=True, index=True)
+
+    # Relationships
+    archive = relationship("TrackingArchive", back_populates="batches")
+
+    def __repr__(self):
+        return f"<TrackingArchiveBatch(archive_id={self.archive_id}, batch_id={self.batch_id})>"
+
+
+# MODEL 9: ExpiryRiskBucket
+# Precomputed batch counts and quantities per expiry bucket, location and current status
+# (see services/expiry_service.py); rebuilt when the day or the underlying data changes
+
+class ExpiryRiskBucket(Base):
+    __tablename__ = "expiry_risk_buckets"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    as_of = Column(Date, nullable=False)
+    bucket = Column(String(20), nullable=False)
+    location = Column(String(200), nullable=True)  # NULL: no tracking events yet
+    status = Column(Enum(BatchStatus), nullable=True)
+    batches = Column(Integer, nullable=False)
+    quantity = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        # NULL location/status would be distinct in a plain unique constraint, so compare them coalesced
+        Index("ux_expiry_risk_buckets_key", "as_of", "bucket", func.coalesce(location, ""),
+              func.coalesce(cast(status, String), ""), unique=True),
+    )
+
+    def __repr__(self):
+        return f"<ExpiryRiskBucket(bucket='{self.bucket}', location='{self.location}', batches={self.batches})>"
+
+
+# MODEL 10: ExpiryRiskState
+# Single row saying what expiry_risk_buckets was last built from: the highest batch and tracking
+# IDs it saw, which inserts move without writing here, and the version, which is bumped only by
+# transactions that update or delete batches or tracking rows
+
+class ExpiryRiskState(Base):
+    __tablename__ = "expiry_risk_state"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    built_version = Column(BigInteger, nullable=True)
+    built_batch_id = Column(Integer, nullable=True)
+    built_tracking_id = Column(Integer, nullable=True)
+    as_of = Column(Date, nullable=True)
+
+    def __repr__(self):
+        return (f"<ExpiryRiskState(version={self.version}, built_version={self.built_version}, "
+                f"built_batch_id={self.built_batch_id}, built_tracking_id={self.built_tracking_id}, as_of={self.as_of})>")
+
+
+def current_state_upsert(dialect_name: str, source):
+    """
+    Build an upsert into batch_current_state from a SELECT over batch_tracking.
+    `source` must select (batch_id, status, location, handled_by, timestamp, id)
+    and return at most one row per batch_id. Older events never overwrite newer ones.
+    """
+    if dialect_name == "postgresql":
+        insert = postgresql.insert
+    elif dialect_name == "sqlite":
+        insert = sqlite.insert
+    else:
+        raise NotImplementedError(f"batch_current_state upsert is not supported on {dialect_name}")
+
+    state = BatchCurrentState.__table__
+    stmt = insert(state).from_select(
+        ["batch_id", "status", "location", "handled_by", "last_timestamp", "last_tracking_id"],
+        source
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[state.c.batch_id],
+        set_={
+            "status": stmt.excluded.status,
+            "location": stmt.excluded.location,
+            "handled_by": stmt.excluded.handled_by,
+            "last_timestamp": stmt.excluded.last_timestamp,
+            "last_tracking_id": stmt.excluded.last_tracking_id,
+        },
+        where=or_(
+            state.c.last_timestamp < stmt.excluded.last_timestamp,
+            and_(
+                state.c.last_timestamp == stmt.excluded.last_timestamp,
+                state.c.last_tracking_id < stmt.excluded.last_tracking_id
+            )
+        )
+    )
+
+
+def latest_tracking_source(*criteria):
+    """
+    SELECT the latest batch_tracking row per batch, shaped for current_state_upsert
+    Optional criteria restrict which tracking rows are considered (e.g. just-inserted IDs)
+    """
+    tracking = BatchTracking.__table__
+    ranked = select(
+        tracking.c.id,
+        func.row_number().over(
+            partition_by=tracking.c.batch_id,
+            order_by=(tracking.c.timestamp.desc(), tracking.c.id.desc())
+        ).label("rn")
+    ).where(*criteria).subquery()
+
+    return select(
+        tracking.c.batch_id,
+        tracking.c.status,
+        tracking.c.location,
+        tracking.c.handled_by,
+        tracking.c.timestamp,
+        tracking.c.id
+    ).join(ranked, ranked.c.id == tracking.c.id).where(ranked.c.rn == 1)
+
+
+@event.listens_for(BatchTracking, "after_insert")
+def _update_batch_current_state(mapper, connection, target):
+    """Keep batch_current_state in sync whenever a tracking record is written"""
+    tracking = BatchTracking.__table__
+    source = select(
+        tracking.c.batch_id,
+        tracking.c.status,
+        tracking.c.location,
+        tracking.c.handled_by,
+        tracking.c.timestamp,
+        tracking.c.id
+    ).where(tracking.c.id == target.id)
+    connection.execute(current_state_upsert(connection.dialect.name, source))
@@ -0,0 +1,34 @@
+"""
+Maintenance job for batch_tracking partitions
+Creates upcoming monthly partitions and archives closed months. Run daily, e.g. from cron:
+    python scripts/maintain_tracking_partitions.py
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from database.database import SessionLocal
+from services import tracking_partition_service
+
+
+def main():
+    db = SessionLocal()
+    try:
+        created = tracking_partition_service.ensure_future_partitions(db)
+        print(f"📅 Created partitions: {created or 'none needed'}")
+
+        archived = tracking_partition_service.archive_closed_partitions(db)
+        for archive in archived:
+            print(f"📦 Archived {archive.partition_name}: {archive.row_count} rows -> {archive.file_path}")
+        if not archived:
+            print("📦 Nothing to archive")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
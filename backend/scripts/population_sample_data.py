@@ -0,0 +1,44 @@
+"""
+Populate the configured database with deterministic synthetic data
+Usage (from backend/):
+    python scripts/population_sample_data.py --scale 10k --seed 42
+    python scripts/population_sample_data.py --scale 1m --create-tables
+Scales: tiny, 10k, 1m, 10m (see database/sample_data.py). Tables must be empty.
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import argparse
+import time
+
+from database.database import get_engine, create_tables
+from database.sample_data import SCALES, load_sample_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load synthetic ERP data")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="10k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--create-tables", action="store_true", help="run create_tables() first")
+    args = parser.parse_args()
+
+    if args.create_tables:
+        create_tables()
+
+    started = time.perf_counter()
+    with get_engine().begin() as connection:
+        counts = load_sample_data(connection, scale=args.scale, seed=args.seed, chunk_size=args.chunk_size)
+
+    for table, count in counts.items():
+        print(f"  ✓ {table}: {count:,} rows")
+    print(f"✅ Loaded scale '{args.scale}' (seed {args.seed}) in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
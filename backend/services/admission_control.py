@@ -0,0 +1,136 @@
+"""
+Admission control in front of the database pool
+Each limited endpoint runs at most max_concurrent requests at once. Requests beyond that wait
+in a FIFO queue of at most max_queue, for at most queue_timeout seconds; a full queue or an
+expired wait raises Overloaded, which the API turns into 503 + Retry-After. A spike then costs
+some fast rejections instead of every request timing out on an exhausted connection pool.
+Limiters live on the event loop (see api/admission.py), so sync routes are admitted before
+they take a threadpool worker.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import asyncio
+from collections import deque
+from typing import Deque, Dict
+
+from app.config import settings
+
+
+class Overloaded(Exception):
+    def __init__(self, endpoint: str, reason: str, retry_after: int):
+        super().__init__(f"{endpoint} is overloaded ({reason})")
+        self.endpoint = endpoint
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float,
+                 retry_after: int = 1):
+        if max_concurrent < 1:
+            raise ValueError(f"max_concurrent must be at least 1, got {max_concurrent}")
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+
+    async def acquire(self) -> None:
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.shed_queue_full += 1
+            raise Overloaded(self.name, "queue full", self.retry_after)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # the slot was handed over just as we gave up
+            elif waiter in self._waiters:  # release() may already have popped it while we were cancelled
+                self._waiters.remove(waiter)
+            if isinstance(exc, asyncio.TimeoutError):
+                self.shed_timeout += 1
+                raise Overloaded(self.name, "queue timeout", self.retry_after) from None
+            raise
+        self.admitted += 1
+
+    def release(self) -> None:
+        """Hand the slot straight to the longest waiter, so nobody can jump the queue"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_timeout": self.shed_timeout,
+        }
+
+
+# =============================================================================
+# PER-ENDPOINT LIMITERS
+# =============================================================================
+
+_limiters: Dict[str, ConcurrencyLimiter] = {}
+
+
+def get_limiter(endpoint: str) -> ConcurrencyLimiter:
+    """The endpoint's limiter, created from settings on first use (ADMISSION_LIMITS overrides the concurrency)"""
+    limiter = _limiters.get(endpoint)
+    if limiter is None:
+        limiter = _limiters[endpoint] = ConcurrencyLimiter(
+            endpoint,
+            max_concurrent=settings.ADMISSION_LIMITS.get(endpoint, settings.ADMISSION_MAX_CONCURRENT),
+            max_queue=settings.ADMISSION_MAX_QUEUE,
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+            retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS
+        )
+    return limiter
+
+
+def configure_limiter(endpoint: str, limiter: ConcurrencyLimiter) -> None:
+    """Replace an endpoint's limiter (e.g. a tiny one in tests)"""
+    _limiters[endpoint] = limiter
+
+
+def reset_limiters() -> None:
+    """Drop all limiters; they are recreated from settings on next use"""
+    _limiters.clear()
+
+
+def stats() -> dict:
+    return {endpoint: limiter.stats() for endpoint, limiter in _limiters.items()}
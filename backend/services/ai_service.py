@@ -0,0 +1,91 @@
+"""
+LLM access for the chatbot
+The Gemini client is created lazily so the app (and tests) run without google-generativeai
+or an API key; tests swap in a StubLLMClient with configure_llm_client().
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from typing import Callable, List, Optional, Union
+
+from app.config import settings
+
+
+SYSTEM_PROMPT = (
+    "You are the assistant for a pharmaceutical batch-tracking ERP. Answer questions about "
+    "batches, products, employees and shipments concisely. If you are not given the data "
+    "needed to answer, say so instead of guessing."
+)
+
+
+class LLMError(RuntimeError):
+    """The language model could not produce an answer"""
+
+
+class GeminiClient:
+    """google-generativeai chat model; imported on first use"""
+
+    def __init__(self, api_key: Optional[str] = None, model_name: Optional[str] = None):
+        self.api_key = api_key or settings.GEMINI_API_KEY
+        self.model_name = model_name or settings.GEMINI_MODEL
+        self._model = None
+
+    def _get_model(self):
+        if self._model is None:
+            if not self.api_key:
+                raise LLMError("GEMINI_API_KEY is not set")
+            try:
+                import google.generativeai as genai
+            except ImportError as e:
+                raise LLMError(f"google-generativeai is not installed: {e}")
+            genai.configure(api_key=self.api_key)
+            self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def generate(self, prompt: str) -> str:
+        try:
+            response = self._get_model().generate_content(f"{SYSTEM_PROMPT}\n\n{prompt}")
+            return response.text
+        except LLMError:
+            raise
+        except Exception as e:
+            raise LLMError(f"Gemini request failed: {e}")
+
+
+class StubLLMClient:
+    """Canned (or computed) replies; records every prompt it was sent"""
+
+    def __init__(self, reply: Union[str, Callable[[str], str]] = "I can only answer batch questions right now."):
+        self.reply = reply
+        self.prompts: List[str] = []
+
+    def generate(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return self.reply(prompt) if callable(self.reply) else self.reply
+
+
+_client = None
+
+
+def get_llm_client():
+    global _client
+    if _client is None:
+        _client = GeminiClient()
+    return _client
+
+
+def configure_llm_client(client) -> None:
+    """Swap the process-wide LLM client (e.g. a StubLLMClient in tests)"""
+    global _client
+    _client = client
+
+
+def generate_answer(question: str, context: Optional[str] = None) -> str:
+    """Ask the LLM an open-ended question, optionally with some ERP data as context"""
+    prompt = f"Context:\n{context}\n\nQuestion: {question}" if context else f"Question: {question}"
+    return get_llm_client().generate(prompt)
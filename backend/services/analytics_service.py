@@ -0,0 +1,277 @@
+"""
+Supply-chain analytics over batch_tracking
+Dwell time per location, Manufactured -> In Transit -> Delivered lead times per product,
+handler throughput and late-delivery outliers. Events are pulled in columnar chunks into
+pandas and every metric is a vectorized group-by/diff. Results are cached per engine and keyed
+by the last tracking ID: a refresh only fetches newer events and re-derives the batches they touch.
+Each refresh re-reads INCREMENTAL_OVERLAP_IDS below the last ID (skipping rows it already has),
+so an event whose transaction drew a lower ID but committed later is still counted.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+import pandas as pd
+from sqlalchemy import select, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from models.user_models import Batch, BatchTracking, BatchStatus
+
+
+CHUNK_SIZE = 50_000
+LATE_IQR_FACTOR = 1.5  # Tukey fence: lead time above Q3 + 1.5 * IQR of the product's deliveries
+
+EVENT_COLUMNS = ["id", "batch_id", "product_id", "timestamp", "status", "location", "handled_by"]
+INTERVAL_EVENT_COLUMNS = ["id", "batch_id", "timestamp", "status", "location", "handled_by"]
+STATUS_VALUES = [status.value for status in BatchStatus]
+
+
+@dataclass
+class SupplyChainAnalytics:
+    last_tracking_id: int
+    dwell_by_location: pd.DataFrame      # index location: visits, mean/median/p95 hours
+    lead_times_by_product: pd.DataFrame  # index product_id: per-leg count and mean/median/p95 hours
+    handler_throughput: pd.DataFrame     # index handled_by: events, batches, active_days, events_per_day
+    late_deliveries: pd.DataFrame        # batch_id, product_id, lead hours and the fence it crossed
+
+    def as_dict(self) -> dict:
+        """JSON-friendly records (NaN becomes None)"""
+        def records(frame: pd.DataFrame):
+            frame = frame.reset_index()
+            return frame.astype(object).where(frame.notna(), None).to_dict(orient="records")
+
+        return {
+            "last_tracking_id": self.last_tracking_id,
+            "dwell_by_location": records(self.dwell_by_location),
+            "lead_times_by_product": records(self.lead_times_by_product),
+            "handler_throughput": records(self.handler_throughput),
+            "late_deliveries": records(self.late_deliveries),
+        }
+
+
+# =============================================================================
+# LOADING
+# =============================================================================
+
+def iter_event_frames(db: Session, after_id: int = 0, chunk_size: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Tracking events with id > after_id as DataFrames of at most chunk_size rows"""
+    stmt = select(
+        BatchTracking.id,
+        BatchTracking.batch_id,
+        Batch.product_id,
+        BatchTracking.timestamp,
+        BatchTracking.status,
+        BatchTracking.location,
+        BatchTracking.handled_by
+    ).join(
+        Batch, Batch.id == BatchTracking.batch_id
+    ).where(
+        BatchTracking.id > after_id
+    ).order_by(BatchTracking.id)
+
+    result = db.execute(stmt.execution_options(stream_results=True, yield_per=chunk_size))
+    for rows in result.partitions():
+        frame = pd.DataFrame.from_records(rows, columns=EVENT_COLUMNS)
+        frame["timestamp"] = pd.to_datetime(frame["timestamp"], utc=True)
+        frame["status"] = pd.Categorical([s.value for s in frame["status"]], categories=STATUS_VALUES)
+        frame["handled_by"] = frame["handled_by"].astype(str)
+        yield frame
+
+
+def _empty_events() -> pd.DataFrame:
+    return pd.DataFrame({
+        "id": pd.Series(dtype="int64"),
+        "batch_id": pd.Series(dtype="int64"),
+        "product_id": pd.Series(dtype="int64"),
+        "timestamp": pd.Series(dtype="datetime64[ns, UTC]"),
+        "status": pd.Categorical([], categories=STATUS_VALUES),
+        "location": pd.Series(dtype="object"),
+        "handled_by": pd.Series(dtype="object"),
+    })
+
+
+# =============================================================================
+# DERIVED PER-BATCH FRAMES
+# =============================================================================
+
+def derive_intervals(events: pd.DataFrame) -> pd.DataFrame:
+    """Each event with the hours until the batch's next event (NaN while the batch is still there)"""
+    ordered = events.sort_values(["batch_id", "timestamp", "id"])
+    next_timestamp = ordered.groupby("batch_id", sort=False)["timestamp"].shift(-1)
+    intervals = ordered[INTERVAL_EVENT_COLUMNS].copy()  # every event column but product_id (see TrackingAnalytics)
+    intervals["dwell_hours"] = (next_timestamp - ordered["timestamp"]).dt.total_seconds() / 3600
+    return intervals
+
+
+def derive_batch_milestones(events: pd.DataFrame) -> pd.DataFrame:
+    """First time each batch reached each status, plus the leg lead times in hours"""
+    milestones = events.groupby(["batch_id", "status"], observed=False)["timestamp"].min().unstack(
+        "status"
+    ).reindex(columns=STATUS_VALUES).astype("datetime64[ns, UTC]")
+    milestones.columns = ["manufactured_at", "in_transit_at", "delivered_at"]
+    milestones["product_id"] = events.groupby("batch_id")["product_id"].first()
+
+    def hours(end, start):
+        return (milestones[end] - milestones[start]).dt.total_seconds() / 3600
+
+    milestones["manufactured_to_transit_hours"] = hours("in_transit_at", "manufactured_at")
+    milestones["transit_to_delivered_hours"] = hours("delivered_at", "in_transit_at")
+    milestones["manufactured_to_delivered_hours"] = hours("delivered_at", "manufactured_at")
+    return milestones
+
+
+# =============================================================================
+# AGGREGATES
+# =============================================================================
+
+def _summary(grouped) -> pd.DataFrame:
+    return grouped.agg(
+        count="count",
+        mean_hours="mean",
+        median_hours="median",
+        p95_hours=lambda values: values.quantile(0.95)
+    )
+
+
+def dwell_by_location(intervals: pd.DataFrame) -> pd.DataFrame:
+    completed = intervals.dropna(subset=["dwell_hours"])
+    return _summary(completed.groupby("location")["dwell_hours"]).rename(columns={"count": "visits"})
+
+
+def lead_times_by_product(milestones: pd.DataFrame) -> pd.DataFrame:
+    legs = ["manufactured_to_transit_hours", "transit_to_delivered_hours", "manufactured_to_delivered_hours"]
+    grouped = milestones.groupby("product_id")
+    frames = {leg.removesuffix("_hours"): _summary(grouped[leg]) for leg in legs}
+    lead_times = pd.concat(frames, axis=1)
+    lead_times.columns = [f"{leg}_{stat}" for leg, stat in lead_times.columns]  # e.g. transit_to_delivered_p95_hours
+    return lead_times
+
+
+def handler_throughput(intervals: pd.DataFrame) -> pd.DataFrame:
+    days = intervals["timestamp"].dt.floor("D")
+    grouped = intervals.assign(day=days).groupby("handled_by")
+    throughput = pd.DataFrame({
+        "events": grouped.size(),
+        "batches": grouped["batch_id"].nunique(),
+        "active_days": grouped["day"].nunique(),
+    })
+    throughput["events_per_day"] = throughput["events"] / throughput["active_days"]
+    return throughput.sort_values("events", ascending=False)
+
+
+def late_deliveries(milestones: pd.DataFrame, iqr_factor: float = LATE_IQR_FACTOR) -> pd.DataFrame:
+    """Delivered batches whose end-to-end lead time is an upper outlier for their product"""
+    delivered = milestones.dropna(subset=["manufactured_to_delivered_hours"])
+    lead = delivered.groupby("product_id")["manufactured_to_delivered_hours"]
+    q1, q3 = lead.transform("quantile", 0.25), lead.transform("quantile", 0.75)
+    fence = q3 + iqr_factor * (q3 - q1)
+    late = delivered.loc[delivered["manufactured_to_delivered_hours"] > fence,
+                         ["product_id", "manufactured_to_delivered_hours"]]
+    return late.assign(threshold_hours=fence[late.index]).sort_values(
+        "manufactured_to_delivered_hours", ascending=False
+    )
+
+
+# =============================================================================
+# INCREMENTAL CACHE
+# =============================================================================
+
+class TrackingAnalytics:
+    """
+    Per-batch derived frames and the last computed result for one database
+    The intervals frame keeps one row per event (every metric needs them all), so it doubles as
+    the event store: a batch with new events is re-derived from its rows there plus the new ones
+    """
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE, overlap_ids: Optional[int] = None):
+        self.chunk_size = chunk_size
+        self.overlap_ids = settings.INCREMENTAL_OVERLAP_IDS if overlap_ids is None else overlap_ids
+        self.last_tracking_id = 0
+        self.intervals: Optional[pd.DataFrame] = None
+        self.milestones: Optional[pd.DataFrame] = None
+        self.result: Optional[SupplyChainAnalytics] = None
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        self.__init__(self.chunk_size, self.overlap_ids)
+
+    def _ids_after(self, floor: int) -> pd.Series:
+        if self.intervals is None:
+            return pd.Series(dtype="int64")
+        ids = self.intervals["id"]
+        return ids[ids > floor]
+
+    def refresh(self, db: Session) -> SupplyChainAnalytics:
+        with self._lock:
+            floor = max(self.last_tracking_id - self.overlap_ids, 0)
+            seen = self._ids_after(floor)
+            window_max, window_count = db.execute(
+                select(func.max(BatchTracking.id), func.count()).where(BatchTracking.id > floor)
+            ).one()
+            if window_count < len(seen) or (window_max or 0) < self.last_tracking_id:  # deleted, truncated or rebuilt
+                self.reset()
+                floor, seen = 0, self._ids_after(0)
+            elif self.result is not None and window_count == len(seen):
+                return self.result
+
+            frames = [frame[~frame["id"].isin(seen)] for frame in iter_event_frames(db, floor, self.chunk_size)]
+            frames = [frame for frame in frames if len(frame)]
+            if frames:
+                new = pd.concat(frames, ignore_index=True)
+                self._rederive(new)
+                self.last_tracking_id = max(self.last_tracking_id, int(new["id"].max()))
+
+            self.result = self._aggregate()
+            return self.result
+
+    def _rederive(self, new: pd.DataFrame) -> None:
+        """Recompute intervals and milestones for the batches that got new events"""
+        batch_ids = new["batch_id"].unique()
+        if self.intervals is None:
+            self.intervals, self.milestones = derive_intervals(new), derive_batch_milestones(new)
+            return
+        touched = self.intervals["batch_id"].isin(batch_ids)
+        products = new.groupby("batch_id")["product_id"].first()
+        previous = self.intervals.loc[touched, INTERVAL_EVENT_COLUMNS]
+        events = pd.concat([previous.assign(product_id=previous["batch_id"].map(products)), new],
+                           ignore_index=True)
+        self.intervals = pd.concat([self.intervals[~touched], derive_intervals(events)])
+        self.milestones = pd.concat([self.milestones.drop(index=batch_ids, errors="ignore"),
+                                     derive_batch_milestones(events)])
+
+    def _aggregate(self) -> SupplyChainAnalytics:
+        if self.intervals is None:  # no events yet
+            events = _empty_events()
+            self.intervals, self.milestones = derive_intervals(events), derive_batch_milestones(events)
+        return SupplyChainAnalytics(
+            last_tracking_id=self.last_tracking_id,
+            dwell_by_location=dwell_by_location(self.intervals),
+            lead_times_by_product=lead_times_by_product(self.milestones),
+            handler_throughput=handler_throughput(self.intervals),
+            late_deliveries=late_deliveries(self.milestones),
+        )
+
+
+_trackers: "weakref.WeakKeyDictionary[Engine, TrackingAnalytics]" = weakref.WeakKeyDictionary()
+_trackers_lock = threading.Lock()
+
+
+def get_supply_chain_analytics(db: Session) -> SupplyChainAnalytics:
+    """Analytics for the session's database, recomputed only when batch_tracking has new rows"""
+    engine = db.get_bind()
+    with _trackers_lock:
+        tracker = _trackers.get(engine)
+        if tracker is None:
+            tracker = _trackers[engine] = TrackingAnalytics()
+    return tracker.refresh(db)
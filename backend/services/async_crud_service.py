@@ -0,0 +1,90 @@
+"""
+Async versions of every function in crud_service.py
+Each coroutine runs the sync implementation through AsyncSession.run_sync, so the
+query logic, loader profiles and pagination stay in one place while the DB I/O is
+awaited on the async engine instead of blocking a threadpool worker.
+
+Loader profiles end in raiseload, so anything a caller needs must be loaded by the
+chosen profile; an accidental lazy load raises instead of blocking the event loop.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import functools
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services import crud_service
+
+
+def _mirror(sync_fn):
+    """Wrap a crud_service function `fn(db, ...)` as `await fn(async_db, ...)`"""
+    @functools.wraps(sync_fn)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        return await db.run_sync(sync_fn, *args, **kwargs)
+    return wrapper
+
+
+# =============================================================================
+# BATCH OPERATIONS
+# =============================================================================
+
+get_batch_by_code = _mirror(crud_service.get_batch_by_code)
+get_batch_by_id = _mirror(crud_service.get_batch_by_id)
+get_batches_by_codes = _mirror(crud_service.get_batches_by_codes)
+get_batches_by_status = _mirror(crud_service.get_batches_by_status)
+get_batches_by_location = _mirror(crud_service.get_batches_by_location)
+get_batches_by_product = _mirror(crud_service.get_batches_by_product)
+search_batches = _mirror(crud_service.search_batches)
+suggest_similar = _mirror(crud_service.suggest_similar)
+
+# =============================================================================
+# BATCH TRACKING OPERATIONS
+# =============================================================================
+
+get_batch_tracking_history = _mirror(crud_service.get_batch_tracking_history)
+get_batch_current_state = _mirror(crud_service.get_batch_current_state)
+get_current_batch_location = _mirror(crud_service.get_current_batch_location)
+get_batch_current_status = _mirror(crud_service.get_batch_current_status)
+rebuild_batch_current_state = _mirror(crud_service.rebuild_batch_current_state)
+
+# =============================================================================
+# EMPLOYEE OPERATIONS
+# =============================================================================
+
+get_employee_by_id = _mirror(crud_service.get_employee_by_id)
+get_employees_by_ids = _mirror(crud_service.get_employees_by_ids)
+get_employee_by_email = _mirror(crud_service.get_employee_by_email)
+get_employees_by_department = _mirror(crud_service.get_employees_by_department)
+get_batch_handlers = _mirror(crud_service.get_batch_handlers)
+
+# =============================================================================
+# PRODUCT OPERATIONS
+# =============================================================================
+
+get_product_by_id = _mirror(crud_service.get_product_by_id)
+get_products_by_ids = _mirror(crud_service.get_products_by_ids)
+get_products_by_category = _mirror(crud_service.get_products_by_category)
+search_products = _mirror(crud_service.search_products)
+
+# =============================================================================
+# DEPARTMENT OPERATIONS
+# =============================================================================
+
+get_department_by_id = _mirror(crud_service.get_department_by_id)
+get_department_by_name = _mirror(crud_service.get_department_by_name)
+
+# =============================================================================
+# ANALYTICS & REPORTING FUNCTIONS
+# =============================================================================
+
+get_batch_statistics = _mirror(crud_service.get_batch_statistics)
+get_batches_by_date_range = _mirror(crud_service.get_batches_by_date_range)
+get_expiring_batches = _mirror(crud_service.get_expiring_batches)
+get_expiry_risk_summary = _mirror(crud_service.get_expiry_risk_summary)
+get_batch_state_snapshot = _mirror(crud_service.get_batch_state_snapshot)
@@ -0,0 +1,478 @@
+"""
+Compact in-memory snapshot of every batch's current state, for dashboards
+One row per batch in parallel numpy arrays (34 bytes a batch: 1M batches in ~34 MB)
+with status and location interned as small integer codes, so a dashboard filter over
+every live batch is a handful of vectorized comparisons instead of loading ORM objects.
+The snapshot is built once per engine by a bulk query over batches + batch_current_state,
+then kept current from tracking events (pushed through realtime_service.local_notifier)
+and a periodic catch-up that reads only rows past the high-water marks, less an overlap of
+INCREMENTAL_OVERLAP_IDS so rows committed out of ID order are not skipped.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import threading
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+from sqlalchemy import event, select, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from models.user_models import Batch, BatchTracking, BatchCurrentState, BatchStatus
+from services import realtime_service
+from services.realtime_service import TrackingEvent
+
+
+CHUNK_SIZE = 50_000
+INITIAL_CAPACITY = 1024
+UNTRACKED = -1  # status/location code of a batch with no tracking events yet
+NO_EVENT = np.iinfo(np.int64).min
+
+STATUS_VALUES = [status.value for status in BatchStatus]
+STATUS_CODES = {
+    **{status: code for code, status in enumerate(BatchStatus)},
+    **{status.value: code for code, status in enumerate(BatchStatus)},
+}
+EPOCH = date(1970, 1, 1)
+
+# name -> dtype; rows are kept in ascending batch_id order (batches.id is autoincrement)
+COLUMNS = {
+    "batch_id": np.int32,
+    "product_id": np.int32,
+    "quantity": np.int32,
+    "expiry": np.int32,        # days since 1970-01-01
+    "status": np.int8,         # index into STATUS_VALUES, or UNTRACKED
+    "location": np.int32,      # index into BatchSnapshot.locations, or UNTRACKED
+    "updated_at": np.int64,    # timestamp of the current state's event, microseconds since the epoch
+    "tracking_id": np.int32,   # its batch_tracking.id (tie-break for equal timestamps)
+    "alive": np.bool_,         # False once the batch is deleted
+}
+
+StrFilter = Union[str, Sequence[str], None]
+
+
+@dataclass
+class BatchState:
+    batch_id: int
+    product_id: int
+    quantity: int
+    expiry_date: date
+    status: Optional[str]
+    location: Optional[str]
+
+
+@dataclass
+class StateTotals:
+    batches: int
+    quantity: int
+
+
+@dataclass
+class SnapshotResult:
+    batches: int
+    quantity: int
+    by_status: Dict[Optional[str], StateTotals]    # None: no tracking events yet
+    by_location: Dict[Optional[str], StateTotals]
+    items: List[BatchState] = field(default_factory=list)  # soonest expiry first
+    last_tracking_id: int = 0
+
+
+def _days(value: date) -> int:
+    return (value - EPOCH).days
+
+
+def _micros(value: Union[datetime, str, None]) -> int:
+    if value is None:
+        return NO_EVENT
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:  # SQLite drops the offset; stored values are UTC
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1_000_000)
+
+
+def _as_list(value) -> List:
+    return [value] if isinstance(value, (str, int)) else list(value)
+
+
+# =============================================================================
+# SNAPSHOT STORE
+# =============================================================================
+
+class BatchSnapshot:
+    """Current state of every batch of one database, as columns"""
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY, overlap_ids: Optional[int] = None):
+        self.overlap_ids = settings.INCREMENTAL_OVERLAP_IDS if overlap_ids is None else overlap_ids
+        self.size = 0
+        self.arrays = {name: np.zeros(capacity, dtype) for name, dtype in COLUMNS.items()}
+        self.locations: List[str] = []
+        self.location_codes: Dict[str, int] = {}
+        self.last_batch_id = 0
+        self.last_tracking_id = 0
+        self.checked_at = 0.0
+        self._lock = threading.RLock()
+        self._inbox: deque = deque()  # pushed event lists not applied yet (see push_events)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.column("alive")))
+
+    def column(self, name: str) -> np.ndarray:
+        """The filled part of a column (a view, not a copy)"""
+        return self.arrays[name][:self.size]
+
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays.values())
+
+    def _intern(self, location: Optional[str]) -> int:
+        if location is None:
+            return UNTRACKED
+        code = self.location_codes.get(location)
+        if code is None:
+            code = self.location_codes[location] = len(self.locations)
+            self.locations.append(location)
+        return code
+
+    def _reserve(self, extra: int) -> None:
+        capacity = len(self.arrays["batch_id"])
+        if self.size + extra <= capacity:
+            return
+        while capacity < self.size + extra:
+            capacity *= 2
+        for name, array in self.arrays.items():
+            grown = np.zeros(capacity, array.dtype)
+            grown[:self.size] = array[:self.size]
+            self.arrays[name] = grown
+
+    def _rows_of(self, batch_ids: np.ndarray) -> np.ndarray:
+        """Row index of each batch ID, -1 where the batch is not in the snapshot"""
+        ids = self.column("batch_id")
+        rows = np.searchsorted(ids, batch_ids)
+        found = rows < self.size
+        found[found] = ids[rows[found]] == batch_ids[found]
+        return np.where(found, rows, -1)
+
+    # -------------------------------------------------------------------------
+    # loading
+    # -------------------------------------------------------------------------
+
+    def load(self, db: Session, chunk_size: int = CHUNK_SIZE) -> "BatchSnapshot":
+        """Bulk build: every batch joined to its current state (one streamed query)"""
+        with self._lock:
+            # events committed while the batches stream in are re-read by the next catch-up
+            last_tracking_id = db.scalar(select(func.max(BatchTracking.id))) or 0
+            self._load_batches(db, chunk_size)
+            self.last_tracking_id = max(self.last_tracking_id, last_tracking_id)
+            self.checked_at = time.monotonic()
+            self._drain()
+        return self
+
+    def catch_up(self, db: Session, force: bool = False, chunk_size: int = CHUNK_SIZE) -> "BatchSnapshot":
+        """Read batches and tracking rows past the high-water marks, at most once per SNAPSHOT_CATCH_UP_SECONDS"""
+        if not force and time.monotonic() - self.checked_at < settings.SNAPSHOT_CATCH_UP_SECONDS:
+            return self
+        with self._lock:
+            self._load_batches(db, chunk_size)
+            events = db.execute(
+                select(BatchTracking.id, BatchTracking.batch_id, BatchTracking.status,
+                       BatchTracking.location, BatchTracking.timestamp)
+                .where(BatchTracking.id > max(self.last_tracking_id - self.overlap_ids, 0))  # re-applying is a no-op
+                .order_by(BatchTracking.id)
+                .execution_options(stream_results=True, yield_per=chunk_size)
+            )
+            for rows in events.partitions():
+                self._apply(
+                    np.fromiter((row[0] for row in rows), np.int32, len(rows)),
+                    np.fromiter((row[1] for row in rows), np.int32, len(rows)),
+                    np.fromiter((STATUS_CODES[row[2]] for row in rows), np.int8, len(rows)),
+                    np.fromiter((self._intern(row[3]) for row in rows), np.int32, len(rows)),
+                    np.fromiter((_micros(row[4]) for row in rows), np.int64, len(rows))
+                )
+                self.last_tracking_id = max(self.last_tracking_id, rows[-1][0])
+            self.checked_at = time.monotonic()
+            self._drain()
+        return self
+
+    def _load_batches(self, db: Session, chunk_size: int) -> None:
+        floor = max(self.last_batch_id - self.overlap_ids, 0)
+        ids = self.column("batch_id")
+        known = set(ids[np.searchsorted(ids, floor, side="right"):].tolist())
+        highest, out_of_order = self.last_batch_id, False
+        result = db.execute(
+            select(Batch.id, Batch.product_id, Batch.quantity, Batch.expiry_date,
+                   BatchCurrentState.status, BatchCurrentState.location,
+                   BatchCurrentState.last_timestamp, BatchCurrentState.last_tracking_id)
+            .outerjoin(BatchCurrentState, BatchCurrentState.batch_id == Batch.id)
+            .where(Batch.id > floor).order_by(Batch.id)
+            .execution_options(stream_results=True, yield_per=chunk_size)
+        )
+        for rows in result.partitions():
+            rows = [row for row in rows if row[0] not in known]
+            if not rows:
+                continue
+            out_of_order = out_of_order or rows[0][0] < highest
+            n = len(rows)
+            self._reserve(n)
+            start, end = self.size, self.size + n
+            values = {
+                "batch_id": (row[0] for row in rows),
+                "product_id": (row[1] for row in rows),
+                "quantity": (row[2] for row in rows),
+                "expiry": (_days(row[3]) for row in rows),
+                "status": (UNTRACKED if row[4] is None else STATUS_CODES[row[4]] for row in rows),
+                "location": (self._intern(row[5]) for row in rows),
+                "updated_at": (_micros(row[6]) for row in rows),
+                "tracking_id": (row[7] or 0 for row in rows),
+            }
+            for name, column in values.items():
+                self.arrays[name][start:end] = np.fromiter(column, COLUMNS[name], n)
+            self.arrays["alive"][start:end] = True
+            self.size = end
+            self.last_batch_id = max(self.last_batch_id, rows[-1][0])
+        if out_of_order:  # a batch below the high-water mark came in late: restore batch_id order
+            order = np.argsort(self.column("batch_id"), kind="stable")
+            for array in self.arrays.values():
+                array[:self.size] = array[:self.size][order]
+
+    # -------------------------------------------------------------------------
+    # incremental updates
+    # -------------------------------------------------------------------------
+
+    def _apply(self, tracking_ids: np.ndarray, batch_ids: np.ndarray, statuses: np.ndarray,
+               locations: np.ndarray, micros: np.ndarray) -> int:
+        """Move batches to the newest of the given events; older events than the stored state are ignored"""
+        if not len(batch_ids) or not self.size:
+            return 0
+        order = np.lexsort((tracking_ids, micros, batch_ids))
+        newest = order[np.append(batch_ids[order][1:] != batch_ids[order][:-1], True)]  # last event of each batch
+        tracking_ids, batch_ids, statuses, locations, micros = (
+            array[newest] for array in (tracking_ids, batch_ids, statuses, locations, micros)
+        )
+        rows = self._rows_of(batch_ids)
+        known = rows >= 0  # batches created after the last catch-up come in with their state then
+        rows, tracking_ids, statuses, locations, micros = (
+            array[known] for array in (rows, tracking_ids, statuses, locations, micros)
+        )
+        current, current_id = self.arrays["updated_at"][rows], self.arrays["tracking_id"][rows]
+        newer = (micros > current) | ((micros == current) & (tracking_ids > current_id))
+        rows = rows[newer]
+        self.arrays["status"][rows] = statuses[newer]
+        self.arrays["location"][rows] = locations[newer]
+        self.arrays["updated_at"][rows] = micros[newer]
+        self.arrays["tracking_id"][rows] = tracking_ids[newer]
+        return len(rows)
+
+    def apply_events(self, events: Sequence[TrackingEvent]) -> int:
+        """Apply tracking events now (waits for the lock); returns how many batches changed state"""
+        with self._lock:
+            self._drain()
+            return self._apply_events(events)
+
+    def push_events(self, events: Sequence[TrackingEvent]) -> None:
+        """
+        Hand events over without waiting: they are applied now if the lock is free, else by
+        whoever holds it (the next query, load or catch-up). The NOTIFY listener calls this on
+        the event loop, which must not stall while a request streams a catch-up under the lock
+        """
+        if not events:
+            return
+        self._inbox.append(events)
+        if self._lock.acquire(blocking=False):
+            try:
+                self._drain()
+            finally:
+                self._lock.release()
+
+    def _drain(self) -> None:
+        """Apply queued pushes (lock held); newest-wins makes their order against a catch-up irrelevant"""
+        if not self._inbox:
+            return
+        events = []
+        while self._inbox:
+            events.extend(self._inbox.popleft())
+        self._apply_events(events)
+
+    def _apply_events(self, events: Sequence[TrackingEvent]) -> int:
+        n = len(events)
+        return self._apply(
+            np.fromiter((e.tracking_id for e in events), np.int32, n),
+            np.fromiter((e.batch_id for e in events), np.int32, n),
+            np.fromiter((STATUS_CODES[e.status] for e in events), np.int8, n),
+            np.fromiter((self._intern(e.location) for e in events), np.int32, n),
+            np.fromiter((_micros(e.timestamp) for e in events), np.int64, n)
+        )
+
+    def update_batches(self, changes: Iterable[tuple]) -> None:
+        """Apply committed (batch_id, product_id, quantity, expiry_date, deleted) changes to known batches"""
+        with self._lock:
+            for batch_id, product_id, quantity, expiry_date, deleted in changes:
+                row = int(self._rows_of(np.array([batch_id], np.int32))[0])
+                if row < 0:
+                    continue
+                if deleted:
+                    self.arrays["alive"][row] = False
+                    continue
+                self.arrays["product_id"][row] = product_id
+                self.arrays["quantity"][row] = quantity
+                self.arrays["expiry"][row] = _days(expiry_date)
+
+    # -------------------------------------------------------------------------
+    # queries
+    # -------------------------------------------------------------------------
+
+    def select(self, status: StrFilter = None, location: StrFilter = None,
+               product_id: Union[int, Sequence[int], None] = None,
+               expiry_from: Optional[date] = None, expiry_to: Optional[date] = None) -> np.ndarray:
+        """Row indexes of live batches matching every given filter (lists match any of their values)"""
+        with self._lock:
+            mask = self.column("alive").copy()
+            if status is not None:
+                codes = [STATUS_CODES[value] for value in _as_list(status)]
+                mask &= np.isin(self.column("status"), codes)
+            if location is not None:
+                codes = [self.location_codes[value] for value in _as_list(location) if value in self.location_codes]
+                mask &= np.isin(self.column("location"), codes)
+            if product_id is not None:
+                mask &= np.isin(self.column("product_id"), _as_list(product_id))
+            if expiry_from is not None:
+                mask &= self.column("expiry") >= _days(expiry_from)
+            if expiry_to is not None:
+                mask &= self.column("expiry") <= _days(expiry_to)
+            return np.flatnonzero(mask)
+
+    def totals(self, rows: np.ndarray, by: str) -> Dict[Optional[str], StateTotals]:
+        """Batch count and quantity of the selected rows per status or location"""
+        names = STATUS_VALUES if by == "status" else self.locations
+        codes = self.arrays[by][rows].astype(np.int64) + 1  # shift UNTRACKED to 0 for bincount
+        counts = np.bincount(codes, minlength=len(names) + 1)
+        quantities = np.bincount(codes, weights=self.arrays["quantity"][rows], minlength=len(names) + 1)
+        labels = [None] + list(names)
+        return {
+            labels[code]: StateTotals(int(counts[code]), int(quantities[code]))
+            for code in np.flatnonzero(counts)
+        }
+
+    def states(self, rows: np.ndarray, limit: int) -> List[BatchState]:
+        """Up to `limit` of the selected batches, soonest expiry first (then by batch ID)"""
+        expiry = self.arrays["expiry"][rows]
+        if limit < len(rows):
+            nearest = np.argpartition(expiry, limit)[:limit]
+            rows, expiry = rows[nearest], expiry[nearest]
+        rows = rows[np.lexsort((rows, expiry))][:limit]
+        columns = {name: self.arrays[name][rows].tolist() for name in COLUMNS}
+        return [
+            BatchState(
+                batch_id=columns["batch_id"][i],
+                product_id=columns["product_id"][i],
+                quantity=columns["quantity"][i],
+                expiry_date=EPOCH + timedelta(days=columns["expiry"][i]),
+                status=None if columns["status"][i] == UNTRACKED else STATUS_VALUES[columns["status"][i]],
+                location=None if columns["location"][i] == UNTRACKED else self.locations[columns["location"][i]]
+            ) for i in range(len(rows))
+        ]
+
+    def query(self, status: StrFilter = None, location: StrFilter = None,
+              product_id: Union[int, Sequence[int], None] = None,
+              expiry_from: Optional[date] = None, expiry_to: Optional[date] = None,
+              limit: int = 100) -> SnapshotResult:
+        with self._lock:
+            self._drain()
+            rows = self.select(status, location, product_id, expiry_from, expiry_to)
+            return SnapshotResult(
+                batches=len(rows),
+                quantity=int(self.arrays["quantity"][rows].sum(dtype=np.int64)),
+                by_status=self.totals(rows, "status"),
+                by_location=self.totals(rows, "location"),
+                items=self.states(rows, limit) if limit else [],
+                last_tracking_id=self.last_tracking_id
+            )
+
+    def stats(self) -> dict:
+        return {
+            "batches": len(self),
+            "locations": len(self.locations),
+            "bytes": self.nbytes(),
+            "last_batch_id": self.last_batch_id,
+            "last_tracking_id": self.last_tracking_id,
+            "queued_pushes": len(self._inbox),
+        }
+
+
+_snapshots: "weakref.WeakKeyDictionary[Engine, BatchSnapshot]" = weakref.WeakKeyDictionary()
+_snapshots_lock = threading.Lock()
+
+
+def get_batch_snapshot(db: Session) -> BatchSnapshot:
+    """The snapshot for the session's database (built on first use, then caught up periodically)"""
+    engine = db.get_bind()
+    with _snapshots_lock:
+        snapshot = _snapshots.get(engine)
+        if snapshot is None:
+            snapshot = _snapshots[engine] = BatchSnapshot()
+    if snapshot.checked_at == 0.0:
+        return snapshot.load(db)
+    return snapshot.catch_up(db)
+
+
+def query_batch_snapshot(db: Session, status: StrFilter = None, location: StrFilter = None,
+                         product_id: Union[int, Sequence[int], None] = None,
+                         expiry_from: Optional[date] = None, expiry_to: Optional[date] = None,
+                         limit: int = 100) -> SnapshotResult:
+    """Totals per status and location plus the soonest-expiring batches matching the filters"""
+    return get_batch_snapshot(db).query(status, location, product_id, expiry_from, expiry_to, limit=limit)
+
+
+def apply_tracking_events(events: List[TrackingEvent]) -> None:
+    """local_notifier callback: events carry no engine, so every loaded snapshot gets them (never blocks)"""
+    for snapshot in list(_snapshots.values()):
+        snapshot.push_events(events)
+
+
+realtime_service.local_notifier.subscribe(apply_tracking_events)
+
+
+# =============================================================================
+# BATCH EDITS
+# =============================================================================
+
+PENDING_BATCH_CHANGES = "batch_snapshot_changes"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_batch_changes(session, flush_context):
+    # new batches arrive through catch-up, in ID order; edits and deletes of known ones apply on commit
+    changes = [
+        (obj.id, obj.product_id, obj.quantity, obj.expiry_date, deleted)
+        for deleted, objects in ((False, session.dirty), (True, session.deleted))
+        for obj in objects if isinstance(obj, Batch)
+    ]
+    if changes:
+        session.info.setdefault(PENDING_BATCH_CHANGES, []).extend(changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_batch_changes(session):
+    changes = session.info.pop(PENDING_BATCH_CHANGES, None)
+    if not changes:
+        return
+    snapshot = _snapshots.get(session.get_bind())
+    if snapshot is not None:
+        snapshot.update_batches(changes)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_batch_changes(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_BATCH_CHANGES, None)
@@ -0,0 +1,66 @@
+"""
+Multi-key lookups: many codes or IDs resolved with one IN query per chunk
+Results keep the caller's order (duplicates collapse to their first position) and the keys
+that matched nothing are reported instead of silently dropped.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Optional
+
+from sqlalchemy.orm import Query
+
+
+# Keys per IN list: well under every driver's bind-parameter limit and the planner's sweet spot
+IN_CHUNK_SIZE = 1000
+
+
+@dataclass
+class BulkLookup:
+    items: list = field(default_factory=list)     # found rows, in input order
+    missing: list = field(default_factory=list)   # input keys with no row, in input order
+
+
+def _normalized(key, normalize: Optional[Callable[[Any], Any]]):
+    if normalize is None:
+        return key
+    try:
+        return normalize(key)
+    except (ValueError, TypeError):
+        return None  # e.g. a malformed UUID: can't match anything
+
+
+def fetch_by_keys(query: Query, key_column, keys: Iterable, key_of: Callable[[Any], Any],
+                  normalize: Optional[Callable[[Any], Any]] = None,
+                  chunk_size: int = IN_CHUNK_SIZE) -> BulkLookup:
+    """
+    Run `query` filtered by `key_column IN (...)` once per chunk of keys
+    key_of(row) gives a row's key; normalize(key) turns an input key into the column's type
+    (e.g. str -> UUID), and keys it rejects are reported as missing
+    """
+    keys = list(keys)
+    normalized = [_normalized(key, normalize) for key in keys]
+    wanted = list(dict.fromkeys(key for key in normalized if key is not None))
+    found = {}
+    for start in range(0, len(wanted), chunk_size):
+        for row in query.filter(key_column.in_(wanted[start:start + chunk_size])):
+            found[key_of(row)] = row
+
+    result, reported = BulkLookup(), set()
+    for key, lookup_key in zip(keys, normalized):
+        row = found.get(lookup_key)
+        marker = ("found", lookup_key) if row is not None else ("missing", key)
+        if marker in reported:
+            continue
+        reported.add(marker)
+        if row is not None:
+            result.items.append(row)
+        else:
+            result.missing.append(key)
+    return result
@@ -0,0 +1,578 @@
+"""
+Two-tier read-through cache for the hottest lookups
+  L1: in-process LRU with a TTL (bounded, per worker)
+  L2: optional Redis tier shared by all workers (CACHE_REDIS_ENABLED)
+
+Cached values are plain JSON-ready dicts, never ORM objects. A batch is cached as a
+core record that refers to its product and creator by ID; those are cached separately,
+so a product rename only invalidates that product.
+
+Invalidation is write-driven: a Session listener collects the keys touched by each
+flush and drops them from both tiers after commit. Core bulk writes (ingestion) call
+mark_batches_changed(). Other workers' L1 entries expire within CACHE_LOCAL_TTL_SECONDS.
+The same commits bump per-batch DataVersions, which version-checked caches (chat answers)
+compare against instead of waiting for a TTL.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import fnmatch
+import json
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from models.user_models import Batch, Employee, Product, Department, BatchTracking, BatchCurrentState
+from sqlalchemy import event, select, inspect
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from database.routing import primary_bind_arguments
+from services.single_flight import SingleFlight
+
+
+_MISSING = object()
+NOT_FOUND = {"__not_found__": True}  # negative-cache marker so unknown codes don't hit the DB every time
+
+
+# =============================================================================
+# TIERS
+# =============================================================================
+
+class LRUTTLCache:
+    """Thread-safe bounded LRU cache whose entries also expire after `ttl` seconds"""
+
+    def __init__(self, max_entries: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key: str, default=_MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value) -> None:
+        with self._lock:
+            self._data[key] = (self.clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for the subset of redis.Redis used here (get/set/delete/incr/mget/scan_iter/flushdb)
+    Used by tests and local development without a Redis server
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._data: Dict[str, tuple] = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= self.clock():
+            del self._data[key]
+            return None
+        return value
+
+    def set(self, key: str, value, ex: Optional[int] = None) -> bool:
+        if isinstance(value, str):
+            value = value.encode()
+        self._data[key] = (self.clock() + ex if ex else None, value)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        value = int(self.get(key) or 0) + amount
+        expires_at = self._data[key][0] if key in self._data else None
+        self._data[key] = (expires_at, str(value).encode())
+        return value
+
+    def mget(self, keys: Iterable[str]) -> list:
+        return [self.get(key) for key in keys]
+
+    def scan_iter(self, match: str = "*", count: Optional[int] = None):
+        return iter([key for key in list(self._data) if fnmatch.fnmatchcase(key, match) and self.get(key) is not None])
+
+    def flushdb(self) -> bool:
+        self._data.clear()
+        return True
+
+
+class RedisTier:
+    """JSON values in Redis under a key prefix; Redis errors degrade to cache misses"""
+
+    def __init__(self, client, ttl: int, prefix: str = "erp:cache:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = self.misses = self.errors = 0
+
+    def get(self, key: str, default=_MISSING):
+        try:
+            raw = self.client.get(self.prefix + key)
+        except Exception:
+            self.errors += 1
+            return default
+        if raw is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value) -> None:
+        try:
+            self.client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+        except Exception:
+            self.errors += 1
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        keys = [self.prefix + key for key in keys]
+        if not keys:
+            return
+        try:
+            self.client.delete(*keys)
+        except Exception:
+            self.errors += 1
+
+    def clear(self, chunk_size: int = 500) -> None:
+        """Delete every key under the prefix; SCAN walks the keyspace without blocking Redis the way KEYS would"""
+        try:
+            chunk = []
+            for key in self.client.scan_iter(match=self.prefix + "*", count=chunk_size):
+                chunk.append(key)
+                if len(chunk) >= chunk_size:
+                    self.client.delete(*chunk)
+                    chunk = []
+            if chunk:
+                self.client.delete(*chunk)
+        except Exception:
+            self.errors += 1
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+
+class TwoTierCache:
+    def __init__(self, local: LRUTTLCache, remote: Optional[RedisTier] = None):
+        self.local = local
+        self.remote = remote
+        self.loads = SingleFlight("cache.loads")
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]):
+        value = self.local.get(key)
+        if value is not _MISSING:
+            return value
+        if settings.SINGLE_FLIGHT_ENABLED:  # a burst of misses on one key runs the loader once
+            return self.loads.do(key, lambda: self._load(key, loader))
+        return self._load(key, loader)
+
+    def _load(self, key: str, loader: Callable[[], Any]):
+        if self.remote is not None:
+            value = self.remote.get(key)
+            if value is not _MISSING:
+                self.local.set(key, value)
+                return value
+
+        value = loader()
+        if value is None:
+            value = NOT_FOUND
+        self.local.set(key, value)
+        if self.remote is not None:
+            self.remote.set(key, value)
+        return value
+
+    def invalidate(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        for key in keys:
+            self.local.delete(key)
+        if self.remote is not None:
+            self.remote.delete_many(keys)
+
+    def clear(self) -> None:
+        self.local.clear()
+        if self.remote is not None:
+            self.remote.clear()
+
+    def stats(self) -> dict:
+        return {
+            "local": self.local.stats(),
+            "redis": self.remote.stats() if self.remote is not None else None,
+        }
+
+
+def _build_cache() -> TwoTierCache:
+    remote = None
+    if settings.CACHE_REDIS_ENABLED:
+        import redis  # optional dependency, only needed when the Redis tier is on
+        remote = RedisTier(redis.Redis.from_url(settings.REDIS_URL), ttl=settings.CACHE_REDIS_TTL_SECONDS)
+    return TwoTierCache(LRUTTLCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_LOCAL_TTL_SECONDS), remote)
+
+
+cache = _build_cache()
+
+
+def configure_cache(new_cache: TwoTierCache) -> None:
+    """Swap the process-wide cache (e.g. a FakeRedis-backed one in tests)"""
+    global cache
+    cache = new_cache
+
+
+def stats() -> dict:
+    return cache.stats()
+
+
+# =============================================================================
+# KEYS & LOADERS
+# =============================================================================
+
+def batch_code_key(batch_code: str) -> str:
+    return f"batch:code:{batch_code}"
+
+
+def batch_key(batch_id: int) -> str:
+    return f"batch:id:{batch_id}"
+
+
+def product_key(product_id: int) -> str:
+    return f"product:id:{product_id}"
+
+
+def employee_key(employee_id) -> str:
+    return f"employee:id:{_as_uuid(employee_id)}"
+
+
+def department_key(department_id) -> str:
+    return f"department:id:{_as_uuid(department_id)}"
+
+
+def _as_uuid(value) -> uuid.UUID:
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+def _iso(value) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+# Loaders read the primary: a lagging replica's row would be cached, shared through Redis and
+# stamped with the current data version as if it were fresh
+
+def _load_batch_id(db: Session, batch_code: str) -> Optional[int]:
+    return db.execute(select(Batch.id).where(Batch.batch_code == batch_code),
+                      bind_arguments=primary_bind_arguments(db)).scalar()
+
+
+def _load_batch(db: Session, batch_id: int) -> Optional[dict]:
+    row = db.execute(
+        select(
+            Batch.id, Batch.batch_code, Batch.product_id, Batch.quantity,
+            Batch.manufactured_date, Batch.expiry_date, Batch.created_by,
+            BatchCurrentState.status, BatchCurrentState.location,
+            BatchCurrentState.handled_by, BatchCurrentState.last_timestamp
+        ).outerjoin(BatchCurrentState, BatchCurrentState.batch_id == Batch.id).where(Batch.id == batch_id),
+        bind_arguments=primary_bind_arguments(db)
+    ).first()
+    if row is None:
+        return None
+    return {
+        "id": row.id,
+        "batch_code": row.batch_code,
+        "product_id": row.product_id,
+        "quantity": row.quantity,
+        "manufactured_date": _iso(row.manufactured_date),
+        "expiry_date": _iso(row.expiry_date),
+        "created_by": str(row.created_by),
+        "current_status": row.status.value if row.status else None,
+        "current_location": row.location,
+        "last_handled_by": str(row.handled_by) if row.handled_by else None,
+        "last_updated": _iso(row.last_timestamp),
+    }
+
+
+def _load_product(db: Session, product_id: int) -> Optional[dict]:
+    product = db.execute(
+        select(Product.id, Product.name, Product.category, Product.unit_price).where(Product.id == product_id),
+        bind_arguments=primary_bind_arguments(db)
+    ).first()
+    if product is None:
+        return None
+    return {"id": product.id, "name": product.name, "category": product.category,
+            "unit_price": str(product.unit_price)}
+
+
+def _load_employee(db: Session, employee_id) -> Optional[dict]:
+    employee = db.execute(
+        select(Employee.id, Employee.name, Employee.email, Employee.designation,
+               Employee.department_id, Employee.date_joined).where(Employee.id == _as_uuid(employee_id)),
+        bind_arguments=primary_bind_arguments(db)
+    ).first()
+    if employee is None:
+        return None
+    return {"id": str(employee.id), "name": employee.name, "email": employee.email,
+            "designation": employee.designation, "department_id": str(employee.department_id),
+            "date_joined": _iso(employee.date_joined)}
+
+
+def _load_department(db: Session, department_id) -> Optional[dict]:
+    department = db.execute(
+        select(Department.id, Department.name, Department.head_id).where(Department.id == _as_uuid(department_id)),
+        bind_arguments=primary_bind_arguments(db)
+    ).first()
+    if department is None:
+        return None
+    return {"id": str(department.id), "name": department.name,
+            "head_id": str(department.head_id) if department.head_id else None}
+
+
+def _found(value):
+    return None if value == NOT_FOUND else value
+
+
+# =============================================================================
+# CACHED LOOKUPS
+# =============================================================================
+
+def _lookup(db: Session, key: str, loader: Callable[[], Any]):
+    # A session that has flushed writes to this key reads its own uncommitted data, and must not cache it
+    if not settings.CACHE_ENABLED or key in db.info.get(PENDING_KEYS, ()):
+        return loader()
+    return _found(cache.get_or_load(key, loader))
+
+
+def get_product_by_id(db: Session, product_id: int) -> Optional[dict]:
+    """Cached product record"""
+    return _lookup(db, product_key(product_id), lambda: _load_product(db, product_id))
+
+
+def get_department_by_id(db: Session, dept_id) -> Optional[dict]:
+    """Cached department record"""
+    return _lookup(db, department_key(dept_id), lambda: _load_department(db, dept_id))
+
+
+def get_employee_by_id(db: Session, employee_id) -> Optional[dict]:
+    """Cached employee record with its department embedded"""
+    employee = _lookup(db, employee_key(employee_id), lambda: _load_employee(db, employee_id))
+    if employee is None:
+        return None
+    return dict(employee, department=get_department_by_id(db, employee["department_id"]))
+
+
+def get_batch_record(db: Session, batch_code: str) -> Optional[dict]:
+    """Cached core batch record: the batch, its current state, and product and creator by ID only"""
+    batch_id = _lookup(db, batch_code_key(batch_code), lambda: _load_batch_id(db, batch_code))
+    if batch_id is None:
+        return None
+    return _lookup(db, batch_key(batch_id), lambda: _load_batch(db, batch_id))
+
+
+def get_batch_by_code(db: Session, batch_code: str) -> Optional[dict]:
+    """
+    Cached batch record with current state, product and creator embedded
+    Tracking history is not included; page it with crud_service.get_batch_tracking_history
+    """
+    batch = get_batch_record(db, batch_code)
+    if batch is None:
+        return None
+    return dict(
+        batch,
+        product=get_product_by_id(db, batch["product_id"]),
+        creator=get_employee_by_id(db, batch["created_by"])
+    )
+
+
+# =============================================================================
+# DATA VERSIONS
+# =============================================================================
+
+class DataVersions:
+    """
+    Version counters for batch data, bumped after every commit that touches a batch
+    Batches hash onto a fixed number of stripes, so memory stays bounded; two batches
+    sharing a stripe only cost each other an occasional extra cache miss. The global
+    version moves on every bump and covers answers that depend on many batches.
+    bump_all() moves every batch at once: an epoch added to each stripe's version.
+    """
+
+    def __init__(self, stripes: int = 65536):
+        self.stripes = stripes
+        self._versions = [0] * stripes
+        self._epoch = 0
+        self._global = 0
+        self._lock = threading.Lock()
+
+    def bump(self, batch_ids: Iterable[int] = ()) -> None:
+        with self._lock:
+            for batch_id in batch_ids:
+                self._versions[batch_id % self.stripes] += 1
+            self._global += 1
+
+    def bump_all(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._global += 1
+
+    def global_version(self) -> int:
+        return self._global
+
+    def snapshot(self, batch_ids: Iterable[int]) -> Dict[int, int]:
+        return {batch_id: self._versions[batch_id % self.stripes] + self._epoch for batch_id in batch_ids}
+
+
+class RedisDataVersions(DataVersions):
+    """DataVersions kept in Redis so a commit in one worker invalidates answers cached by all of them"""
+
+    def __init__(self, client, stripes: int = 65536, prefix: str = "erp:version:"):
+        self.client = client
+        self.stripes = stripes
+        self.prefix = prefix
+
+    def bump(self, batch_ids: Iterable[int] = ()) -> None:
+        for stripe in {batch_id % self.stripes for batch_id in batch_ids}:
+            self.client.incr(f"{self.prefix}{stripe}")
+        self.client.incr(f"{self.prefix}global")
+
+    def bump_all(self) -> None:
+        self.client.incr(f"{self.prefix}epoch")
+        self.client.incr(f"{self.prefix}global")
+
+    def global_version(self) -> int:
+        return int(self.client.get(f"{self.prefix}global") or 0)
+
+    def snapshot(self, batch_ids: Iterable[int]) -> Dict[int, int]:
+        batch_ids = list(batch_ids)
+        if not batch_ids:
+            return {}
+        *values, epoch = self.client.mget([f"{self.prefix}{batch_id % self.stripes}" for batch_id in batch_ids]
+                                          + [f"{self.prefix}epoch"])
+        epoch = int(epoch or 0)
+        return {batch_id: int(value or 0) + epoch for batch_id, value in zip(batch_ids, values)}
+
+
+def _build_versions() -> DataVersions:
+    if settings.CACHE_REDIS_ENABLED:
+        import redis
+        return RedisDataVersions(redis.Redis.from_url(settings.REDIS_URL))
+    return DataVersions()
+
+
+versions = _build_versions()
+
+
+def configure_versions(new_versions: DataVersions) -> None:
+    global versions
+    versions = new_versions
+
+
+def _bump_versions(keys: Iterable[str]) -> None:
+    prefix = batch_key("")
+    versions.bump(int(key[len(prefix):]) for key in keys if key.startswith(prefix))
+
+
+# =============================================================================
+# WRITE-DRIVEN INVALIDATION
+# =============================================================================
+
+PENDING_KEYS = "cache_invalidations"
+
+
+def _pending(session: Session) -> set:
+    return session.info.setdefault(PENDING_KEYS, set())
+
+
+def mark_batches_changed(session: Session, batch_ids: Iterable[int] = (), batch_codes: Iterable[str] = ()) -> None:
+    """Queue invalidation for batches written outside the ORM unit of work (Core bulk inserts)"""
+    pending = _pending(session)
+    pending.update(batch_key(batch_id) for batch_id in batch_ids)
+    pending.update(batch_code_key(code) for code in batch_codes)
+
+
+def invalidate_all() -> None:
+    """Drop every cached record from both tiers and move every batch's data version (backfills that may touch any row)"""
+    cache.clear()
+    versions.bump_all()
+
+
+def _keys_for(obj) -> list:
+    if isinstance(obj, BatchTracking):
+        return [batch_key(obj.batch_id)]
+    if isinstance(obj, Batch):
+        old_codes = inspect(obj).attrs.batch_code.history.deleted or ()
+        return [batch_key(obj.id), batch_code_key(obj.batch_code)] + [batch_code_key(code) for code in old_codes]
+    if isinstance(obj, Product):
+        return [product_key(obj.id)]
+    if isinstance(obj, Employee):
+        return [employee_key(obj.id)]
+    if isinstance(obj, Department):
+        return [department_key(obj.id)]
+    return []
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_invalidations(session, flush_context):
+    pending = _pending(session)
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        pending.update(_keys_for(obj))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session):
+    keys = session.info.pop(PENDING_KEYS, None)
+    if keys:
+        cache.invalidate(keys)
+        _bump_versions(keys)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_invalidations(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_KEYS, None)
@@ -0,0 +1,540 @@
+"""
+Chatbot question routing
+Common questions ("where is batch VDT-052025-A", "status of X", "which batches are in transit")
+are recognised with compiled patterns plus an index of known batch-code prefixes and product
+names, and answered straight from crud_service. Only open-ended questions go to the LLM
+(services/ai_service.py). Router statistics record which path each question took.
+
+Answers are cached by normalized intent + entities. Each entry remembers the data versions
+of the batches it was built from (services/cache_service.py bumps them on every commit that
+writes tracking), so a repeat question skips SQL and the LLM but never sees a stale location. That holds across
+workers only when the versions live in Redis, so by default the answer cache is on only then
+(CHAT_CACHE_ENABLED in app/config.py).
+On a miss, concurrent askers of the same intent share one answer (services/single_flight.py),
+so a batch that everyone asks about at once costs one set of queries, not one per request.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import re
+import threading
+import time
+import weakref
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from models.user_models import Batch, Product, BatchStatus
+from app.config import settings
+from services import ai_service, cache_service, crud_service
+from services.cache_service import LRUTTLCache
+from services.single_flight import SingleFlight
+
+
+FAST_PATH = "fast"
+LLM_PATH = "llm"
+
+LIST_LIMIT = 10
+HISTORY_LIMIT = 20
+DEFAULT_EXPIRY_DAYS = 30
+ENTITY_INDEX_MAX_AGE_SECONDS = 60  # other workers' new batches show up within this
+
+OPEN_QUESTION = "open_question"
+
+BATCH_CODE_PATTERN = re.compile(r"\b[A-Z][A-Z0-9]+(?:-[A-Z0-9]+)+\b", re.IGNORECASE)
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+NORMALIZE_PATTERN = re.compile(r"[^a-z0-9-]+")
+DAYS_PATTERN = re.compile(r"\b(\d{1,4})\s*days?\b", re.IGNORECASE)
+
+HISTORY_PATTERN = re.compile(r"\b(history|timeline|trail|journey|movements?|track(?:ing)?)\b", re.IGNORECASE)
+HANDLER_PATTERN = re.compile(r"\b(who|handlers?|handled)\b", re.IGNORECASE)
+EXPIRY_PATTERN = re.compile(r"\bexpir\w*\b", re.IGNORECASE)
+LOCATION_PATTERN = re.compile(r"\b(where|location|located|whereabouts)\b", re.IGNORECASE)
+LIST_PATTERN = re.compile(r"\b(which|list|show|all|how many|batches)\b", re.IGNORECASE)
+STATUS_PATTERNS: List[Tuple[re.Pattern, BatchStatus]] = [
+    (re.compile(r"\b(in[ -]transit|shipping|on the way)\b", re.IGNORECASE), BatchStatus.IN_TRANSIT),
+    (re.compile(r"\b(delivered)\b", re.IGNORECASE), BatchStatus.DELIVERED),
+    (re.compile(r"\b(manufactured|produced)\b", re.IGNORECASE), BatchStatus.MANUFACTURED),
+]
+
+
+@dataclass(frozen=True)
+class Intent:
+    name: str
+    entities: Tuple[Tuple[str, str], ...] = ()
+
+    def get(self, key: str, default=None):
+        return next((value for name, value in self.entities if name == key), default)
+
+    def all(self, key: str) -> List[str]:
+        return [value for name, value in self.entities if name == key]
+
+    def cache_key(self) -> str:
+        return self.name + "|" + "&".join(f"{name}={value}" for name, value in self.entities)
+
+
+@dataclass
+class ChatAnswer:
+    answer: str
+    path: str                       # FAST_PATH or LLM_PATH
+    intent: str
+    data: Optional[dict] = None     # structured result behind the answer text
+    elapsed_ms: float = 0.0
+    cached: bool = False
+    batch_ids: Optional[List[int]] = None  # batches the answer was read from; None means "any batch data"
+
+
+# =============================================================================
+# KNOWN ENTITIES
+# =============================================================================
+
+class PrefixTrie:
+    """Character trie of known batch-code prefixes (the part before the first '-')"""
+
+    _END = ""
+
+    def __init__(self):
+        self.root: Dict[str, dict] = {}
+        self.size = 0
+
+    def insert(self, word: str) -> None:
+        node = self.root
+        for char in word:
+            node = node.setdefault(char, {})
+        if self._END not in node:
+            node[self._END] = True
+            self.size += 1
+
+    def __contains__(self, word: str) -> bool:
+        node = self._walk(word)
+        return node is not None and self._END in node
+
+    def _walk(self, word: str) -> Optional[dict]:
+        node = self.root
+        for char in word:
+            node = node.get(char)
+            if node is None:
+                return None
+        return node
+
+
+class EntityIndex:
+    """
+    Batch-code prefixes and product names for one database
+    Codes are added incrementally (only batches newer than the last refresh are read);
+    products are small and reloaded whenever a new one appears.
+    """
+
+    def __init__(self):
+        self.code_prefixes = PrefixTrie()
+        self.product_names: Dict[str, str] = {}   # lowercased full name -> name
+        self.product_words: Dict[str, str] = {}   # distinctive first word -> that word as stored
+        self.last_batch_id = 0
+        self.last_product_id = 0
+        self.seen_version: Optional[int] = None
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def refresh_if_stale(self, db: Session) -> "EntityIndex":
+        """Re-check the database only after a local commit touched batches, or once a minute"""
+        version = cache_service.versions.global_version()
+        if version != self.seen_version or time.monotonic() - self.checked_at > ENTITY_INDEX_MAX_AGE_SECONDS:
+            self.refresh(db)
+            self.seen_version, self.checked_at = version, time.monotonic()
+        return self
+
+    def refresh(self, db: Session) -> "EntityIndex":
+        last_batch_id, last_product_id = db.execute(select(
+            select(func.max(Batch.id)).scalar_subquery(),
+            select(func.max(Product.id)).scalar_subquery()
+        )).one()
+        with self._lock:
+            if (last_batch_id or 0) > self.last_batch_id:
+                codes = db.execute(select(Batch.batch_code).where(Batch.id > self.last_batch_id).execution_options(
+                    stream_results=True, yield_per=10_000
+                )).scalars()
+                for code in codes:
+                    self.code_prefixes.insert(code.split("-", 1)[0].upper())
+                self.last_batch_id = last_batch_id
+            if (last_product_id or 0) != self.last_product_id:
+                names = db.execute(select(Product.name)).scalars().all()
+                self.product_names = {name.lower(): name for name in names}
+                self.product_words = {
+                    name.split()[0].lower(): name.split()[0] for name in names if len(name.split()[0]) >= 4
+                }
+                self.last_product_id = last_product_id or 0
+        return self
+
+    def find_codes(self, question: str) -> Tuple[List[str], List[str]]:
+        """
+        (tokens with a known batch-code prefix, other tokens shaped like PREFIX-MMYYYY-N)
+        Whether a known-prefix code really exists is left to the lookup that answers the question.
+        """
+        known, unknown = [], []
+        for token in BATCH_CODE_PATTERN.findall(question):
+            code = token.upper()
+            if code.split("-", 1)[0] in self.code_prefixes:
+                known.append(code)
+            elif code.count("-") >= 2:  # "COVID-19" and the like are not batch codes
+                unknown.append(code)
+        return known, unknown
+
+    def find_product(self, question: str) -> Optional[str]:
+        lowered = question.lower()
+        for lowered_name, name in self.product_names.items():
+            if lowered_name in lowered:
+                return name
+        for word in WORD_PATTERN.findall(lowered):
+            if word in self.product_words:
+                return self.product_words[word]
+        return None
+
+
+_indexes: "weakref.WeakKeyDictionary[Engine, EntityIndex]" = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def get_entity_index(db: Session) -> EntityIndex:
+    engine = db.get_bind()
+    with _indexes_lock:
+        index = _indexes.get(engine)
+        if index is None:
+            index = _indexes[engine] = EntityIndex()
+    return index.refresh_if_stale(db)
+
+
+# =============================================================================
+# ROUTER STATISTICS
+# =============================================================================
+
+class RouterStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.paths: Dict[str, int] = {}
+        self.intents: Dict[str, int] = {}
+        self.elapsed_ms: Dict[str, float] = {}
+
+    def record(self, answer: ChatAnswer) -> None:
+        with self._lock:
+            self.paths[answer.path] = self.paths.get(answer.path, 0) + 1
+            self.intents[answer.intent] = self.intents.get(answer.intent, 0) + 1
+            self.elapsed_ms[answer.path] = self.elapsed_ms.get(answer.path, 0.0) + answer.elapsed_ms
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            total = sum(self.paths.values())
+            return {
+                "total": total,
+                "paths": {
+                    path: {
+                        "count": count,
+                        "fraction": round(count / total, 4),
+                        "mean_ms": round(self.elapsed_ms[path] / count, 3),
+                    } for path, count in self.paths.items()
+                },
+                "intents": dict(self.intents),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.paths.clear()
+            self.intents.clear()
+            self.elapsed_ms.clear()
+
+
+router_stats = RouterStats()
+
+
+# =============================================================================
+# ANSWER CACHE
+# =============================================================================
+
+class ChatAnswerCache:
+    """
+    Bounded LRU of answers keyed by Intent.cache_key()
+    An entry is served only while the data versions it was built against are unchanged;
+    the TTL just bounds how long LLM answers (which read no batch data) are reused.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.entries = LRUTTLCache(max_entries=max_entries, ttl=ttl)
+        self.hits = self.misses = self.stale = 0
+        self._lock = threading.Lock()
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def get(self, key: str) -> Optional[ChatAnswer]:
+        entry = self.entries.get(key, None)
+        if entry is None:
+            self._count("misses")
+            return None
+        answer, batch_versions, global_version = entry
+        versions = cache_service.versions
+        fresh = (versions.global_version() == global_version if global_version is not None
+                 else versions.snapshot(batch_versions) == batch_versions)
+        if not fresh:
+            self.entries.delete(key)
+            self._count("stale")
+            self._count("misses")
+            return None
+        self._count("hits")
+        return answer
+
+    def put(self, key: str, answer: ChatAnswer, global_before: int) -> None:
+        """Store an answer computed after global_before was read; skipped if batch data moved meanwhile"""
+        versions = cache_service.versions
+        if versions.global_version() != global_before:
+            return
+        if answer.batch_ids is None:
+            self.entries.set(key, (answer, None, global_before))
+        else:
+            self.entries.set(key, (answer, versions.snapshot(answer.batch_ids), None))
+
+    def clear(self) -> None:
+        self.entries.clear()
+        with self._lock:
+            self.hits = self.misses = self.stale = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.entries.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "evictions": self.entries.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+answer_cache = ChatAnswerCache(settings.CHAT_CACHE_MAX_ENTRIES, settings.CHAT_CACHE_TTL_SECONDS)
+answer_flight = SingleFlight("chat.answers")
+
+
+# =============================================================================
+# INTENT CLASSIFICATION
+# =============================================================================
+
+def normalize_question(question: str) -> str:
+    return " ".join(NORMALIZE_PATTERN.sub(" ", question.lower()).split())
+
+
+def classify(question: str, index: EntityIndex) -> Optional[Intent]:
+    """Recognise a fast-path intent and its entities; pure pattern matching, no SQL"""
+    known_codes, unknown_codes = index.find_codes(question)
+
+    if known_codes:
+        code = known_codes[0]
+        if HISTORY_PATTERN.search(question):
+            return Intent("batch_history", (("batch_code", code),))
+        if HANDLER_PATTERN.search(question):
+            return Intent("batch_handlers", (("batch_code", code),))
+        if EXPIRY_PATTERN.search(question):
+            return Intent("batch_expiry", (("batch_code", code),))
+        name = "batch_location" if LOCATION_PATTERN.search(question) else "batch_status"
+        return Intent(name, tuple(("batch_code", c) for c in dict.fromkeys(known_codes)))
+    if unknown_codes:
+        return Intent("unknown_batch", tuple(("batch_code", c) for c in dict.fromkeys(unknown_codes)))
+
+    if EXPIRY_PATTERN.search(question):
+        match = DAYS_PATTERN.search(question)
+        return Intent("expiring_batches", (("days", match.group(1) if match else str(DEFAULT_EXPIRY_DAYS)),))
+
+    if LIST_PATTERN.search(question):
+        for pattern, status in STATUS_PATTERNS:
+            if pattern.search(question):
+                return Intent("batches_by_status", (("status", status.name),))
+
+    product = index.find_product(question)
+    if product is not None:
+        return Intent("product_batches", (("product", product),))
+
+    return None
+
+
+# =============================================================================
+# FAST-PATH HANDLERS
+# =============================================================================
+
+def _state_data(code: str, record: dict) -> dict:
+    return {
+        "batch_code": code,
+        "status": record["current_status"],
+        "location": record["current_location"],
+        "last_timestamp": record["last_updated"],
+    }
+
+
+def _batch_states(db: Session, codes: List[str], intent: str) -> Optional[ChatAnswer]:
+    lines, found, missing, batch_ids = [], [], [], []
+    for code in codes:
+        record = cache_service.get_batch_record(db, code)  # cached; invalidated by tracking writes
+        if record is None or record["current_status"] is None:
+            missing.append(code)
+            continue
+        found.append(_state_data(code, record))
+        batch_ids.append(record["id"])
+        status, location = record["current_status"], record["current_location"]
+        if intent == "batch_location":
+            lines.append(f"Batch {code} is at {location} ({status}).")
+        else:
+            lines.append(f"Batch {code} is {status} at {location}.")
+    if not found:
+        return None
+    if missing:
+        lines.append(f"I couldn't find batch {', '.join(missing)}.")
+        batch_ids = None  # the missing code may be created later
+    return ChatAnswer(" ".join(lines), FAST_PATH, intent, {"batches": found}, batch_ids=batch_ids)
+
+
+def _batch_history(db: Session, code: str) -> Optional[ChatAnswer]:
+    page = crud_service.get_batch_tracking_history(db, code, limit=HISTORY_LIMIT)
+    if not page.items:
+        return None
+    events = [{
+        "timestamp": record.timestamp.isoformat() if record.timestamp else None,
+        "status": record.status.value,
+        "location": record.location,
+        "handled_by": record.handler.name if record.handler else None,
+    } for record in page.items]
+    lines = [f"Tracking history for {code}:"] + [
+        f"- {e['timestamp'][:16].replace('T', ' ') if e['timestamp'] else '?'}: {e['status']} at {e['location']}"
+        + (f" ({e['handled_by']})" if e["handled_by"] else "")
+        for e in events
+    ]
+    if page.has_more:
+        lines.append(f"(first {HISTORY_LIMIT} events shown)")
+    return ChatAnswer("\n".join(lines), FAST_PATH, "batch_history", {"batch_code": code, "events": events},
+                      batch_ids=[page.items[0].batch_id])
+
+
+def _batch_handlers(db: Session, code: str) -> Optional[ChatAnswer]:
+    page = crud_service.get_batch_handlers(db, code, limit=LIST_LIMIT)
+    if not page.items:
+        return None
+    names = [employee.name for employee in page.items]
+    return ChatAnswer(f"Batch {code} was handled by {', '.join(names)}.", FAST_PATH, "batch_handlers",
+                      {"batch_code": code, "handlers": names})
+
+
+def _batch_expiry(db: Session, code: str) -> Optional[ChatAnswer]:
+    record = cache_service.get_batch_record(db, code)
+    if record is None:
+        return None
+    return ChatAnswer(f"Batch {code} expires on {record['expiry_date']}.", FAST_PATH, "batch_expiry",
+                      {"batch_code": code, "expiry_date": record["expiry_date"]}, batch_ids=[record["id"]])
+
+
+def _expiring_batches(db: Session, days: int) -> ChatAnswer:
+    page = crud_service.get_expiring_batches(db, within_days=days, limit=LIST_LIMIT)
+    items = [{"batch_code": b.batch_code, "expiry_date": b.expiry_date.isoformat(),
+              "location": b.location, "status": b.status} for b in page.items]
+    if not items:
+        return ChatAnswer(f"No undelivered batches expire in the next {days} days.", FAST_PATH,
+                          "expiring_batches", {"days": days, "batches": []})
+    lines = [f"Undelivered batches expiring in the next {days} days:"] + [
+        f"- {i['batch_code']} on {i['expiry_date']} at {i['location'] or 'unknown location'}" for i in items
+    ]
+    if page.next_cursor:
+        lines.append(f"(first {LIST_LIMIT} shown)")
+    return ChatAnswer("\n".join(lines), FAST_PATH, "expiring_batches", {"days": days, "batches": items})
+
+
+def _batch_list(page, intent: str, title: str, data: dict) -> ChatAnswer:
+    codes = [batch.batch_code for batch in page.items]
+    if not codes:
+        return ChatAnswer(f"There are no {title}.", FAST_PATH, intent, {**data, "batch_codes": []})
+    more = f" (first {LIST_LIMIT} shown)" if page.has_more else ""
+    return ChatAnswer(f"{title[0].upper() + title[1:]}: {', '.join(codes)}{more}.", FAST_PATH, intent,
+                      {**data, "batch_codes": codes})
+
+
+def _unknown_batch(db: Session, codes: List[str]) -> ChatAnswer:
+    suggestions = []
+    for code in codes:  # in-memory lookup, no extra query for the typo
+        suggestions += [s.text for s in crud_service.suggest_similar(db, "batch", code, limit=3)]
+    text = f"I couldn't find batch {', '.join(codes)}."
+    if suggestions:
+        text += f" Did you mean {', '.join(dict.fromkeys(suggestions))}?"
+    return ChatAnswer(text, FAST_PATH, "unknown_batch", {"batch_codes": codes, "suggestions": suggestions})
+
+
+def execute_fast_path(db: Session, intent: Intent) -> ChatAnswer:
+    """Answer a classified intent from crud_service"""
+    codes = intent.all("batch_code")
+    if intent.name == "batch_history":
+        answer = _batch_history(db, codes[0])
+    elif intent.name == "batch_handlers":
+        answer = _batch_handlers(db, codes[0])
+    elif intent.name == "batch_expiry":
+        answer = _batch_expiry(db, codes[0])
+    elif intent.name in ("batch_location", "batch_status"):
+        answer = _batch_states(db, codes, intent.name)
+    elif intent.name == "expiring_batches":
+        return _expiring_batches(db, int(intent.get("days")))
+    elif intent.name == "batches_by_status":
+        status = BatchStatus[intent.get("status")]
+        page = crud_service.get_batches_by_status(db, status, limit=LIST_LIMIT)
+        return _batch_list(page, intent.name, f"batches {status.value.lower()}", {"status": status.value})
+    elif intent.name == "product_batches":
+        product = intent.get("product")
+        page = crud_service.get_batches_by_product(db, product, limit=LIST_LIMIT)
+        return _batch_list(page, intent.name, f"batches of {product}", {"product": product})
+    else:
+        answer = None
+    return answer or _unknown_batch(db, codes)
+
+
+def route_fast_path(db: Session, question: str, index: Optional[EntityIndex] = None) -> Optional[ChatAnswer]:
+    """Answer the question from the database if it matches a known intent, else None (uncached)"""
+    intent = classify(question, index or get_entity_index(db))
+    return execute_fast_path(db, intent) if intent is not None else None
+
+
+def _ask_llm(question: str) -> ChatAnswer:
+    try:
+        return ChatAnswer(ai_service.generate_answer(question), LLM_PATH, OPEN_QUESTION, batch_ids=[])
+    except ai_service.LLMError as e:
+        return ChatAnswer("Sorry, I can't answer that right now.", LLM_PATH, "llm_error", {"error": str(e)})
+
+
+# =============================================================================
+# ENTRY POINT
+# =============================================================================
+
+def answer_question(db: Session, question: str) -> ChatAnswer:
+    """Cached answer if the same intent was answered against unchanged data, else fast path or LLM"""
+    started = time.perf_counter()
+    intent = classify(question, get_entity_index(db))
+    if intent is None:
+        intent = Intent(OPEN_QUESTION, (("question", normalize_question(question)),))
+    key = intent.cache_key()
+
+    answer = answer_cache.get(key) if settings.CHAT_CACHE_ENABLED else None
+    if answer is not None:
+        answer = replace(answer, cached=True)
+    else:
+        def compute() -> ChatAnswer:
+            global_before = cache_service.versions.global_version()
+            fresh = _ask_llm(question) if intent.name == OPEN_QUESTION else execute_fast_path(db, intent)
+            if settings.CHAT_CACHE_ENABLED and fresh.intent != "llm_error":
+                answer_cache.put(key, fresh, global_before)
+            return fresh
+
+        # Everyone waiting on the same intent gets the leader's answer; each caller gets its own copy
+        answer = replace(answer_flight.do(key, compute) if settings.SINGLE_FLIGHT_ENABLED else compute())
+
+    answer.elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+    router_stats.record(answer)
+    return answer
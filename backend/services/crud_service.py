@@ -9,192 +9,219 @@ parent_dir = os.path.dirname(current_dir)
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
 
-from models.user_models import Batch, Employee, Batch, Batch, Product, Department, BatchTracking
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, desc
+from models.user_models import (
+    Batch, Employee, Product, Department, BatchTracking, BatchCurrentState, BatchStatus, current_state_upsert,
+    latest_tracking_source
+)
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import and_
+from services.statistics_service import get_batch_rollup
+from services import cache_service
+from services import search_service
+from services.pagination import Page, paginate, clamp_page_size, encode_cursor, decode_cursor
+from services import tracking_partition_service
+from services import loader_profiles
+from services import statements
+from services import expiry_service
+from services import fuzzy_index
+from services.bulk_lookup import BulkLookup, fetch_by_keys
 from models import *
-from typing import List, Optional
-from datetime import date
+from typing import Iterable, List, Optional
+from datetime import date, timezone
+from decimal import Decimal
+import uuid
 
 
 # =============================================================================
 # BATCH OPERATIONS
 # =============================================================================
 
-def get_batch_by_code(db: Session, batch_code: str) -> Optional[Batch]:
+def get_batch_by_code(db: Session, batch_code: str, profile: str = loader_profiles.DETAIL) -> Optional[Batch]:
     """
     Get a batch by its batch code
-    Returns the batch with all related data loaded
+    The loader profile decides which related data is loaded (see services/loader_profiles.py)
     """
-    return db.query(Batch).options(
-        joinedload(Batch.product),
-        joinedload(Batch.creator).joinedload(Employee.department),
-        joinedload(Batch.tracking_records).joinedload(Batch.handler)
-    ).filter(Batch.batch_code == batch_code).first()
+    return db.execute(statements.batch_by_code(profile), {"batch_code": batch_code}).scalars().first()
 
 
-def get_batch_by_id(db: Session, batch_id: int) -> Optional[Batch]:
+def get_batch_by_id(db: Session, batch_id: int, profile: str = loader_profiles.DETAIL) -> Optional[Batch]:
     """Get a batch by its ID"""
-    return db.query(Batch).options(
-        joinedload(Batch.product),
-        joinedload(Batch.creator),
-        joinedload(Batch.tracking_records)
-    ).filter(Batch.id == batch_id).first()
-
-
-def get_batches_by_status(db: Session, status: Batch) -> List[Batch]:
-    # Subquery to get the latest tracking record for each batch
-    latest_tracking = db.query(
-        Batch.batch_id,
-        Batch.status
-    ).distinct(Batch.batch_id).order_by(
-        Batch.batch_id,
-        desc(Batch.timestamp)
-    ).subquery()
-
-    return db.query(Batch).join(
-        latest_tracking,
-        Batch.id == latest_tracking.c.batch_id
-    ).filter(
-        latest_tracking.c.status == status
-    ).options(
-        joinedload(Batch.product),
-        joinedload(Batch.tracking_records)
-    ).all()
-
-
-def get_batches_by_product(db: Session, product_name: str) -> List[Batch]:
-    """Get all batches for a specific product"""
-    return db.query(Batch).join(Product).filter(
-        Product.name.ilike(f"%{product_name}%")
-    ).options(
-        joinedload(Batch.product),
-        joinedload(Batch.tracking_records)
-    ).all()
+    return db.execute(statements.batch_by_id(profile), {"batch_id": batch_id}).scalars().first()
 
 
-def search_batches(db: Session, search_term: str) -> List[Batch]:
+def get_batches_by_codes(db: Session, batch_codes: Iterable[str],
+                         profile: str = loader_profiles.SUMMARY) -> BulkLookup:
     """
-    Search batches by batch code, product name, or location
+    Get many batches by code in one IN query per 1000 codes (instead of get_batch_by_code in a loop)
+    Items keep the order of `batch_codes`; codes with no batch are listed in `missing`
     """
-    return db.query(Batch).join(Product).join(Batch).filter(
-        or_(
-            Batch.batch_code.ilike(f"%{search_term}%"),
-            Product.name.ilike(f"%{search_term}%"),
-            Batch.location.ilike(f"%{search_term}%")
-        )
-    ).options(
-        joinedload(Batch.product),
-        joinedload(Batch.tracking_records)
-    ).distinct().all()
+    query = db.query(Batch).options(*loader_profiles.batch_options(profile))
+    return fetch_by_keys(query, Batch.batch_code, batch_codes, key_of=lambda batch: batch.batch_code)
 
 
-# =============================================================================
-# BATCH TRACKING OPERATIONS
-# =============================================================================
-
-def get_batch_by_code(db: Session, batch_code: str) -> Optional[Batch]:
+def get_batches_by_status(db: Session, status: BatchStatus,
+                          limit: Optional[int] = None, cursor: Optional[str] = None,
+                          profile: str = loader_profiles.SUMMARY) -> Page:
     """
-    Get a batch by its batch code
-    Returns the batch with all related data loaded
+    Get one page of batches with a specific current status, ordered by batch ID
+    Reads the batch_current_state projection instead of scanning batch_tracking
     """
-    return db.query(Batch).options(
-        joinedload(Batch.product),
-        joinedload(Batch.creator).joinedload(Employee.department),
-        joinedload(Batch.tracking_records).joinedload(BatchTracking.handler)
-    ).filter(Batch.batch_code == batch_code).first()
+    query = db.query(Batch).join(
+        BatchCurrentState,
+        Batch.id == BatchCurrentState.batch_id
+    ).filter(
+        BatchCurrentState.status == status
+    ).options(*loader_profiles.batch_options(profile))
+    return paginate(query, [Batch.id], limit=limit, cursor=cursor)
+
+
+def get_batches_by_location(db: Session, location: str,
+                            limit: Optional[int] = None, cursor: Optional[str] = None,
+                            profile: str = loader_profiles.SUMMARY) -> Page:
+    """Get one page of batches currently at a specific location, ordered by batch ID"""
+    query = db.query(Batch).join(
+        BatchCurrentState,
+        Batch.id == BatchCurrentState.batch_id
+    ).filter(
+        BatchCurrentState.location == location
+    ).options(*loader_profiles.batch_options(profile))
+    return paginate(query, [Batch.id], limit=limit, cursor=cursor)
 
 
-def get_batch_by_id(db: Session, batch_id: int) -> Optional[Batch]:
-    """Get a batch by its ID"""
-    return db.query(Batch).options(
-        joinedload(Batch.product),
-        joinedload(Batch.creator),
-        joinedload(Batch.tracking_records)).filter(Batch.id == batch_id).first()
+def get_batches_by_product(db: Session, product_name: str,
+                           limit: Optional[int] = None, cursor: Optional[str] = None,
+                           profile: str = loader_profiles.SUMMARY) -> Page:
+    """Get one page of batches for a specific product, ordered by batch ID"""
+    query = db.query(Batch).join(Product).filter(
+        Product.name.ilike(f"%{product_name}%")
+    ).options(*loader_profiles.batch_options(profile))
+    return paginate(query, [Batch.id], limit=limit, cursor=cursor)
 
 
-def get_batches_by_status(db: Session, status: Batch) -> List[Batch]:
+def search_batches(db: Session, search_term: str, limit: int = search_service.DEFAULT_PAGE_SIZE,
+                   cursor: Optional[str] = None) -> search_service.SearchPage:
     """
-    Get all batches with a specific current status
+    Search batches by batch code, product name, or location
+    Returns a ranked page of lightweight hits (see services/search_service.py)
     """
-    # Subquery to get the latest tracking record for each batch
-    latest_tracking = db.query(
-        Batch.batch_id,
-        Batch.status
-    ).distinct(Batch.batch_id).order_by(
-        Batch.batch_id,
-        desc(Batch.timestamp)
-    ).subquery()
-
-    return db.query(Batch).join(
-        latest_tracking,
-        Batch.id == latest_tracking.c.batch_id
-    ).filter(
-        latest_tracking.c.status == status
-    ).options(
-        joinedload(Batch.product),
-        joinedload(Batch.tracking_records)
-    ).all()
+    return search_service.search_batches(db, search_term, limit=limit, cursor=cursor)
 
 
-def get_batches_by_product(db: Session, product_name: str) -> List[Batch]:
-    """Get all batches for a specific product"""
-    return db.query(Batch).join(Product).filter(
-        Product.name.ilike(f"%{product_name}%")
-    ).options(
-        joinedload(Batch.product),
-        joinedload(Batch.tracking_records)
-    ).all()
-
-
-def search_batches(db: Session, search_term: str) -> List[Batch]:
+def suggest_similar(db: Session, kind: str, text: str, limit: int = 5) -> List[fuzzy_index.Suggestion]:
     """
-    Search batches by batch code, product name, or location
+    "Did you mean" candidates for a misspelled batch code, product name or employee name
+    kind is "batch", "product" or "employee"; answered from the in-memory index (services/fuzzy_index.py)
     """
-    return db.query(Batch).join(Product).join(Batch).filter(
-        or_(
-            Batch.batch_code.ilike(f"%{search_term}%"),
-            Product.name.ilike(f"%{search_term}%"),
-            Batch.location.ilike(f"%{search_term}%")
-        )
-    ).options(
-        joinedload(Batch.product),
-        joinedload(Batch.tracking_records)
-    ).distinct().all()
+    return fuzzy_index.suggest(db, kind, text, limit=limit)
 
 
 # =============================================================================
 # BATCH TRACKING OPERATIONS
 # =============================================================================
 
-def get_batch_tracking_history(db: Session, batch_code: str) -> List[Batch]:
+def get_batch_tracking_history(db: Session, batch_code: str,
+                               limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
     """
-    Get complete tracking history for a batch
-    Ordered by timestamp (oldest first)
+    Get one page of the tracking history for a batch
+    Ordered by timestamp (oldest first), ties broken by record ID
+    Months that were archived out of batch_tracking are read back from their archive files
     """
-    return db.query(Batch).join(Batch).filter(
+    query = db.query(BatchTracking).join(
+        Batch,
+        Batch.id == BatchTracking.batch_id
+    ).filter(
         Batch.batch_code == batch_code
-    ).options(
-        joinedload(Batch.handler).joinedload(Employee.department)
-    ).order_by(Batch.timestamp).all()
+    ).options(*loader_profiles.tracking_options(loader_profiles.HISTORY))
+    order_by = [BatchTracking.timestamp, BatchTracking.id]
+
+    limit = clamp_page_size(limit)
+    # one archived row beyond the page tells whether more follow when the live page is empty
+    archived = tracking_partition_service.archived_tracking_records(db, batch_code, after=decode_cursor(cursor),
+                                                                    limit=limit + 1)
+    if not archived:
+        return paginate(query, order_by, limit=limit, cursor=cursor)
+
+    # Merge the archived rows with one page of live rows, then cut back to the page size
+    def sort_key(record):
+        timestamp = record.timestamp
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return timestamp, record.id
+
+    live = paginate(query, order_by, limit=limit, cursor=cursor)
+
+    merged = sorted(archived + live.items, key=sort_key)
+    items = merged[:limit]
+    has_more = live.has_more or len(merged) > limit
+    return Page(items=items, next_cursor=encode_cursor((items[-1].timestamp, items[-1].id)) if has_more else None)
+
+
+def get_batch_current_state(db: Session, batch_code: str) -> Optional[BatchCurrentState]:
+    """Get the current status, location, last handler and last timestamp of a batch"""
+    return db.query(BatchCurrentState).join(
+        Batch,
+        Batch.id == BatchCurrentState.batch_id
+    ).filter(Batch.batch_code == batch_code).first()
 
 
 def get_current_batch_location(db: Session, batch_code: str) -> Optional[str]:
-    """Get the current location of a batch"""
-    latest_record = db.query(Batch).join(Batch).filter(
-        Batch.batch_code == batch_code
-    ).order_by(desc(Batch.timestamp)).first()
+    """Get the current location of a batch (read through the lookup cache, see services/cache_service.py)"""
+    record = cache_service.get_batch_record(db, batch_code)
+    return record["current_location"] if record else None
 
-    return latest_record.location if latest_record else None
 
+def get_batch_current_status(db: Session, batch_code: str) -> Optional[BatchStatus]:
+    """Get the current status of a batch (read through the lookup cache)"""
+    record = cache_service.get_batch_record(db, batch_code)
+    return BatchStatus(record["current_status"]) if record and record["current_status"] else None
+
+
+def rebuild_batch_current_state(db: Session) -> None:
+    """
+    Recompute batch_current_state from the full batch_tracking history
+    Only needed for backfills; normal writes keep the projection up to date
+    """
+    source = latest_tracking_source()
+    expiry_service.mark_source_changed(db)
+    db.execute(current_state_upsert(db.get_bind().dialect.name, source))
+    db.commit()
+    cache_service.invalidate_all()  # the backfill may have changed any batch's cached state
 
-def get_batch_current_status(db: Session, batch_code: str) -> Optional[Batch]:
-    """Get the current status of a batch"""
-    latest_record = db.query(Batch).join(Batch).filter(
-        Batch.batch_code == batch_code
-    ).order_by(desc(Batch.timestamp)).first()
 
-    return latest_record.status if latest_record else None
+# =============================================================================
+# CACHED RECORDS AS MODELS
+# =============================================================================
+# The by-ID lookups below read cache_service records and hand them back as detached model objects
+# (never added to the session): only their columns, and an employee's department, are populated
+
+def _department_from_record(record: Optional[dict]) -> Optional[Department]:
+    if record is None:
+        return None
+    return Department(id=uuid.UUID(record["id"]), name=record["name"],
+                      head_id=uuid.UUID(record["head_id"]) if record["head_id"] else None)
+
+
+def _employee_from_record(record: Optional[dict]) -> Optional[Employee]:
+    if record is None:
+        return None
+    employee = Employee(
+        id=uuid.UUID(record["id"]),
+        name=record["name"],
+        email=record["email"],
+        designation=record["designation"],
+        department_id=uuid.UUID(record["department_id"]),
+        date_joined=date.fromisoformat(record["date_joined"]) if record["date_joined"] else None
+    )
+    set_committed_value(employee, "department", _department_from_record(record["department"]))
+    return employee
+
+
+def _product_from_record(record: Optional[dict]) -> Optional[Product]:
+    if record is None:
+        return None
+    return Product(id=record["id"], name=record["name"], category=record["category"],
+                   unit_price=Decimal(record["unit_price"]))
 
 
 # =============================================================================
@@ -202,31 +229,45 @@ def get_batch_current_status(db: Session, batch_code: str) -> Optional[Batch]:
 # =============================================================================
 
 def get_employee_by_id(db: Session, employee_id: str) -> Optional[Employee]:
-    """Get employee by ID"""
-    return db.query(Employee).options(
-        joinedload(Employee.department)
-    ).filter(Employee.id == employee_id).first()
+    """Get employee by ID, with its department (read through the lookup cache)"""
+    return _employee_from_record(cache_service.get_employee_by_id(db, employee_id))
+
+
+def get_employees_by_ids(db: Session, employee_ids: Iterable[str]) -> BulkLookup:
+    """Get many employees by ID in input order; malformed or unknown IDs are listed in `missing`"""
+    query = db.query(Employee).options(*loader_profiles.employee_options())
+    return fetch_by_keys(query, Employee.id, employee_ids, key_of=lambda employee: employee.id,
+                         normalize=lambda value: value if isinstance(value, uuid.UUID) else uuid.UUID(str(value)))
 
 
 def get_employee_by_email(db: Session, email: str) -> Optional[Employee]:
     """Get employee by email"""
-    return db.query(Employee).options(
-        joinedload(Employee.department)
-    ).filter(Employee.email == email).first()
+    return db.execute(statements.employee_by_email(), {"email": email}).scalars().first()
 
 
-def get_employees_by_department(db: Session, department_name: str) -> List[Employee]:
-    """Get all employees in a department"""
-    return db.query(Employee).join(Department).filter(
+def get_employees_by_department(db: Session, department_name: str, limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+    """Get one page of employees in a department, ordered by name"""
+    query = db.query(Employee).join(
+        Department,
+        Department.id == Employee.department_id
+    ).filter(
         Department.name.ilike(f"%{department_name}%")
-    ).options(joinedload(Employee.department)).all()
-
-
-def get_batch_handlers(db: Session, batch_code: str) -> List[Employee]:
-    """Get all employees who have handled a specific batch"""
-    return db.query(Employee).join(Batch).join(Batch).filter(
+    ).options(*loader_profiles.employee_options())
+    return paginate(query, [Employee.name, Employee.id], limit=limit, cursor=cursor)
+
+
+def get_batch_handlers(db: Session, batch_code: str, limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+    """Get one page of employees who have handled a specific batch, ordered by name"""
+    query = db.query(Employee).join(
+        BatchTracking,
+        BatchTracking.handled_by == Employee.id
+    ).join(
+        Batch,
+        Batch.id == BatchTracking.batch_id
+    ).filter(
         Batch.batch_code == batch_code
-    ).options(joinedload(Employee.department)).distinct().all()
+    ).options(*loader_profiles.employee_options()).distinct()
+    return paginate(query, [Employee.name, Employee.id], limit=limit, cursor=cursor)
 
 
 # =============================================================================
@@ -234,25 +275,30 @@ def get_batch_handlers(db: Session, batch_code: str) -> List[Employee]:
 # =============================================================================
 
 def get_product_by_id(db: Session, product_id: int) -> Optional[Product]:
-    """Get product by ID"""
-    return db.query(Product).filter(Product.id == product_id).first()
+    """Get product by ID (read through the lookup cache)"""
+    return _product_from_record(cache_service.get_product_by_id(db, product_id))
+
+
+def get_products_by_ids(db: Session, product_ids: Iterable[int]) -> BulkLookup:
+    """Get many products by ID in input order; unknown IDs are listed in `missing`"""
+    return fetch_by_keys(db.query(Product), Product.id, product_ids, key_of=lambda product: product.id, normalize=int)
 
 
-def get_products_by_category(db: Session, category: str) -> List[Product]:
-    """Get all products in a category"""
-    return db.query(Product).filter(
+def get_products_by_category(db: Session, category: str, limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+    """Get one page of products in a category, ordered by name"""
+    query = db.query(Product).filter(
         Product.category.ilike(f"%{category}%")
-    ).all()
+    )
+    return paginate(query, [Product.name, Product.id], limit=limit, cursor=cursor)
 
 
-def search_products(db: Session, search_term: str) -> List[Product]:
-    """Search products by name or category"""
-    return db.query(Product).filter(
-        or_(
-            Product.name.ilike(f"%{search_term}%"),
-            Product.category.ilike(f"%{search_term}%")
-        )
-    ).all()
+def search_products(db: Session, search_term: str, limit: int = search_service.DEFAULT_PAGE_SIZE,
+                    cursor: Optional[str] = None) -> search_service.SearchPage:
+    """
+    Search products by name or category
+    Returns a ranked page of lightweight hits (see services/search_service.py)
+    """
+    return search_service.search_products(db, search_term, limit=limit, cursor=cursor)
 
 
 # =============================================================================
@@ -260,17 +306,14 @@ def search_products(db: Session, search_term: str) -> List[Product]:
 # =============================================================================
 
 def get_department_by_id(db: Session, dept_id: str) -> Optional[Department]:
-    """Get department by ID"""
-    return db.query(Department).options(
-        joinedload(Department.employees),
-        joinedload(Department.head)
-    ).filter(Department.id == dept_id).first()
+    """Get department by ID (read through the lookup cache); use get_department_by_name for its employees"""
+    return _department_from_record(cache_service.get_department_by_id(db, dept_id))
 
 
 def get_department_by_name(db: Session, name: str) -> Optional[Department]:
     """Get department by name"""
     return db.query(Department).options(
-        joinedload(Department.employees)
+        *loader_profiles.department_options(loader_profiles.DETAIL)
     ).filter(Department.name.ilike(f"%{name}%")).first()
 
 
@@ -278,30 +321,66 @@ def get_department_by_name(db: Session, name: str) -> Optional[Department]:
 # ANALYTICS & REPORTING FUNCTIONS
 # =============================================================================
 
-def get_batch_statistics(db: Session) -> dict:
-    """Get overall batch statistics"""
-    total_batches = db.query(Batch).count()
-
-    # Count by status
-    manufactured = len(get_batches_by_status(db, Batch.MANUFACTURED))
-    in_transit = len(get_batches_by_status(db, Batch.IN_TRANSIT))
-    delivered = len(get_batches_by_status(db, Batch.DELIVERED))
+def get_batch_statistics(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    product_ids: Optional[List[int]] = None
+) -> dict:
+    """
+    Get overall batch statistics
+    Status counts come from the same single-query rollup as the per-product,
+    per-category and per-location breakdowns (see statistics_service)
+    """
+    rollup = get_batch_rollup(db, start_date=start_date, end_date=end_date, product_ids=product_ids)
+    by_status = rollup["by_status"]
 
     return {
-        "total_batches": total_batches,
-        "manufactured": manufactured,
-        "in_transit": in_transit,
-        "delivered": delivered
+        "total_batches": rollup["total_batches"],
+        "manufactured": by_status[BatchStatus.MANUFACTURED.value]["batches"],
+        "in_transit": by_status[BatchStatus.IN_TRANSIT.value]["batches"],
+        "delivered": by_status[BatchStatus.DELIVERED.value]["batches"],
+        **rollup
     }
 
 
-def get_batches_by_date_range(db: Session, start_date: date, end_date: date) -> List[Batch]:
-    return db.query(Batch).filter(
+def get_batches_by_date_range(db: Session, start_date: date, end_date: date,
+                              limit: Optional[int] = None, cursor: Optional[str] = None,
+                              profile: str = loader_profiles.SUMMARY) -> Page:
+    """Get one page of batches manufactured within a date range, oldest first"""
+    query = db.query(Batch).filter(
         and_(
             Batch.manufactured_date >= start_date,
             Batch.manufactured_date <= end_date
         )
-    ).options(
-        joinedload(Batch.product),
-        joinedload(Batch.tracking_records)
-    ).all()
+    ).options(*loader_profiles.batch_options(profile))
+    return paginate(query, [Batch.manufactured_date, Batch.id], limit=limit, cursor=cursor)
+
+
+def get_expiring_batches(db: Session, within_days: int = 30, include_delivered: bool = False,
+                         location: Optional[str] = None, limit: Optional[int] = None,
+                         cursor: Optional[str] = None) -> Page:
+    """
+    Get one page of batches expiring within the next `within_days` days, soonest first
+    Not-yet-delivered only by default (see services/expiry_service.py)
+    """
+    return expiry_service.get_expiring_batches(db, within_days, include_delivered=include_delivered,
+                                               location=location, limit=limit, cursor=cursor)
+
+
+def get_expiry_risk_summary(db: Session, include_delivered: bool = False) -> expiry_service.ExpiryRiskSummary:
+    """Precomputed batch counts and quantities per expiry bucket and current location"""
+    return expiry_service.get_expiry_risk_summary(db, include_delivered=include_delivered)
+
+
+def get_batch_state_snapshot(db: Session, status=None, location=None, product_id=None,
+                             expiry_from: Optional[date] = None, expiry_to: Optional[date] = None,
+                             limit: int = 100):
+    """
+    Dashboard view of every live batch: totals per status and location plus the soonest-expiring matches
+    Answered from the in-memory columnar snapshot (see services/batch_snapshot.py)
+    """
+    from services import batch_snapshot  # numpy stays out of cold start until a dashboard asks
+
+    return batch_snapshot.query_batch_snapshot(db, status=status, location=location, product_id=product_id,
+                                               expiry_from=expiry_from, expiry_to=expiry_to, limit=limit)
@@ -0,0 +1,283 @@
+"""
+Expiry risk: which batches expire soon, where they are now, and bucketed totals
+Listing is a range scan on ix_batches_expiry_date joined to batch_current_state by primary key.
+Bucket totals are precomputed into expiry_risk_buckets and rebuilt only when the day changes
+or batches / tracking events are written, so dashboard reads are a small table scan. A refresh
+records the highest batch and tracking IDs it saw, so inserts mark the buckets stale without
+writing anything shared. Updates and deletes, which leave those IDs alone, bump
+expiry_risk_state.version instead. Refreshes run under a database lock, so concurrent workers
+rebuild one at a time.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import threading
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import List, Optional
+
+from sqlalchemy import event, select, func, case, literal, delete, insert, update, or_, Date
+from sqlalchemy.orm import Session
+
+from database.routing import pin_to_primary
+from models.user_models import (Batch, Product, BatchTracking, BatchCurrentState, BatchStatus,
+                                ExpiryRiskBucket, ExpiryRiskState)
+from services.pagination import Page, paginate
+
+
+EXPIRY_BUCKET_DAYS = (30, 60, 90)
+
+
+def _bucket_labels() -> List[str]:
+    labels, lower = ["expired"], 0
+    for days in EXPIRY_BUCKET_DAYS:
+        labels.append(f"{lower}-{days}d")
+        lower = days + 1
+    return labels + [f"{EXPIRY_BUCKET_DAYS[-1]}d+"]
+
+
+BUCKET_LABELS = _bucket_labels()  # expired, 0-30d, 31-60d, 61-90d, 90d+
+
+STATE_ID = 1                       # the single expiry_risk_state row
+REFRESH_LOCK_KEY = 0x45585052      # pg_advisory_xact_lock key held while rebuilding
+SOURCE_BUMPED = "expiry_source_bumped"
+
+_refresh_lock = threading.Lock()    # saves threads of one process a database lock wait each
+
+
+@dataclass
+class ExpiringBatch:
+    id: int
+    batch_code: str
+    product_name: str
+    quantity: int
+    expiry_date: date
+    days_left: int
+    status: Optional[str]
+    location: Optional[str]
+
+
+@dataclass
+class ExpiryBucket:
+    bucket: str
+    location: Optional[str]
+    status: Optional[str]
+    batches: int
+    quantity: int
+
+
+@dataclass
+class ExpiryRiskSummary:
+    as_of: date
+    buckets: List[ExpiryBucket]
+
+
+def _not_delivered():
+    # batches without any tracking yet have no current-state row
+    return or_(BatchCurrentState.status.is_(None), BatchCurrentState.status != BatchStatus.DELIVERED)
+
+
+# =============================================================================
+# EXPIRING SOON
+# =============================================================================
+
+def get_expiring_batches(
+    db: Session,
+    within_days: int = 30,
+    include_delivered: bool = False,
+    location: Optional[str] = None,
+    today: Optional[date] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> Page:
+    """
+    Get one page of batches expiring between today and today + within_days, soonest first
+    Delivered batches are left out unless include_delivered is set
+    """
+    today = today or date.today()
+    query = db.query(
+        Batch.id,
+        Batch.batch_code,
+        Product.name.label("product_name"),
+        Batch.quantity,
+        Batch.expiry_date,
+        BatchCurrentState.status,
+        BatchCurrentState.location
+    ).select_from(Batch).join(
+        Product, Product.id == Batch.product_id
+    ).outerjoin(
+        BatchCurrentState, BatchCurrentState.batch_id == Batch.id
+    ).filter(
+        Batch.expiry_date >= today,
+        Batch.expiry_date <= today + timedelta(days=within_days)
+    )
+    if not include_delivered:
+        query = query.filter(_not_delivered())
+    if location is not None:
+        query = query.filter(BatchCurrentState.location == location)
+
+    page = paginate(query, [Batch.expiry_date, Batch.id], limit=limit, cursor=cursor,
+                    key=lambda row: (row.expiry_date, row.id))
+    return Page(items=[
+        ExpiringBatch(
+            id=row.id,
+            batch_code=row.batch_code,
+            product_name=row.product_name,
+            quantity=row.quantity,
+            expiry_date=row.expiry_date,
+            days_left=(row.expiry_date - today).days,
+            status=row.status.value if row.status else None,
+            location=row.location
+        ) for row in page.items
+    ], next_cursor=page.next_cursor)
+
+
+# =============================================================================
+# PRECOMPUTED BUCKETS
+# =============================================================================
+
+def bucket_expression(today: date):
+    """CASE mapping Batch.expiry_date to a BUCKET_LABELS entry; compares against date literals only"""
+    whens = [(Batch.expiry_date < today, BUCKET_LABELS[0])]
+    for days, label in zip(EXPIRY_BUCKET_DAYS, BUCKET_LABELS[1:]):
+        whens.append((Batch.expiry_date <= today + timedelta(days=days), label))
+    return case(*whens, else_=BUCKET_LABELS[-1])
+
+
+def _watermarks() -> list:
+    # max() of a primary key is one index probe (one per partition for batch_tracking)
+    return [select(func.max(Batch.id)).scalar_subquery().label("batch_id"),
+            select(func.max(BatchTracking.id)).scalar_subquery().label("tracking_id")]
+
+
+def _state(db: Session):
+    """The state row and the current ID watermarks, in one round trip"""
+    return db.execute(select(
+        ExpiryRiskState.version, ExpiryRiskState.built_version, ExpiryRiskState.built_batch_id,
+        ExpiryRiskState.built_tracking_id, ExpiryRiskState.as_of, *_watermarks()
+    ).where(ExpiryRiskState.id == STATE_ID)).first()
+
+
+def _is_current(state, today: date) -> bool:
+    return (state is not None and state.as_of == today and state.built_version == state.version
+            and (state.built_batch_id, state.built_tracking_id) == (state.batch_id, state.tracking_id))
+
+
+def refresh_expiry_buckets(db: Session, today: Optional[date] = None, only_if_stale: bool = False) -> None:
+    """
+    Rebuild expiry_risk_buckets in one INSERT ... SELECT ... GROUP BY
+    Runs under a transaction-scoped lock (pg_advisory_xact_lock; SQLite already serializes writers).
+    With only_if_stale, a rebuild another worker finished while we waited for the lock is kept
+    """
+    today = today or date.today()
+    pin_to_primary(db)
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(REFRESH_LOCK_KEY)))
+    state = _state(db)
+    if only_if_stale and _is_current(state, today):
+        db.commit()
+        return
+    if state is None:
+        # tables made by create_all start without the row that migration 0005 inserts
+        db.execute(insert(ExpiryRiskState).values(id=STATE_ID, version=0))
+        state = _state(db)
+
+    per_batch = select(
+        bucket_expression(today).label("bucket"),
+        BatchCurrentState.location,
+        BatchCurrentState.status,
+        Batch.quantity
+    ).select_from(Batch).outerjoin(
+        BatchCurrentState, BatchCurrentState.batch_id == Batch.id
+    ).subquery()
+
+    summary = select(
+        literal(today, Date),
+        per_batch.c.bucket,
+        per_batch.c.location,
+        per_batch.c.status,
+        func.count(),
+        func.coalesce(func.sum(per_batch.c.quantity), 0)
+    ).group_by(per_batch.c.bucket, per_batch.c.location, per_batch.c.status)
+
+    db.execute(delete(ExpiryRiskBucket))
+    db.execute(insert(ExpiryRiskBucket).from_select(
+        ["as_of", "bucket", "location", "status", "batches", "quantity"],
+        summary
+    ))
+    # The version and IDs read above are committed; writes landing since then are in the rebuild
+    # too and only cost one extra refresh later. An ID handed out before that read but committed
+    # after it sits below the recorded maximum: the next insert or edit, or the next day, picks it up
+    db.execute(update(ExpiryRiskState).where(ExpiryRiskState.id == STATE_ID).values(
+        built_version=state.version, built_batch_id=state.batch_id, built_tracking_id=state.tracking_id,
+        as_of=today))
+    db.commit()
+
+
+def get_expiry_risk_summary(db: Session, today: Optional[date] = None,
+                            include_delivered: bool = False) -> ExpiryRiskSummary:
+    """Batch counts and quantities per expiry bucket, location and status, refreshed only when stale"""
+    today = today or date.today()
+    with _refresh_lock:
+        if not _is_current(_state(db), today):
+            refresh_expiry_buckets(db, today, only_if_stale=True)
+
+    query = db.query(ExpiryRiskBucket)
+    if not include_delivered:
+        query = query.filter(or_(ExpiryRiskBucket.status.is_(None),
+                                 ExpiryRiskBucket.status != BatchStatus.DELIVERED))
+    order = {label: i for i, label in enumerate(BUCKET_LABELS)}
+    rows = sorted(query.all(), key=lambda row: (order[row.bucket], row.location or "", row.status.value if row.status else ""))
+    return ExpiryRiskSummary(as_of=today, buckets=[
+        ExpiryBucket(
+            bucket=row.bucket,
+            location=row.location,
+            status=row.status.value if row.status else None,
+            batches=row.batches,
+            quantity=row.quantity
+        ) for row in rows
+    ])
+
+
+# =============================================================================
+# SOURCE VERSION
+# =============================================================================
+
+def mark_source_changed(db: Session) -> None:
+    """
+    Bump expiry_risk_state.version inside the current transaction, at most once per transaction
+    For writes that change bucket inputs without inserting rows: ORM updates and deletes (the
+    listener below) and Core backfills such as the current-state rebuild. Inserts, including bulk
+    ingestion, never call it; the new IDs already show the change
+    """
+    if db.info.get(SOURCE_BUMPED):
+        return
+    db.execute(update(ExpiryRiskState).where(ExpiryRiskState.id == STATE_ID).values(
+        version=ExpiryRiskState.version + 1))
+    db.info[SOURCE_BUMPED] = True
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_on_source_edits(session, flush_context, instances):
+    # before the flush, so every editor takes the version row before any batch rows; a new
+    # tracking row only changes its batch's collection, which is not an edit
+    edited = [obj for obj in session.dirty if session.is_modified(obj, include_collections=False)]
+    for obj in edited + list(session.deleted):
+        if isinstance(obj, (Batch, BatchTracking)):
+            mark_source_changed(session)
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_bump(session):
+    session.info.pop(SOURCE_BUMPED, None)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_rolled_back_bump(session, previous_transaction):
+    session.info.pop(SOURCE_BUMPED, None)  # a rolled-back savepoint takes its bump with it
@@ -0,0 +1,319 @@
+"""
+Streaming CSV / NDJSON export of tracking history and batch lists
+Rows come off a server-side cursor in yield_per-sized partitions and are encoded (and
+optionally gzipped) one partition at a time, so memory stays flat however long the export is.
+Tracking exports also read back the months archived out of batch_tracking, one month at a
+time, and emit each where it falls in the live stream.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import csv
+import io
+import json
+import uuid
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from enum import Enum
+from typing import AsyncIterator, Deque, Iterator, List, Optional, Sequence
+
+from sqlalchemy import select, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models.user_models import (
+    Batch, Product, Employee, Department, BatchTracking, BatchCurrentState, BatchStatus, TrackingArchive
+)
+from services import tracking_partition_service
+from services.bulk_lookup import fetch_by_keys
+from services.projections import BATCH_SUMMARY_COLUMNS
+
+
+DEFAULT_CHUNK_SIZE = 2000
+FORMATS = ("csv", "ndjson")
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+TRACKING_EXPORT_COLUMNS = (
+    BatchTracking.id,
+    Batch.batch_code,
+    Product.name.label("product_name"),
+    BatchTracking.timestamp,
+    BatchTracking.status,
+    BatchTracking.location,
+    Employee.name.label("handler_name"),
+    Department.name.label("handler_department"),
+    BatchTracking.notes,
+)
+
+
+# =============================================================================
+# QUERIES
+# =============================================================================
+
+def tracking_export_query(
+    product_id: Optional[int] = None,
+    batch_code: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> Select:
+    """Tracking events joined to batch, product and handler, oldest first; filters combine with AND"""
+    stmt = select(*TRACKING_EXPORT_COLUMNS).select_from(BatchTracking).join(
+        Batch, Batch.id == BatchTracking.batch_id
+    ).join(
+        Product, Product.id == Batch.product_id
+    ).join(
+        Employee, Employee.id == BatchTracking.handled_by
+    ).join(
+        Department, Department.id == Employee.department_id
+    )
+
+    if product_id is not None:
+        stmt = stmt.where(Batch.product_id == product_id)
+    if batch_code is not None:
+        stmt = stmt.where(Batch.batch_code == batch_code)
+    if start_date is not None:
+        stmt = stmt.where(BatchTracking.timestamp >= datetime.combine(start_date, time.min))
+    if end_date is not None:
+        stmt = stmt.where(BatchTracking.timestamp < datetime.combine(end_date + timedelta(days=1), time.min))
+    return stmt.order_by(BatchTracking.timestamp, BatchTracking.id)
+
+
+def batch_export_query(
+    status: Optional[BatchStatus] = None,
+    location: Optional[str] = None,
+    product_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> Select:
+    """Batch summary rows (same columns as list_batch_summaries) ordered by batch ID"""
+    stmt = select(*BATCH_SUMMARY_COLUMNS).select_from(Batch).join(
+        Product, Product.id == Batch.product_id
+    ).outerjoin(
+        BatchCurrentState, BatchCurrentState.batch_id == Batch.id
+    )
+
+    if status is not None:
+        stmt = stmt.where(BatchCurrentState.status == status)
+    if location is not None:
+        stmt = stmt.where(BatchCurrentState.location == location)
+    if product_id is not None:
+        stmt = stmt.where(Batch.product_id == product_id)
+    if start_date is not None:
+        stmt = stmt.where(Batch.manufactured_date >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(Batch.manufactured_date <= end_date)
+    return stmt.order_by(Batch.id)
+
+
+# =============================================================================
+# ARCHIVED MONTHS
+# =============================================================================
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+@dataclass
+class ArchivedTracking:
+    """
+    A tracking export's filters, applied to the months archived out of batch_tracking
+    Archival moves whole months, so an archived month never overlaps live rows: its rows
+    go out just before the first live row at or after the month's start
+    """
+    product_id: Optional[int] = None
+    batch_code: Optional[str] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+    def _bounds(self):
+        start = end = None
+        if self.start_date is not None:
+            start = datetime.combine(self.start_date, time.min, tzinfo=timezone.utc)
+        if self.end_date is not None:
+            end = datetime.combine(self.end_date + timedelta(days=1), time.min, tzinfo=timezone.utc)
+        return start, end
+
+    def archives(self, db: Session) -> List[TrackingArchive]:
+        start, end = self._bounds()
+        return tracking_partition_service.archives_overlapping(db, start, end, self.batch_code)
+
+    def rows(self, db: Session, archive: TrackingArchive) -> List[tuple]:
+        """One archived month as export rows (TRACKING_EXPORT_COLUMNS order), oldest first"""
+        if self.batch_code is not None:
+            batch_id = db.execute(select(Batch.id).where(Batch.batch_code == self.batch_code)).scalar()
+            raw = tracking_partition_service.read_archive(archive, batch_id) if batch_id is not None else []
+        else:
+            raw = tracking_partition_service.iter_archive(archive)
+
+        start, end = self._bounds()
+        records = []
+        for row in raw:
+            timestamp = _as_utc(datetime.fromisoformat(str(row["timestamp"])))
+            if (start is None or timestamp >= start) and (end is None or timestamp < end):
+                records.append((timestamp, row))
+        if not records:
+            return []
+
+        batches = fetch_by_keys(
+            db.query(Batch.id, Batch.batch_code, Batch.product_id, Product.name.label("product_name")).join(
+                Product, Product.id == Batch.product_id
+            ),
+            Batch.id, {int(row["batch_id"]) for _, row in records}, key_of=lambda found: found.id
+        ).items
+        handlers = fetch_by_keys(
+            db.query(Employee.id, Employee.name, Department.name.label("department")).join(
+                Department, Department.id == Employee.department_id
+            ),
+            Employee.id, {uuid.UUID(str(row["handled_by"])) for _, row in records}, key_of=lambda found: found.id
+        ).items
+        batches = {batch.id: batch for batch in batches}
+        handlers = {handler.id: handler for handler in handlers}
+
+        out = []
+        for timestamp, row in records:
+            batch = batches.get(int(row["batch_id"]))
+            handler = handlers.get(uuid.UUID(str(row["handled_by"])))
+            if batch is None or handler is None:
+                continue  # the live query's inner joins drop these too
+            if self.product_id is not None and batch.product_id != self.product_id:
+                continue
+            out.append((int(row["id"]), batch.batch_code, batch.product_name, timestamp,
+                        BatchStatus[row["status"]], row["location"], handler.name, handler.department,
+                        row["notes"] or None))
+        out.sort(key=lambda record: (record[3], record[0]))
+        return out
+
+
+def _due(pending: Deque[TrackingArchive], timestamp: datetime) -> List[TrackingArchive]:
+    """Pop the archived months that start at or before a live row's timestamp"""
+    due = []
+    while pending and _as_utc(timestamp) >= _as_utc(pending[0].range_start):
+        due.append(pending.popleft())
+    return due
+
+
+# =============================================================================
+# ENCODING
+# =============================================================================
+
+def _plain(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    return value
+
+
+class ExportEncoder:
+    """Turns row partitions into CSV or NDJSON bytes, gzipping on the fly when asked"""
+
+    def __init__(self, fmt: str, columns: Sequence[str], gzip: bool = False):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        self.fmt = fmt
+        self.columns = list(columns)
+        # wbits=31 writes a gzip header/trailer around the deflate stream
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+
+    def _out(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) if self._compressor else data
+
+    def header(self) -> bytes:
+        if self.fmt != "csv":
+            return b""
+        return self._out(self._csv_lines([self.columns]))
+
+    def encode(self, rows: List) -> bytes:
+        if self.fmt == "csv":
+            return self._out(self._csv_lines(
+                ["" if v is None else _plain(v) for v in row] for row in rows
+            ))
+        return self._out("".join(
+            json.dumps({column: _plain(v) for column, v in zip(self.columns, row)}) + "\n" for row in rows
+        ).encode("utf-8"))
+
+    def finish(self) -> bytes:
+        return self._compressor.flush() if self._compressor else b""
+
+    @staticmethod
+    def _csv_lines(rows) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+
+
+def column_names(stmt: Select) -> List[str]:
+    return [column.key for column in stmt.selected_columns]
+
+
+# =============================================================================
+# STREAMING
+# =============================================================================
+
+def export_rows(db: Session, stmt: Select, fmt: str = "csv", gzip: bool = False,
+                chunk_size: int = DEFAULT_CHUNK_SIZE, archived: Optional[ArchivedTracking] = None) -> Iterator[bytes]:
+    """Encoded export body, one chunk per yield_per partition (plus one per archived month)"""
+    encoder = ExportEncoder(fmt, column_names(stmt), gzip=gzip)
+    pending = deque(archived.archives(db)) if archived is not None else deque()
+    result = db.execute(stmt.execution_options(stream_results=True, yield_per=chunk_size))
+    header = encoder.header()
+    if header:
+        yield header
+    for rows in result.partitions():
+        if pending:
+            merged = []
+            for row in rows:
+                for archive in _due(pending, row.timestamp):
+                    merged.extend(archived.rows(db, archive))
+                merged.append(row)
+            rows = merged
+        data = encoder.encode(rows)
+        if data:  # gzip holds back small inputs; skip the empty writes
+            yield data
+    for archive in pending:  # months after the last live row
+        data = encoder.encode(archived.rows(db, archive))
+        if data:
+            yield data
+    tail = encoder.finish()
+    if tail:
+        yield tail
+
+
+async def aexport_rows(db: AsyncSession, stmt: Select, fmt: str = "csv", gzip: bool = False,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE,
+                       archived: Optional[ArchivedTracking] = None) -> AsyncIterator[bytes]:
+    """Async version of export_rows for StreamingResponse bodies"""
+    encoder = ExportEncoder(fmt, column_names(stmt), gzip=gzip)
+    pending = deque(await db.run_sync(archived.archives)) if archived is not None else deque()
+    result = await db.stream(stmt.execution_options(yield_per=chunk_size))
+    header = encoder.header()
+    if header:
+        yield header
+    async for rows in result.partitions():
+        if pending:
+            merged = []
+            for row in rows:
+                for archive in _due(pending, row.timestamp):
+                    merged.extend(await db.run_sync(archived.rows, archive))
+                merged.append(row)
+            rows = merged
+        data = encoder.encode(rows)
+        if data:
+            yield data
+    for archive in pending:
+        data = encoder.encode(await db.run_sync(archived.rows, archive))
+        if data:
+            yield data
+    tail = encoder.finish()
+    if tail:
+        yield tail
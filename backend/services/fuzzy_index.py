@@ -0,0 +1,302 @@
+"""
+Typo-tolerant "did you mean" index over batch codes, product names and employee names
+Each vocabulary is a character-trigram inverted index held in memory. A lookup reads the
+postings of the query's rarest trigrams only (any string within k edits shares at least one
+of any k*3+1 of them), then ranks that short candidate list by trigram similarity and edit
+distance. No database round trip per lookup: the index loads once per engine and is updated
+from committed inserts, with a periodic catch-up for rows written by other workers.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import heapq
+import logging
+import threading
+import time
+import weakref
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, select, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from database.database import SessionLocal
+from models.user_models import Batch, Product, Employee
+
+
+logger = logging.getLogger(__name__)
+
+BATCH = "batch"
+PRODUCT = "product"
+EMPLOYEE = "employee"
+KINDS = (BATCH, PRODUCT, EMPLOYEE)
+
+GRAM = 3
+MAX_EDITS = 2
+MAX_CANDIDATES = 50
+POSTINGS_BUDGET = 4_000
+MIN_SIMILARITY = 0.3
+CATCH_UP_SECONDS = 60
+
+
+@dataclass
+class Suggestion:
+    text: str
+    ref: str            # batch / product ID or employee UUID, as a string
+    similarity: float   # trigram Dice coefficient, 0..1
+    distance: int       # Levenshtein distance, case-insensitive
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text.lower()} "
+    return {padded[i:i + GRAM] for i in range(len(padded) - GRAM + 1)}
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance (two-row dynamic programming)"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        left = i
+        for j, char_b in enumerate(b, 1):
+            diagonal = previous[j - 1] + (char_a != char_b)
+            up = previous[j] + 1
+            left = left + 1
+            if up < left:
+                left = up
+            if diagonal < left:
+                left = diagonal
+            current.append(left)
+        previous = current
+    return previous[-1]
+
+
+# =============================================================================
+# TRIGRAM INDEX
+# =============================================================================
+
+class NGramIndex:
+    """Inverted trigram index over one vocabulary; postings are compact unsigned-int arrays"""
+
+    def __init__(self):
+        self.texts: List[Optional[str]] = []   # term id -> text, None once removed
+        self.refs: List[str] = []
+        self.by_ref: Dict[str, int] = {}
+        self.postings: Dict[str, array] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.by_ref)
+
+    def add(self, ref, text: str) -> None:
+        """Insert or replace the entry for ref"""
+        ref = str(ref)
+        with self._lock:
+            old = self.by_ref.get(ref)
+            if old is not None:
+                if self.texts[old] == text:
+                    return
+                self.texts[old] = None  # tombstone; postings are filtered at query time
+            term_id = len(self.texts)
+            self.texts.append(text)
+            self.refs.append(ref)
+            self.by_ref[ref] = term_id
+            for gram in trigrams(text):
+                postings = self.postings.get(gram)
+                if postings is None:
+                    postings = self.postings[gram] = array("I")
+                postings.append(term_id)
+
+    def remove(self, ref) -> None:
+        with self._lock:
+            term_id = self.by_ref.pop(str(ref), None)
+            if term_id is not None:
+                self.texts[term_id] = None
+
+    def search(self, query: str, limit: int = 5, min_similarity: float = MIN_SIMILARITY) -> List[Suggestion]:
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+        # Rarest grams first; k*GRAM+1 of them are enough to reach anything within k edits.
+        # Very common grams ("-20", "202") are skipped once the scan budget is spent.
+        ordered = sorted(query_grams, key=lambda gram: len(self.postings.get(gram, ())))
+        counts: Counter = Counter()
+        scanned = 0
+        for gram in ordered[:MAX_EDITS * GRAM + 1]:
+            postings = self.postings.get(gram, ())
+            if scanned and scanned + len(postings) > POSTINGS_BUDGET:
+                break
+            counts.update(postings)
+            scanned += len(postings)
+
+        scored = []
+        for term_id, _ in counts.most_common(MAX_CANDIDATES):
+            text = self.texts[term_id]
+            if text is None:
+                continue
+            grams = trigrams(text)
+            similarity = 2 * len(query_grams & grams) / (len(query_grams) + len(grams))
+            if similarity >= min_similarity:
+                scored.append((similarity, term_id, text))
+        scored = heapq.nlargest(limit, scored)  # edit distance only for what is returned
+
+        lowered = query.lower()
+        suggestions = [
+            Suggestion(text, self.refs[term_id], round(similarity, 4), edit_distance(lowered, text.lower()))
+            for similarity, term_id, text in scored
+        ]
+        suggestions.sort(key=lambda s: (-s.similarity, s.distance, s.text))
+        return suggestions[:limit]
+
+
+# =============================================================================
+# PER-DATABASE INDEX
+# =============================================================================
+
+class FuzzyIndex:
+    """The three vocabularies for one database, plus the high-water marks used for catch-up"""
+
+    def __init__(self):
+        self.indexes = {kind: NGramIndex() for kind in KINDS}
+        self.last_batch_id = 0
+        self.last_product_id = 0
+        self.employee_count = 0
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self, db: Session, chunk_size: int = 10_000) -> "FuzzyIndex":
+        """
+        Read every row newer than the high-water marks (everything on the first call)
+        Reads start INCREMENTAL_OVERLAP_IDS below each mark, so a row committed out of ID order
+        is still indexed; re-adding an unchanged entry is a no-op
+        """
+        overlap = settings.INCREMENTAL_OVERLAP_IDS
+        with self._lock:
+            batches = db.execute(
+                select(Batch.id, Batch.batch_code).where(Batch.id > max(self.last_batch_id - overlap, 0))
+                .order_by(Batch.id).execution_options(stream_results=True, yield_per=chunk_size)
+            )
+            for batch_id, code in batches:
+                self.indexes[BATCH].add(batch_id, code)
+                self.last_batch_id = max(self.last_batch_id, batch_id)
+
+            products = select(Product.id, Product.name).where(Product.id > max(self.last_product_id - overlap, 0))
+            for product_id, name in db.execute(products):
+                self.indexes[PRODUCT].add(product_id, name)
+                self.last_product_id = max(self.last_product_id, product_id)
+
+            employee_count = db.scalar(select(func.count()).select_from(Employee))
+            if employee_count != self.employee_count:  # UUID keys have no order, so reload the (small) table
+                for employee_id, name in db.execute(select(Employee.id, Employee.name)):
+                    self.indexes[EMPLOYEE].add(employee_id, name)
+                self.employee_count = employee_count
+            self.checked_at = time.monotonic()
+        return self
+
+    def catch_up(self, db: Session) -> "FuzzyIndex":
+        """Pick up rows committed by other workers, at most once per CATCH_UP_SECONDS"""
+        if time.monotonic() - self.checked_at > CATCH_UP_SECONDS:
+            self.load(db)
+        return self
+
+    def apply(self, changes: Iterable[Tuple[str, str, str, Optional[str]]]) -> None:
+        """Apply committed (action, kind, ref, text) changes from the session listener"""
+        for action, kind, ref, text in changes:
+            if action == "remove":
+                self.indexes[kind].remove(ref)
+            else:
+                self.indexes[kind].add(ref, text)
+
+    def suggest(self, kind: str, text: str, limit: int = 5) -> List[Suggestion]:
+        return self.indexes[kind].search(text, limit=limit)
+
+    def stats(self) -> dict:
+        return {kind: len(index) for kind, index in self.indexes.items()}
+
+
+_indexes: "weakref.WeakKeyDictionary[Engine, FuzzyIndex]" = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def get_fuzzy_index(db: Session) -> FuzzyIndex:
+    """The loaded index for the session's database (loaded on first use)"""
+    engine = db.get_bind()
+    with _indexes_lock:
+        index = _indexes.get(engine)
+        if index is None:
+            index = _indexes[engine] = FuzzyIndex()
+    if index.checked_at == 0.0:
+        return index.load(db)
+    return index.catch_up(db)
+
+
+def suggest(db: Session, kind: str, text: str, limit: int = 5) -> List[Suggestion]:
+    """Top-`limit` "did you mean" candidates for a batch code, product name or employee name"""
+    if kind not in KINDS:
+        raise ValueError(f"Unknown suggestion kind: {kind}")
+    return get_fuzzy_index(db).suggest(kind, text, limit=limit)
+
+
+def warm_fuzzy_index() -> None:
+    """Load the index for the application database (called from the app lifespan)"""
+    try:
+        with SessionLocal() as db:
+            counts = get_fuzzy_index(db).stats()
+        logger.info("Fuzzy index loaded: %s", counts)
+    except SQLAlchemyError as e:  # lookups load it lazily once the database is reachable
+        logger.warning("Fuzzy index not loaded at startup: %s", e)
+
+
+# =============================================================================
+# INCREMENTAL UPDATES
+# =============================================================================
+
+PENDING_CHANGES = "fuzzy_index_changes"
+
+
+def _changes_for(obj, action: str) -> Optional[Tuple[str, str, str, Optional[str]]]:
+    if isinstance(obj, Batch):
+        return action, BATCH, str(obj.id), obj.batch_code
+    if isinstance(obj, Product):
+        return action, PRODUCT, str(obj.id), obj.name
+    if isinstance(obj, Employee):
+        return action, EMPLOYEE, str(obj.id), obj.name
+    return None
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    pending = session.info.setdefault(PENDING_CHANGES, [])
+    for action, objects in (("add", session.new), ("add", session.dirty), ("remove", session.deleted)):
+        for obj in objects:
+            change = _changes_for(obj, action)
+            if change is not None:
+                pending.append(change)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session):
+    changes = session.info.pop(PENDING_CHANGES, None)
+    if not changes:
+        return
+    index = _indexes.get(session.get_bind())
+    if index is not None:
+        index.apply(changes)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_changes(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_CHANGES, None)
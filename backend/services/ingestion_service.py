@@ -0,0 +1,259 @@
+"""
+Bulk ingestion of batch tracking events from scanner feeds
+Accepts NDJSON or CSV, validates each row, resolves batch codes and handlers in bulk,
+and writes multi-row INSERTs chunk by chunk. batch_current_state is updated in the
+same transaction. Bad rows are reported individually and never abort the upload.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import csv
+import json
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from models.user_models import Batch, Employee, BatchTracking, BatchStatus, current_state_upsert, latest_tracking_source
+from sqlalchemy.orm import Session
+from sqlalchemy import select, insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import settings
+from database.routing import pin_to_primary
+from services import cache_service, realtime_service
+
+
+CSV_COLUMNS = ["batch_code", "location", "status", "handled_by", "timestamp", "notes"]
+
+# (row number in the upload, raw record or parse error)
+ParsedRow = Tuple[int, Optional[dict], Optional[str]]
+
+
+@dataclass
+class IngestReport:
+    received: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    rejects: List[dict] = field(default_factory=list)
+
+    def reject(self, row: int, error: str, batch_code: Optional[str] = None) -> None:
+        self.rejected += 1
+        if len(self.rejects) < settings.INGEST_MAX_REPORTED_REJECTS:
+            self.rejects.append({"row": row, "batch_code": batch_code, "error": error})
+
+    def as_dict(self) -> dict:
+        return {
+            "received": self.received,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "rejects": self.rejects,
+            "rejects_truncated": self.rejected > len(self.rejects),
+        }
+
+
+# =============================================================================
+# PARSING
+# =============================================================================
+
+def parse_ndjson(lines: Iterable[str], start_row: int = 1) -> Iterator[ParsedRow]:
+    """One JSON object per line; blank lines are skipped"""
+    for row, line in enumerate(lines, start=start_row):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row, None, f"invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield row, None, "expected a JSON object"
+            continue
+        yield row, record, None
+
+
+def parse_csv_header(line: str) -> List[str]:
+    header = [name.strip() for name in next(csv.reader([line]))]
+    unknown = set(header) - set(CSV_COLUMNS)
+    if unknown:
+        raise ValueError(f"unknown CSV columns: {sorted(unknown)}")
+    return header
+
+
+def parse_csv(lines: Iterable[str], header: Optional[List[str]] = None, start_row: int = 2) -> Iterator[ParsedRow]:
+    """
+    CSV rows, one per line (no embedded newlines); row numbers count the header as row 1
+    If `header` is not given, the first line is read as the header
+    """
+    lines = iter(lines)
+    if header is None:
+        first = next(lines, None)
+        if first is None:
+            return
+        header = parse_csv_header(first)
+
+    for row, line in enumerate(lines, start=start_row):
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+        if len(values) > len(header):
+            yield row, None, "too many columns"
+            continue
+        yield row, {key: value for key, value in zip(header, values) if value != ""}, None
+
+
+# =============================================================================
+# VALIDATION
+# =============================================================================
+
+def _parse_status(value) -> BatchStatus:
+    if isinstance(value, str):
+        for status in BatchStatus:
+            if value.strip().lower() in (status.value.lower(), status.name.lower()):
+                return status
+    raise ValueError(f"unknown status {value!r} (expected one of {[s.value for s in BatchStatus]})")
+
+
+def _parse_timestamp(value, received_at: datetime) -> datetime:
+    if value in (None, ""):
+        return received_at
+    timestamp = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+
+def _required_text(record: dict, key: str, max_length: int) -> str:
+    value = record.get(key)
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f"{key} is required")
+    value = value.strip()
+    if len(value) > max_length:
+        raise ValueError(f"{key} is longer than {max_length} characters")
+    return value
+
+
+def validate_event(record: dict, received_at: datetime) -> dict:
+    """Turn a raw record into batch_tracking column values (batch_code still unresolved)"""
+    notes = record.get("notes")
+    if notes is not None and len(str(notes)) > 500:
+        raise ValueError("notes is longer than 500 characters")
+    try:
+        handled_by = uuid.UUID(str(record.get("handled_by")))
+    except ValueError:
+        raise ValueError("handled_by must be an employee UUID")
+
+    return {
+        "batch_code": _required_text(record, "batch_code", 50),
+        "location": _required_text(record, "location", 200),
+        "status": _parse_status(record.get("status")),
+        "handled_by": handled_by,
+        "timestamp": _parse_timestamp(record.get("timestamp"), received_at),
+        "notes": str(notes) if notes is not None else None,
+    }
+
+
+# =============================================================================
+# WRITING
+# =============================================================================
+
+def _resolve_batch_ids(db: Session, codes: set) -> dict:
+    rows = db.execute(select(Batch.batch_code, Batch.id).where(Batch.batch_code.in_(codes)))
+    return {code: batch_id for code, batch_id in rows}
+
+
+def _existing_employee_ids(db: Session, ids: set) -> set:
+    return set(db.execute(select(Employee.id).where(Employee.id.in_(ids))).scalars())
+
+
+def _insert_rows(db: Session, values: List[dict]) -> List[int]:
+    """Multi-row INSERT ... RETURNING id, then refresh batch_current_state and publish the new rows"""
+    table = BatchTracking.__table__
+    ids = list(db.execute(insert(table).returning(table.c.id), values).scalars())
+    db.execute(current_state_upsert(db.get_bind().dialect.name, latest_tracking_source(table.c.id.in_(ids))))
+    cache_service.mark_batches_changed(db, batch_ids={row["batch_id"] for row in values})
+    realtime_service.notify_tracking_inserted(db, ids)
+    return ids
+
+
+def ingest_chunk(db: Session, rows: List[ParsedRow], report: IngestReport,
+                 received_at: Optional[datetime] = None) -> None:
+    """
+    Validate and write one chunk of parsed rows inside a savepoint
+    If the multi-row insert fails, the chunk is retried row by row so only the bad rows are rejected
+    """
+    received_at = received_at or datetime.now(timezone.utc)
+    valid = []
+    for row, record, error in rows:
+        report.received += 1
+        if error is not None:
+            report.reject(row, error)
+            continue
+        try:
+            valid.append((row, validate_event(record, received_at)))
+        except ValueError as e:
+            report.reject(row, str(e), record.get("batch_code"))
+
+    if not valid:
+        return
+
+    batch_ids = _resolve_batch_ids(db, {event["batch_code"] for _, event in valid})
+    employee_ids = _existing_employee_ids(db, {event["handled_by"] for _, event in valid})
+
+    pending = []
+    for row, event in valid:
+        code = event.pop("batch_code")
+        if code not in batch_ids:
+            report.reject(row, f"unknown batch code {code!r}", code)
+        elif event["handled_by"] not in employee_ids:
+            report.reject(row, f"unknown employee {event['handled_by']}", code)
+        else:
+            pending.append((row, code, dict(event, batch_id=batch_ids[code])))
+
+    if not pending:
+        return
+
+    try:
+        with db.begin_nested():
+            _insert_rows(db, [values for _, _, values in pending])
+        report.accepted += len(pending)
+    except SQLAlchemyError:
+        for row, code, values in pending:
+            try:
+                with db.begin_nested():
+                    _insert_rows(db, [values])
+                report.accepted += 1
+            except SQLAlchemyError as e:
+                report.reject(row, f"database error: {e.__class__.__name__}", code)
+
+
+def chunked(rows: Iterable[ParsedRow], chunk_size: int) -> Iterator[List[ParsedRow]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def ingest_tracking_events(db: Session, rows: Iterable[ParsedRow],
+                           chunk_size: Optional[int] = None) -> IngestReport:
+    """
+    Ingest parsed rows (from parse_ndjson / parse_csv) in chunks and commit once at the end
+    Events without a timestamp are stamped with the time the upload was received
+    """
+    pin_to_primary(db)  # batch codes created a moment ago may not have reached a replica yet
+    report = IngestReport()
+    received_at = datetime.now(timezone.utc)
+    for chunk in chunked(rows, chunk_size or settings.INGEST_CHUNK_SIZE):
+        ingest_chunk(db, chunk, report, received_at)
+    db.commit()
+    return report
@@ -0,0 +1,111 @@
+"""
+Named loader profiles for ORM queries
+Each profile says exactly which relationships are loaded and how:
+  - many-to-one / one-to-one  -> joinedload (no row multiplication)
+  - one-to-many collections   -> selectinload (one extra IN query, no cartesian rows)
+  - everything else           -> raiseload, so an accidental lazy load fails loudly
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from models.user_models import Batch, Employee, Department, BatchTracking
+from sqlalchemy.orm import joinedload, selectinload, raiseload
+
+
+SUMMARY = "summary"
+DETAIL = "detail"
+HISTORY = "history"
+
+
+def _batch_summary():
+    return [
+        joinedload(Batch.product).raiseload("*"),
+        joinedload(Batch.current_state).raiseload("*"),
+    ]
+
+
+def _handler_with_department():
+    return joinedload(BatchTracking.handler).options(
+        joinedload(Employee.department).raiseload("*"),
+        raiseload("*")
+    )
+
+
+def _batch_detail():
+    return _batch_summary() + [
+        joinedload(Batch.creator).options(
+            joinedload(Employee.department).raiseload("*"),
+            raiseload("*")
+        ),
+        selectinload(Batch.tracking_records).options(
+            joinedload(BatchTracking.handler).raiseload("*"),
+            raiseload("*")
+        ),
+    ]
+
+
+def _batch_history():
+    return _batch_summary() + [
+        selectinload(Batch.tracking_records).options(
+            _handler_with_department(),
+            raiseload("*")
+        ),
+    ]
+
+
+BATCH_PROFILES = {
+    SUMMARY: _batch_summary,
+    DETAIL: _batch_detail,
+    HISTORY: _batch_history,
+}
+
+EMPLOYEE_PROFILES = {
+    SUMMARY: lambda: [joinedload(Employee.department).raiseload("*")],
+    DETAIL: lambda: [joinedload(Employee.department).raiseload("*")],
+}
+
+TRACKING_PROFILES = {
+    SUMMARY: lambda: [],
+    HISTORY: lambda: [_handler_with_department()],
+}
+
+DEPARTMENT_PROFILES = {
+    SUMMARY: lambda: [joinedload(Department.head).raiseload("*")],
+    DETAIL: lambda: [
+        joinedload(Department.head).raiseload("*"),
+        selectinload(Department.employees).raiseload("*"),
+    ],
+}
+
+
+def _options(profiles: dict, profile: str, entity: str) -> list:
+    try:
+        build = profiles[profile]
+    except KeyError:
+        raise ValueError(f"Unknown {entity} loader profile '{profile}' (expected one of {sorted(profiles)})")
+    return build() + [raiseload("*")]
+
+
+def batch_options(profile: str = SUMMARY) -> list:
+    """Loader options for Batch queries"""
+    return _options(BATCH_PROFILES, profile, "batch")
+
+
+def employee_options(profile: str = SUMMARY) -> list:
+    """Loader options for Employee queries"""
+    return _options(EMPLOYEE_PROFILES, profile, "employee")
+
+
+def tracking_options(profile: str = SUMMARY) -> list:
+    """Loader options for BatchTracking queries"""
+    return _options(TRACKING_PROFILES, profile, "tracking")
+
+
+def department_options(profile: str = SUMMARY) -> list:
+    """Loader options for Department queries"""
+    return _options(DEPARTMENT_PROFILES, profile, "department")
@@ -0,0 +1,121 @@
+"""
+Keyset (cursor-based) pagination shared by every list-returning service function
+Pages are ordered by a fixed tuple of columns ending in a unique key, and the
+cursor is an opaque token holding the sort key of the last row returned.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import json
+import uuid
+import base64
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+from app.config import settings
+
+
+@dataclass
+class Page:
+    items: list = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+
+# =============================================================================
+# CURSOR TOKENS
+# =============================================================================
+
+def _dump_value(value: Any):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, uuid.UUID):
+        return {"u": str(value)}
+    if isinstance(value, Decimal):
+        return {"n": str(value)}
+    return value
+
+
+def _load_value(value: Any):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "u" in value:
+            return uuid.UUID(value["u"])
+        if "n" in value:
+            return Decimal(value["n"])
+    return value
+
+
+def encode_cursor(key: Sequence[Any]) -> str:
+    """Encode a sort key into an opaque, URL-safe cursor token"""
+    payload = json.dumps([_dump_value(value) for value in key], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[list]:
+    """Decode a cursor token back into its sort key; raises ValueError on garbage"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid pagination cursor")
+    if not isinstance(key, list):
+        raise ValueError("Invalid pagination cursor")
+    return [_load_value(value) for value in key]
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    """Apply the default and the configured maximum page size"""
+    if limit is None:
+        return settings.DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), settings.MAX_PAGE_SIZE))
+
+
+# =============================================================================
+# QUERY PAGINATION
+# =============================================================================
+
+def paginate(query: Query, order_by: Sequence, limit: Optional[int] = None,
+             cursor: Optional[str] = None, key=None) -> Page:
+    """
+    Return one page of `query` ordered ascending by the `order_by` columns
+    The last column must be unique (normally the primary key) so the order is stable.
+    `key` maps a result item to its sort-key tuple; by default the attribute
+    named after each column is read from the item.
+    """
+    limit = clamp_page_size(limit)
+    after = decode_cursor(cursor)
+    if after is not None:
+        if len(after) != len(order_by):
+            raise ValueError("Invalid pagination cursor")
+        query = query.filter(tuple_(*order_by) > tuple_(*after))
+
+    rows: List = query.order_by(*order_by).limit(limit + 1).all()
+    items = rows[:limit]
+    if len(rows) <= limit:
+        return Page(items=items)
+
+    if key is None:
+        names = [column.key for column in order_by]
+        key = lambda item: tuple(getattr(item, name) for name in names)
+    return Page(items=items, next_cursor=encode_cursor(key(items[-1])))
@@ -0,0 +1,244 @@
+"""
+Column-only projections for list views
+These queries select just the columns a list needs and return plain dataclasses,
+so there is no ORM identity-map or relationship hydration cost per row.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Optional
+
+from models.user_models import Batch, Product, Employee, Department, BatchTracking, BatchCurrentState, BatchStatus
+from sqlalchemy.orm import Session
+from services import tracking_partition_service
+from services.pagination import Page, paginate, clamp_page_size, encode_cursor, decode_cursor
+
+
+@dataclass
+class BatchSummary:
+    id: int
+    batch_code: str
+    product_id: int
+    product_name: str
+    category: str
+    quantity: int
+    manufactured_date: date
+    expiry_date: date
+    status: Optional[str]
+    location: Optional[str]
+
+
+@dataclass
+class TrackingEntry:
+    id: int
+    timestamp: Optional[datetime]
+    status: str
+    location: str
+    handler_name: str
+    handler_department: str
+    notes: Optional[str]
+
+
+@dataclass
+class EmployeeSummary:
+    id: str
+    name: str
+    email: str
+    designation: str
+    department: str
+
+
+@dataclass
+class ProductSummary:
+    id: int
+    name: str
+    category: str
+    unit_price: Decimal
+
+
+BATCH_SUMMARY_COLUMNS = (
+    Batch.id,
+    Batch.batch_code,
+    Product.id.label("product_id"),
+    Product.name.label("product_name"),
+    Product.category,
+    Batch.quantity,
+    Batch.manufactured_date,
+    Batch.expiry_date,
+    BatchCurrentState.status,
+    BatchCurrentState.location,
+)
+
+
+def _batch_summary(row) -> BatchSummary:
+    return BatchSummary(
+        id=row.id,
+        batch_code=row.batch_code,
+        product_id=row.product_id,
+        product_name=row.product_name,
+        category=row.category,
+        quantity=row.quantity,
+        manufactured_date=row.manufactured_date,
+        expiry_date=row.expiry_date,
+        status=row.status.value if row.status else None,
+        location=row.location
+    )
+
+
+def batch_summary_of(batch: Batch) -> BatchSummary:
+    """BatchSummary of a Batch loaded with the summary profile (product and current state joined)"""
+    state = batch.current_state
+    return BatchSummary(
+        id=batch.id,
+        batch_code=batch.batch_code,
+        product_id=batch.product_id,
+        product_name=batch.product.name,
+        category=batch.product.category,
+        quantity=batch.quantity,
+        manufactured_date=batch.manufactured_date,
+        expiry_date=batch.expiry_date,
+        status=state.status.value if state else None,
+        location=state.location if state else None
+    )
+
+
+def employee_summary_of(employee: Employee) -> EmployeeSummary:
+    """EmployeeSummary of an Employee loaded with its department"""
+    return EmployeeSummary(id=str(employee.id), name=employee.name, email=employee.email,
+                           designation=employee.designation, department=employee.department.name)
+
+
+def product_summary_of(product: Product) -> ProductSummary:
+    return ProductSummary(id=product.id, name=product.name, category=product.category, unit_price=product.unit_price)
+
+
+def _as(page: Page, convert) -> Page:
+    return Page(items=[convert(row) for row in page.items], next_cursor=page.next_cursor)
+
+
+def list_batch_summaries(
+    db: Session,
+    status: Optional[BatchStatus] = None,
+    location: Optional[str] = None,
+    product_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> Page:
+    """
+    Get one page of BatchSummary rows ordered by batch ID
+    All filters are optional and combined with AND
+    """
+    query = db.query(*BATCH_SUMMARY_COLUMNS).select_from(Batch).join(
+        Product, Product.id == Batch.product_id
+    ).outerjoin(
+        BatchCurrentState, BatchCurrentState.batch_id == Batch.id
+    )
+
+    if status is not None:
+        query = query.filter(BatchCurrentState.status == status)
+    if location is not None:
+        query = query.filter(BatchCurrentState.location == location)
+    if product_id is not None:
+        query = query.filter(Batch.product_id == product_id)
+    if start_date is not None:
+        query = query.filter(Batch.manufactured_date >= start_date)
+    if end_date is not None:
+        query = query.filter(Batch.manufactured_date <= end_date)
+
+    page = paginate(query, [Batch.id], limit=limit, cursor=cursor, key=lambda row: (row.id,))
+    return _as(page, _batch_summary)
+
+
+def list_tracking_entries(db: Session, batch_code: str, limit: Optional[int] = None,
+                          cursor: Optional[str] = None) -> Page:
+    """
+    Get one page of a batch's tracking history as TrackingEntry rows, oldest first
+    Months archived out of batch_tracking are merged back in, as in crud_service.get_batch_tracking_history
+    """
+    query = db.query(
+        BatchTracking.id,
+        BatchTracking.timestamp,
+        BatchTracking.status,
+        BatchTracking.location,
+        Employee.name.label("handler_name"),
+        Department.name.label("handler_department"),
+        BatchTracking.notes
+    ).select_from(BatchTracking).join(
+        Batch, Batch.id == BatchTracking.batch_id
+    ).join(
+        Employee, Employee.id == BatchTracking.handled_by
+    ).join(
+        Department, Department.id == Employee.department_id
+    ).filter(Batch.batch_code == batch_code)
+
+    limit = clamp_page_size(limit)
+    # one archived row beyond the page tells whether more follow when the live page is empty
+    archived = tracking_partition_service.archived_tracking_records(db, batch_code, after=decode_cursor(cursor),
+                                                                    limit=limit + 1)
+    page = _as(paginate(query, [BatchTracking.timestamp, BatchTracking.id], limit=limit, cursor=cursor,
+                        key=lambda row: (row.timestamp, row.id)), lambda row: TrackingEntry(
+        id=row.id,
+        timestamp=row.timestamp,
+        status=row.status.value,
+        location=row.location,
+        handler_name=row.handler_name,
+        handler_department=row.handler_department,
+        notes=row.notes
+    ))
+    if not archived:
+        return page
+
+    def sort_key(entry):
+        timestamp = entry.timestamp
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return timestamp, entry.id
+
+    merged = sorted(page.items + [TrackingEntry(
+        id=record.id,
+        timestamp=record.timestamp,
+        status=record.status.value,
+        location=record.location,
+        handler_name=record.handler.name if record.handler else None,
+        handler_department=record.handler.department.name if record.handler else None,
+        notes=record.notes
+    ) for record in archived], key=sort_key)
+    items = merged[:limit]
+    has_more = page.has_more or len(merged) > limit
+    return Page(items=items, next_cursor=encode_cursor((items[-1].timestamp, items[-1].id)) if has_more else None)
+
+
+def list_employee_summaries(db: Session, department_name: Optional[str] = None,
+                            limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+    """Get one page of EmployeeSummary rows ordered by name"""
+    query = db.query(
+        Employee.id,
+        Employee.name,
+        Employee.email,
+        Employee.designation,
+        Department.name.label("department")
+    ).select_from(Employee).join(
+        Department, Department.id == Employee.department_id
+    )
+    if department_name is not None:
+        query = query.filter(Department.name.ilike(f"%{department_name}%"))
+
+    page = paginate(query, [Employee.name, Employee.id], limit=limit, cursor=cursor,
+                    key=lambda row: (row.name, row.id))
+    return _as(page, lambda row: EmployeeSummary(
+        id=str(row.id),
+        name=row.name,
+        email=row.email,
+        designation=row.designation,
+        department=row.department
+    ))
@@ -0,0 +1,283 @@
+"""
+SQL instrumentation: per-request query counts, DB time, rows and slowest statement,
+N+1 suspects, and Prometheus-style histograms served at /metrics
+Hooks into engine cursor events, so every statement from any session is measured. The per
+statement cost is two perf_counter calls, a dict increment and a bisect, cheap enough to keep on.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import bisect
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+STATEMENT_PREVIEW_CHARS = 200
+
+
+# =============================================================================
+# METRIC TYPES
+# =============================================================================
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels, rendered in Prometheus text format"""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float], label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.label_names = label_names
+        self._series: Dict[Tuple[str, ...], List] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1  # the slot past the last bucket is +Inf
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[-1] if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            base = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels)]
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), series):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = ",".join(base + ['le="%s"' % le])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            suffix = f"{{{','.join(base)}}}" if base else ""
+            lines.append(f"{self.name}_sum{suffix} {series[-2]}")
+            lines.append(f"{self.name}_count{suffix} {series[-1]}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = dict(self._values)
+        for labels, value in sorted(snapshot.items()):
+            base = ",".join(f'{name}="{_escape(v)}"' for name, v in zip(self.label_names, labels))
+            lines.append(f"{self.name}{{{base}}} {value}" if base else f"{self.name} {value}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+STATEMENT_SECONDS = Histogram(
+    "db_statement_duration_seconds", "Duration of individual SQL statements",
+    (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+REQUEST_QUERIES = Histogram(
+    "db_request_queries", "SQL statements issued per HTTP request",
+    (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89), ("handler",)
+)
+REQUEST_DB_SECONDS = Histogram(
+    "db_request_duration_seconds", "Total SQL time per HTTP request",
+    (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0), ("handler",)
+)
+REQUEST_ROWS = Histogram(
+    "db_request_rows", "Rows reported by the driver per HTTP request",
+    (0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 50000), ("handler",)
+)
+N_PLUS_ONE_SUSPECTS = Counter(
+    "db_n_plus_one_suspects_total", "Requests that repeated one statement at least SQL_N_PLUS_ONE_THRESHOLD times",
+    ("handler",)
+)
+
+METRICS = (STATEMENT_SECONDS, REQUEST_QUERIES, REQUEST_DB_SECONDS, REQUEST_ROWS, N_PLUS_ONE_SUSPECTS)
+
+
+# =============================================================================
+# PER-REQUEST STATS
+# =============================================================================
+
+@dataclass
+class QueryStats:
+    """What one request (or any `track_queries` block) did against the database"""
+    query_count: int = 0
+    db_seconds: float = 0.0
+    rows: int = 0
+    slowest_seconds: float = 0.0
+    slowest_statement: Optional[str] = None
+    statement_counts: Dict[str, int] = field(default_factory=dict)
+
+    def n_plus_one_suspects(self, threshold: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Statements executed at least `threshold` times, most repeated first"""
+        threshold = threshold or settings.SQL_N_PLUS_ONE_THRESHOLD
+        repeated = [(sql, n) for sql, n in self.statement_counts.items() if n >= threshold]
+        return sorted(repeated, key=lambda item: -item[1])
+
+    def as_dict(self) -> dict:
+        return {
+            "query_count": self.query_count,
+            "db_ms": round(self.db_seconds * 1000, 3),
+            "rows": self.rows,
+            "slowest_ms": round(self.slowest_seconds * 1000, 3),
+            "slowest_statement": self.slowest_statement,
+            "n_plus_one_suspects": [
+                {"statement": sql[:STATEMENT_PREVIEW_CHARS], "count": n} for sql, n in self.n_plus_one_suspects()
+            ],
+        }
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+class track_queries:
+    """
+    Collect QueryStats for the statements run inside the block
+    `with track_queries() as stats: ...`; nests by shadowing the outer block
+    """
+
+    def __enter__(self) -> QueryStats:
+        self.stats = QueryStats()
+        self._token = _current_stats.set(self.stats)
+        return self.stats
+
+    def __exit__(self, *exc):
+        _current_stats.reset(self._token)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+# =============================================================================
+# ENGINE HOOKS
+# =============================================================================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    STATEMENT_SECONDS.observe(elapsed)
+
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    stats.query_count += 1
+    stats.db_seconds += elapsed
+    rowcount = getattr(cursor, "rowcount", -1)
+    if rowcount and rowcount > 0:  # -1 when the driver doesn't know (e.g. SQLite SELECTs)
+        stats.rows += rowcount
+    stats.statement_counts[statement] = stats.statement_counts.get(statement, 0) + 1
+    if elapsed > stats.slowest_seconds:
+        stats.slowest_seconds = elapsed
+        stats.slowest_statement = statement[:STATEMENT_PREVIEW_CHARS]
+
+
+def instrument_engine(engine: Engine) -> Engine:
+    """Attach the timing hooks (idempotent); pass `async_engine.sync_engine` for async engines"""
+    if settings.SQL_METRICS_ENABLED and not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    return engine
+
+
+# =============================================================================
+# ASGI MIDDLEWARE AND EXPORT
+# =============================================================================
+
+def record_request(handler: str, stats: QueryStats) -> None:
+    """Feed one request's stats into the histograms and warn about N+1 suspects"""
+    REQUEST_QUERIES.observe(stats.query_count, handler)
+    REQUEST_DB_SECONDS.observe(stats.db_seconds, handler)
+    REQUEST_ROWS.observe(stats.rows, handler)
+    suspects = stats.n_plus_one_suspects()
+    if suspects:
+        N_PLUS_ONE_SUSPECTS.inc(handler)
+        sql, repeats = suspects[0]
+        logger.warning("Possible N+1 in %s: statement ran %d times: %s",
+                       handler, repeats, sql[:STATEMENT_PREVIEW_CHARS])
+
+
+class QueryMetricsMiddleware:
+    """
+    Plain ASGI middleware (works with streaming responses) that tracks each HTTP request's
+    statements and reports them under the matched endpoint's name
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with track_queries() as stats:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                endpoint = scope.get("endpoint")  # filled in by the router once a route matches
+                handler = getattr(endpoint, "__name__", "unmatched")
+                if handler != "get_metrics":
+                    record_request(handler, stats)
+
+
+def render_metrics() -> str:
+    """All metrics in Prometheus text exposition format"""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics() -> None:
+    for metric in METRICS:
+        metric.reset()
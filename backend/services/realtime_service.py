@@ -0,0 +1,357 @@
+"""
+Real-time tracking updates: emit on write, one listener per process, coalesced fan-out
+New batch_tracking rows are published from the writing transaction. On PostgreSQL that is
+pg_notify (delivered on commit, dropped on rollback) and a single LISTEN connection per worker
+receives them; elsewhere an in-process notifier stands in. The hub keeps only the latest event
+per batch and pushes to subscribers (by batch code, product or location) at most once per
+flush interval, so a burst of scans becomes one message per client instead of N polls.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import asyncio
+import json
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import event, select, func
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from models.user_models import Batch, BatchTracking
+
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_LIMIT = 7900  # NOTIFY payloads must stay under 8000 bytes
+PENDING_EVENTS = "realtime_pending_events"
+
+
+@dataclass
+class TrackingEvent:
+    tracking_id: int
+    batch_id: int
+    batch_code: str
+    product_id: int
+    status: str
+    location: str
+    timestamp: Optional[str]  # ISO 8601, UTC
+
+    def topics(self) -> List[str]:
+        return [batch_topic(self.batch_code), product_topic(self.product_id), location_topic(self.location)]
+
+    def order_key(self):
+        return self.timestamp or "", self.tracking_id
+
+
+def batch_topic(batch_code: str) -> str:
+    return f"batch:{batch_code}"
+
+
+def product_topic(product_id: int) -> str:
+    return f"product:{product_id}"
+
+
+def location_topic(location: str) -> str:
+    return f"location:{location}"
+
+
+def encode_events(events: Iterable[TrackingEvent]) -> List[str]:
+    """JSON arrays of events, split so each payload fits in one NOTIFY"""
+    payloads, current, size = [], [], 2
+    for item in (json.dumps(asdict(e), separators=(",", ":")) for e in events):
+        if current and size + len(item) + 1 > PAYLOAD_LIMIT:
+            payloads.append("[" + ",".join(current) + "]")
+            current, size = [], 2
+        current.append(item)
+        size += len(item) + 1
+    if current:
+        payloads.append("[" + ",".join(current) + "]")
+    return payloads
+
+
+def decode_events(payload: str) -> List[TrackingEvent]:
+    return [TrackingEvent(**item) for item in json.loads(payload)]
+
+
+def resolve_backend(dialect_name: str) -> str:
+    """Which transport a database dialect uses ("postgres" or "memory"), honouring REALTIME_BACKEND"""
+    if settings.REALTIME_BACKEND != "auto":
+        return settings.REALTIME_BACKEND
+    return "postgres" if dialect_name == "postgresql" else "memory"
+
+
+# =============================================================================
+# EMITTING
+# =============================================================================
+
+def tracking_events(db: Session, tracking_ids: List[int]) -> List[TrackingEvent]:
+    """Events for just-inserted tracking rows (one primary-key lookup joined to batches)"""
+    rows = db.connection().execute(select(
+        BatchTracking.id,
+        BatchTracking.batch_id,
+        Batch.batch_code,
+        Batch.product_id,
+        BatchTracking.status,
+        BatchTracking.location,
+        BatchTracking.timestamp
+    ).join(Batch, Batch.id == BatchTracking.batch_id).where(BatchTracking.id.in_(tracking_ids)))
+    return [
+        TrackingEvent(
+            tracking_id=row.id,
+            batch_id=row.batch_id,
+            batch_code=row.batch_code,
+            product_id=row.product_id,
+            status=row.status.value,
+            location=row.location,
+            timestamp=_utc_iso(row.timestamp)
+        ) for row in rows
+    ]
+
+
+def _utc_iso(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    if value.tzinfo is None:  # SQLite drops the offset; stored values are UTC
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+
+class PostgresNotifier:
+    """pg_notify inside the writing transaction: delivered on commit, discarded on rollback"""
+
+    def __init__(self, channel: Optional[str] = None):
+        self.channel = channel or settings.REALTIME_CHANNEL
+
+    def publish(self, db: Session, events: List[TrackingEvent]) -> None:
+        for payload in encode_events(events):
+            db.connection().execute(select(func.pg_notify(self.channel, payload)))
+
+
+class InProcessNotifier:
+    """Stand-in for tests and non-PostgreSQL databases: hands events to callbacks after commit"""
+
+    def __init__(self):
+        self._callbacks: List[Callable[[List[TrackingEvent]], None]] = []
+
+    def subscribe(self, callback: Callable[[List[TrackingEvent]], None]) -> None:
+        self._callbacks.append(callback)
+
+    def unsubscribe(self, callback: Callable[[List[TrackingEvent]], None]) -> None:
+        if callback in self._callbacks:
+            self._callbacks.remove(callback)
+
+    def publish(self, db: Session, events: List[TrackingEvent]) -> None:
+        db.info.setdefault(PENDING_EVENTS, []).extend(events)
+
+    def deliver(self, events: List[TrackingEvent]) -> None:
+        for callback in list(self._callbacks):
+            callback(events)
+
+
+local_notifier = InProcessNotifier()
+_notifier = None  # None: chosen per database by resolve_backend
+
+
+def configure_notifier(notifier) -> None:
+    """Force a notifier for every database (None restores the per-dialect choice)"""
+    global _notifier
+    _notifier = notifier
+
+
+def get_notifier(db: Session):
+    if _notifier is not None:
+        return _notifier
+    if resolve_backend(db.get_bind().dialect.name) == "postgres":
+        return PostgresNotifier()
+    return local_notifier
+
+
+def notify_tracking_inserted(db: Session, tracking_ids: List[int]) -> None:
+    """Publish events for new tracking rows from inside their transaction"""
+    if not settings.REALTIME_ENABLED or not tracking_ids:
+        return
+    events = tracking_events(db, tracking_ids)
+    if events:
+        get_notifier(db).publish(db, events)
+
+
+@event.listens_for(Session, "after_flush")
+def _publish_new_tracking(session, flush_context):
+    tracking_ids = [obj.id for obj in session.new if isinstance(obj, BatchTracking)]
+    if tracking_ids:
+        notify_tracking_inserted(session, tracking_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_local_events(session):
+    events = session.info.pop(PENDING_EVENTS, None)
+    if events:
+        local_notifier.deliver(events)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_local_events(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_EVENTS, None)
+
+
+# =============================================================================
+# FAN-OUT
+# =============================================================================
+
+class TrackingHub:
+    """
+    Subscriptions by topic, plus the events received since the last flush
+    feed() may be called from any thread; flush() runs on the event loop and calls
+    send(client_id, events) once per client that has something new
+    """
+
+    def __init__(self, send: Callable[[str, List[dict]], Awaitable[None]],
+                 interval: Optional[float] = None, max_topics: Optional[int] = None):
+        self.send = send
+        self.interval = interval if interval is not None else settings.REALTIME_FLUSH_INTERVAL_SECONDS
+        self.max_topics = max_topics or settings.REALTIME_MAX_TOPICS_PER_CLIENT
+        self.client_topics: Dict[str, Set[str]] = {}
+        self.topic_clients: Dict[str, Set[str]] = {}
+        self.pending: Dict[int, TrackingEvent] = {}  # batch_id -> latest event
+        self.counters = {"received": 0, "coalesced": 0, "flushes": 0, "messages": 0}
+        self._lock = threading.Lock()
+
+    # --- subscriptions ---
+
+    def subscribe(self, client_id: str, batch_codes: Iterable[str] = (), product_ids: Iterable[int] = (),
+                  locations: Iterable[str] = ()) -> Set[str]:
+        topics = ({batch_topic(code) for code in batch_codes}
+                  | {product_topic(int(product_id)) for product_id in product_ids}
+                  | {location_topic(location) for location in locations})
+        with self._lock:
+            current = self.client_topics.setdefault(client_id, set())
+            if len(current | topics) > self.max_topics:
+                raise ValueError(f"At most {self.max_topics} subscriptions per client")
+            current |= topics
+            for topic in topics:
+                self.topic_clients.setdefault(topic, set()).add(client_id)
+            return set(current)
+
+    def unsubscribe(self, client_id: str, topics: Optional[Iterable[str]] = None) -> Set[str]:
+        """Drop some topics (all of them when topics is None); returns what is left"""
+        with self._lock:
+            current = self.client_topics.get(client_id, set())
+            for topic in list(current if topics is None else topics):
+                current.discard(topic)
+                clients = self.topic_clients.get(topic)
+                if clients is not None:
+                    clients.discard(client_id)
+                    if not clients:
+                        del self.topic_clients[topic]
+            if not current:
+                self.client_topics.pop(client_id, None)
+            return set(current)
+
+    # --- events ---
+
+    def feed(self, events: Iterable[TrackingEvent]) -> None:
+        """Queue events for the next flush, keeping only the newest per batch"""
+        with self._lock:
+            for e in events:
+                self.counters["received"] += 1
+                previous = self.pending.get(e.batch_id)
+                if previous is not None:
+                    self.counters["coalesced"] += 1
+                    if previous.order_key() > e.order_key():
+                        continue
+                self.pending[e.batch_id] = e
+
+    async def flush(self) -> int:
+        """Push pending events to their subscribers; returns the number of messages sent"""
+        with self._lock:
+            pending, self.pending = self.pending, {}
+            outgoing: Dict[str, Dict[int, TrackingEvent]] = {}
+            for e in pending.values():
+                for topic in e.topics():
+                    for client_id in self.topic_clients.get(topic, ()):
+                        outgoing.setdefault(client_id, {})[e.batch_id] = e
+            self.counters["flushes"] += 1
+            self.counters["messages"] += len(outgoing)
+
+        for client_id, events in outgoing.items():
+            await self.send(client_id, [asdict(e) for e in sorted(events.values(), key=TrackingEvent.order_key)])
+        return len(outgoing)
+
+    async def run(self) -> None:
+        """Flush every interval until cancelled; this is the throttle"""
+        while True:
+            await asyncio.sleep(self.interval)
+            if self.pending:
+                await self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "clients": len(self.client_topics), "topics": len(self.topic_clients),
+                    "pending": len(self.pending)}
+
+
+# =============================================================================
+# POSTGRESQL LISTENER
+# =============================================================================
+
+class PostgresListener:
+    """The one LISTEN connection per process (asyncpg), reconnecting with backoff"""
+
+    initial_retry_seconds = 1.0
+    max_retry_seconds = 30.0
+
+    def __init__(self, database_url: str, on_events: Callable[[List[TrackingEvent]], None],
+                 channel: Optional[str] = None, on_reconnect: Optional[Callable[[], Awaitable[None]]] = None):
+        # asyncpg takes a plain postgresql:// DSN, without the SQLAlchemy driver suffix
+        self.dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.on_events = on_events
+        self.channel = channel or settings.REALTIME_CHANNEL
+        self.on_reconnect = on_reconnect
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            self.on_events(decode_events(payload))
+        except (ValueError, TypeError) as e:
+            logger.warning("Ignoring malformed %s notification: %s", channel, e)
+
+    async def run(self) -> None:
+        import asyncpg  # optional dependency, only needed on PostgreSQL
+
+        delay, connected_before = self.initial_retry_seconds, False
+        while True:
+            try:
+                connection = await asyncpg.connect(self.dsn)
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.warning("LISTEN %s failed, retrying in %.0fs: %s", self.channel, delay, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_retry_seconds)
+                continue
+
+            closed = asyncio.Event()
+            connection.add_termination_listener(lambda _: closed.set())
+            try:
+                await connection.add_listener(self.channel, self._on_notify)
+                if connected_before and self.on_reconnect is not None:
+                    await self.on_reconnect()  # notifications sent while disconnected are lost
+                connected_before, delay = True, self.initial_retry_seconds
+                await closed.wait()
+                logger.warning("LISTEN %s connection lost, reconnecting", self.channel)
+                continue
+            except Exception:  # anything but cancellation: keep listening, push updates must not stop for good
+                logger.exception("LISTEN %s failed, retrying in %.0fs", self.channel, delay)
+            finally:
+                if not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry_seconds)
@@ -0,0 +1,236 @@
+"""
+Search subsystem for batches and products
+Ranked, keyset-paginated search that returns lightweight hits instead of ORM objects.
+On PostgreSQL the ILIKE filters are served by the pg_trgm GIN indexes from migration 0002
+and similarity() refines the ranking; batch-code prefixes take a B-tree fast path.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+
+from models.user_models import Batch, Product, BatchCurrentState
+from sqlalchemy.orm import Session
+from sqlalchemy import select, or_, and_, case, func, literal, Float
+from services.pagination import encode_cursor, decode_cursor, clamp_page_size
+
+
+DEFAULT_PAGE_SIZE = 20
+
+# Terms shaped like a batch code ("VDT-", "VDT-05", "VDT-052025-A") skip ranking
+# and use an index range scan on batch_code
+BATCH_CODE_PREFIX = re.compile(r"^[A-Z]{2,}-[A-Z0-9-]*$")
+
+# Cursor kinds, so a cursor is always continued in the mode that produced it
+PREFIX_CURSOR = "p"
+RANKED_CURSOR = "r"
+
+
+@dataclass
+class BatchSearchHit:
+    batch_id: int
+    batch_code: str
+    product_id: int
+    product_name: str
+    category: str
+    status: Optional[str]
+    location: Optional[str]
+    score: float
+
+
+@dataclass
+class ProductSearchHit:
+    product_id: int
+    name: str
+    category: str
+    score: float
+
+
+@dataclass
+class SearchPage:
+    hits: list = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _ranked_page(db: Session, stmt, score, key_column, limit: int, cursor: Optional[str]):
+    """Apply (score DESC, id ASC) keyset pagination and fetch one extra row to detect the next page"""
+    after = decode_cursor(cursor)
+    if after is not None:
+        _, last_score, last_id = after
+        stmt = stmt.where(or_(score < last_score, and_(score == last_score, key_column > last_id)))
+
+    rows = db.execute(stmt.order_by(score.desc(), key_column).limit(limit + 1)).all()
+    return rows[:limit], len(rows) > limit
+
+
+# =============================================================================
+# BATCH SEARCH
+# =============================================================================
+
+def _batch_columns(score):
+    return (
+        Batch.id,
+        Batch.batch_code,
+        Product.id,
+        Product.name,
+        Product.category,
+        BatchCurrentState.status,
+        BatchCurrentState.location,
+        score.label("score")
+    )
+
+
+def _to_batch_hit(row) -> BatchSearchHit:
+    batch_id, batch_code, product_id, product_name, category, status, location, score = row
+    return BatchSearchHit(
+        batch_id=batch_id,
+        batch_code=batch_code,
+        product_id=product_id,
+        product_name=product_name,
+        category=category,
+        status=status.value if status else None,
+        location=location,
+        score=float(score)
+    )
+
+
+def search_batches_by_code_prefix(db: Session, prefix: str, limit: int = DEFAULT_PAGE_SIZE,
+                                  cursor: Optional[str] = None) -> SearchPage:
+    """
+    Fast path for batch-code prefixes: a B-tree range scan ordered by batch_code
+    The cursor is the last batch_code returned
+    """
+    limit = clamp_page_size(limit)
+    stmt = select(*_batch_columns(literal(1.0, Float))).select_from(Batch).join(
+        Product, Product.id == Batch.product_id
+    ).outerjoin(
+        BatchCurrentState, BatchCurrentState.batch_id == Batch.id
+    ).where(Batch.batch_code.like(f"{_escape_like(prefix.upper())}%", escape="\\"))
+
+    after = decode_cursor(cursor)
+    if after is not None:
+        stmt = stmt.where(Batch.batch_code > after[1])
+
+    rows = db.execute(stmt.order_by(Batch.batch_code).limit(limit + 1)).all()
+    hits = [_to_batch_hit(row) for row in rows[:limit]]
+    next_cursor = encode_cursor((PREFIX_CURSOR, hits[-1].batch_code)) if len(rows) > limit else None
+    return SearchPage(hits=hits, next_cursor=next_cursor)
+
+
+def search_batches(db: Session, search_term: str, limit: int = DEFAULT_PAGE_SIZE,
+                   cursor: Optional[str] = None) -> SearchPage:
+    """
+    Search batches by batch code, product name, or current location
+    Results are ranked (exact code > code prefix > code substring > product > location)
+    and paginated with an opaque cursor from the previous page
+    """
+    term = search_term.strip()
+    if not term:
+        return SearchPage()
+
+    after = decode_cursor(cursor)
+    if after is not None and after[0] == PREFIX_CURSOR:
+        return search_batches_by_code_prefix(db, term, limit=limit, cursor=cursor)
+    if after is None and BATCH_CODE_PREFIX.match(term.upper()):
+        page = search_batches_by_code_prefix(db, term, limit=limit)
+        if page.hits:
+            return page
+
+    limit = clamp_page_size(limit)
+    contains = f"%{_escape_like(term)}%"
+    prefix = f"{_escape_like(term)}%"
+
+    score = case(
+        (func.upper(Batch.batch_code) == term.upper(), 1.0),
+        (Batch.batch_code.ilike(prefix, escape="\\"), 0.9),
+        (Batch.batch_code.ilike(contains, escape="\\"), 0.7),
+        (Product.name.ilike(prefix, escape="\\"), 0.6),
+        (Product.name.ilike(contains, escape="\\"), 0.5),
+        else_=0.3
+    )
+    matches = [
+        Batch.batch_code.ilike(contains, escape="\\"),
+        Product.name.ilike(contains, escape="\\"),
+        BatchCurrentState.location.ilike(contains, escape="\\"),
+    ]
+    if _is_postgres(db):
+        # Typo-tolerant trigram matches, and similarity as a tie-breaker within each tier
+        matches.append(Product.name.op("%")(term))
+        score = score + 0.1 * func.greatest(
+            func.similarity(Batch.batch_code, term),
+            func.similarity(Product.name, term)
+        )
+    score = score.cast(Float)
+
+    stmt = select(*_batch_columns(score)).select_from(Batch).join(
+        Product, Product.id == Batch.product_id
+    ).outerjoin(
+        BatchCurrentState, BatchCurrentState.batch_id == Batch.id
+    ).where(or_(*matches))
+
+    rows, has_more = _ranked_page(db, stmt, score, Batch.id, limit, cursor)
+    hits = [_to_batch_hit(row) for row in rows]
+    next_cursor = encode_cursor((RANKED_CURSOR, hits[-1].score, hits[-1].batch_id)) if has_more else None
+    return SearchPage(hits=hits, next_cursor=next_cursor)
+
+
+# =============================================================================
+# PRODUCT SEARCH
+# =============================================================================
+
+def search_products(db: Session, search_term: str, limit: int = DEFAULT_PAGE_SIZE,
+                    cursor: Optional[str] = None) -> SearchPage:
+    """
+    Search products by name or category
+    Ranked exact name > name prefix > name substring > category match
+    """
+    term = search_term.strip()
+    if not term:
+        return SearchPage()
+
+    limit = clamp_page_size(limit)
+    contains = f"%{_escape_like(term)}%"
+    prefix = f"{_escape_like(term)}%"
+
+    score = case(
+        (func.lower(Product.name) == term.lower(), 1.0),
+        (Product.name.ilike(prefix, escape="\\"), 0.9),
+        (Product.name.ilike(contains, escape="\\"), 0.7),
+        (func.lower(Product.category) == term.lower(), 0.6),
+        else_=0.4
+    )
+    matches = [
+        Product.name.ilike(contains, escape="\\"),
+        Product.category.ilike(contains, escape="\\"),
+    ]
+    if _is_postgres(db):
+        matches.append(Product.name.op("%")(term))
+        score = score + 0.1 * func.similarity(Product.name, term)
+    score = score.cast(Float)
+
+    stmt = select(Product.id, Product.name, Product.category, score.label("score")).where(or_(*matches))
+
+    rows, has_more = _ranked_page(db, stmt, score, Product.id, limit, cursor)
+    hits = [ProductSearchHit(product_id=row[0], name=row[1], category=row[2], score=float(row[3]))
+            for row in rows]
+    next_cursor = encode_cursor((RANKED_CURSOR, hits[-1].score, hits[-1].product_id)) if has_more else None
+    return SearchPage(hits=hits, next_cursor=next_cursor)
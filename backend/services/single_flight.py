@@ -0,0 +1,155 @@
+"""
+Single-flight request coalescing
+While a call for a key is in flight, identical calls wait for it and share its result (or its
+exception) instead of running the same queries again; the next call after it finishes runs
+fresh. Only share values that are safe to hand to several requests: plain data, never ORM
+objects bound to the leader's session.
+  SingleFlight:      threads (sync routes in the threadpool, e.g. the chatbot)
+  AsyncSingleFlight: coroutines on one event loop (async routes)
+Sync code running on an event-loop thread (AsyncSession.run_sync) must never wait for a
+leader, since the leader may need that same loop to finish; SingleFlight runs it uncoalesced.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import abc
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+_groups: Dict[str, "_Group"] = {}
+
+
+class _Group(abc.ABC):
+    def __init__(self, name: str):
+        self.name = name
+        self.leaders = 0    # calls that ran the function
+        self.shared = 0     # calls that waited for a leader instead
+        _groups[name] = self
+
+    def stats(self) -> dict:
+        total = self.leaders + self.shared
+        return {
+            "in_flight": self.in_flight(),
+            "leaders": self.leaders,
+            "shared": self.shared,
+            "shared_fraction": round(self.shared / total, 4) if total else 0.0,
+        }
+
+    @abc.abstractmethod
+    def in_flight(self) -> int:
+        ...
+
+    def reset_stats(self) -> None:
+        self.leaders = self.shared = 0
+
+
+# =============================================================================
+# THREADS
+# =============================================================================
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class SingleFlight(_Group):
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """fn() for the first caller of key; callers arriving while it runs get the same result"""
+        if _on_event_loop():
+            return fn()
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+# =============================================================================
+# ASYNCIO
+# =============================================================================
+
+class AsyncSingleFlight(_Group):
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        await fn() for the first caller of key; callers arriving while it runs await the same task
+        The call runs in the leader's request (its session), so cancelling the leader cancels it;
+        waiters then start over and one of them becomes the new leader
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.leaders += 1
+            return await task
+
+        self.shared += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if task.cancelled() and not asyncio.current_task().cancelling():
+                return await self.do(key, fn)
+            raise
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+
+def stats() -> dict:
+    return {name: group.stats() for name, group in _groups.items()}
@@ -0,0 +1,67 @@
+"""
+Prebuilt select() statements for the hot single-row lookups
+Each statement (with its loader options) is built once per loader profile and reused with
+bound parameters, so a lookup skips rebuilding the Query chain and its loader options; the
+unchanged statement object also hits SQLAlchemy's compiled cache on its cheapest path.
+On asyncpg the reused SQL string is in turn served from the driver's prepared statement
+cache (see ASYNC_PREPARED_STATEMENT_CACHE_SIZE).
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import functools
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.sql import Select
+
+from models.user_models import Batch, Employee, Product, Department
+from services import loader_profiles
+
+
+@functools.lru_cache(maxsize=None)
+def batch_by_code(profile: str = loader_profiles.DETAIL) -> Select:
+    """Batch by :batch_code (unknown profiles raise ValueError and are not cached)"""
+    return select(Batch).options(*loader_profiles.batch_options(profile)).where(
+        Batch.batch_code == bindparam("batch_code")
+    ).limit(1)
+
+
+@functools.lru_cache(maxsize=None)
+def batch_by_id(profile: str = loader_profiles.DETAIL) -> Select:
+    """Batch by :batch_id"""
+    return select(Batch).options(*loader_profiles.batch_options(profile)).where(
+        Batch.id == bindparam("batch_id")
+    ).limit(1)
+
+
+@functools.lru_cache(maxsize=None)
+def employee_by_id() -> Select:
+    """Employee (with department) by :employee_id"""
+    return select(Employee).options(*loader_profiles.employee_options()).where(
+        Employee.id == bindparam("employee_id")
+    ).limit(1)
+
+
+@functools.lru_cache(maxsize=None)
+def employee_by_email() -> Select:
+    """Employee (with department) by :email"""
+    return select(Employee).options(*loader_profiles.employee_options()).where(
+        Employee.email == bindparam("email")
+    ).limit(1)
+
+
+@functools.lru_cache(maxsize=None)
+def product_by_id() -> Select:
+    return select(Product).where(Product.id == bindparam("product_id")).limit(1)
+
+
+@functools.lru_cache(maxsize=None)
+def department_by_id() -> Select:
+    return select(Department).options(*loader_profiles.department_options(loader_profiles.DETAIL)).where(
+        Department.id == bindparam("dept_id")
+    ).limit(1)
@@ -0,0 +1,96 @@
+"""
+Batch statistics engine
+Computes every dashboard rollup (status, product, category, location) from a single
+GROUP BY query over batches + batch_current_state instead of loading ORM objects
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from models.user_models import Batch, Product, BatchCurrentState, BatchStatus
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from typing import Iterable, Optional
+from datetime import date
+
+
+UNTRACKED = "Untracked"  # bucket for batches that have no tracking record yet
+
+
+def _empty_bucket() -> dict:
+    return {"batches": 0, "quantity": 0}
+
+
+def _add(buckets: dict, key, batches: int, quantity: int) -> None:
+    bucket = buckets.setdefault(key, _empty_bucket())
+    bucket["batches"] += batches
+    bucket["quantity"] += quantity
+
+
+def get_batch_rollup(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    product_ids: Optional[Iterable[int]] = None
+) -> dict:
+    """
+    Get batch counts and quantities per status, product, category and location
+    Filters apply to Batch.manufactured_date and Batch.product_id
+    One round trip: the finest grain is grouped in SQL and rolled up here
+    """
+    stmt = select(
+        BatchCurrentState.status,
+        BatchCurrentState.location,
+        Product.id,
+        Product.name,
+        Product.category,
+        func.count(Batch.id),
+        func.coalesce(func.sum(Batch.quantity), 0)
+    ).select_from(Batch).join(
+        Product, Product.id == Batch.product_id
+    ).outerjoin(
+        BatchCurrentState, BatchCurrentState.batch_id == Batch.id
+    ).group_by(
+        BatchCurrentState.status,
+        BatchCurrentState.location,
+        Product.id,
+        Product.name,
+        Product.category
+    )
+
+    if start_date is not None:
+        stmt = stmt.where(Batch.manufactured_date >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(Batch.manufactured_date <= end_date)
+    if product_ids is not None:
+        stmt = stmt.where(Batch.product_id.in_(list(product_ids)))
+
+    totals = _empty_bucket()
+    by_status = {status.value: _empty_bucket() for status in BatchStatus}
+    by_product, by_category, by_location = {}, {}, {}
+
+    for status, location, product_id, product_name, category, batches, quantity in db.execute(stmt):
+        quantity = int(quantity)
+        totals["batches"] += batches
+        totals["quantity"] += quantity
+        _add(by_status, status.value if status else UNTRACKED, batches, quantity)
+        _add(by_category, category, batches, quantity)
+        _add(by_location, location or UNTRACKED, batches, quantity)
+
+        product = by_product.setdefault(product_id, {"name": product_name, "category": category,
+                                                     **_empty_bucket()})
+        product["batches"] += batches
+        product["quantity"] += quantity
+
+    return {
+        "total_batches": totals["batches"],
+        "total_quantity": totals["quantity"],
+        "by_status": by_status,
+        "by_product": by_product,
+        "by_category": by_category,
+        "by_location": by_location,
+    }
@@ -0,0 +1,348 @@
+"""
+Monthly range partitions for batch_tracking, archival of closed months, and
+transparent reads of archived history.
+
+On PostgreSQL batch_tracking is declaratively partitioned by RANGE (timestamp) (migration 0003):
+  - ensure_future_partitions() creates the next N monthly partitions ahead of time
+  - archive_closed_partitions() exports a closed month whose batches are all Delivered to a
+    compressed file, records which batches it holds, then detaches and drops the partition
+  - archived_tracking_records() reads a batch's archived rows back so
+    crud_service.get_batch_tracking_history still returns the full history; parsed rows are
+    cached per (file, batch), and pages past the newest archived month skip the catalog
+
+On other databases (SQLite in tests) the same archival runs over the plain table with DELETE.
+"""
+import sys, os
+
+# Insert the project’s root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import csv
+import gzip
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from models.user_models import (
+    Batch, Employee, BatchTracking, BatchCurrentState, BatchStatus, TrackingArchive, TrackingArchiveBatch
+)
+from sqlalchemy import select, delete, func, text, and_, or_
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.config import settings
+from services import loader_profiles
+from services.cache_service import LRUTTLCache
+
+
+TABLE = "batch_tracking"
+ARCHIVE_COLUMNS = ["id", "batch_id", "location", "status", "timestamp", "handled_by", "notes"]
+
+
+# =============================================================================
+# MONTH HELPERS
+# =============================================================================
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(start: datetime) -> str:
+    return f"{TABLE}_y{start.year:04d}m{start.month:02d}"
+
+
+def partition_range(name: str) -> Tuple[datetime, datetime]:
+    """Inverse of partition_name()"""
+    start = datetime(int(name[-7:-3]), int(name[-2:]), 1, tzinfo=timezone.utc)
+    return start, add_months(start, 1)
+
+
+def _utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+# =============================================================================
+# PARTITION MAINTENANCE (PostgreSQL)
+# =============================================================================
+
+def is_partitioned(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return bool(db.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :table"
+    ), {"table": TABLE}).scalar())
+
+
+def list_partitions(db: Session) -> List[str]:
+    """Names of the attached monthly partitions (the DEFAULT partition is excluded)"""
+    rows = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table AND c.relname LIKE :pattern ORDER BY c.relname"
+    ), {"table": TABLE, "pattern": f"{TABLE}_y%m%"})
+    return [name for (name,) in rows]
+
+
+def ensure_future_partitions(db: Session, months_ahead: Optional[int] = None,
+                             now: Optional[datetime] = None) -> List[str]:
+    """Create monthly partitions from the current month through `months_ahead` months ahead"""
+    if not is_partitioned(db):
+        return []
+    months_ahead = settings.TRACKING_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    current = month_start(now or datetime.now(timezone.utc))
+    existing = set(list_partitions(db))
+
+    created = []
+    for offset in range(months_ahead + 1):
+        start = add_months(current, offset)
+        name = partition_name(start)
+        if name in existing:
+            continue
+        db.execute(text(
+            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {TABLE} '
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{add_months(start, 1).isoformat()}')"
+        ))
+        created.append(name)
+    db.commit()
+    return created
+
+
+# =============================================================================
+# ARCHIVAL
+# =============================================================================
+
+def _candidate_ranges(db: Session, cutoff: datetime) -> List[Tuple[str, datetime, datetime]]:
+    """Monthly ranges that ended before `cutoff`"""
+    if is_partitioned(db):
+        ranges = [(name, *partition_range(name)) for name in list_partitions(db)]
+        return [(name, start, end) for name, start, end in ranges if end <= cutoff]
+
+    oldest = db.execute(select(func.min(BatchTracking.timestamp))).scalar()
+    if oldest is None:
+        return []
+    ranges, start = [], month_start(_utc(oldest))
+    while add_months(start, 1) <= cutoff:
+        ranges.append((partition_name(start), start, add_months(start, 1)))
+        start = add_months(start, 1)
+    return ranges
+
+
+def _in_range(start: datetime, end: datetime):
+    return and_(BatchTracking.timestamp >= start, BatchTracking.timestamp < end)
+
+
+def _all_delivered(db: Session, start: datetime, end: datetime) -> bool:
+    undelivered = db.execute(
+        select(func.count()).select_from(BatchTracking).outerjoin(
+            BatchCurrentState, BatchCurrentState.batch_id == BatchTracking.batch_id
+        ).where(
+            _in_range(start, end),
+            or_(BatchCurrentState.status.is_(None), BatchCurrentState.status != BatchStatus.DELIVERED)
+        )
+    ).scalar()
+    return undelivered == 0
+
+
+def _write_archive(rows: List[dict], path: str, file_format: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    if file_format == "parquet":
+        import pandas as pd  # parquet output also needs pyarrow installed
+        pd.DataFrame(rows, columns=ARCHIVE_COLUMNS).to_parquet(tmp_path, compression="zstd", index=False)
+    else:
+        with gzip.open(tmp_path, "wt", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=ARCHIVE_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+
+def archive_closed_partitions(db: Session, now: Optional[datetime] = None,
+                              archive_after_months: Optional[int] = None) -> List[TrackingArchive]:
+    """
+    Move closed months of tracking history to compressed files under TRACKING_ARCHIVE_DIR
+    A month qualifies when it ended at least `archive_after_months` ago and every batch with
+    rows in it is currently Delivered; anything else stays live.
+    """
+    after = settings.TRACKING_ARCHIVE_AFTER_MONTHS if archive_after_months is None else archive_after_months
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -after)
+    file_format = settings.TRACKING_ARCHIVE_FORMAT
+    partitioned = is_partitioned(db)
+    already = set(db.execute(select(TrackingArchive.partition_name)).scalars())
+
+    archived = []
+    for name, start, end in _candidate_ranges(db, cutoff):
+        if name in already or not _all_delivered(db, start, end):
+            continue
+
+        rows = [
+            {
+                "id": record.id,
+                "batch_id": record.batch_id,
+                "location": record.location,
+                "status": record.status.name,
+                "timestamp": _utc(record.timestamp).isoformat(),
+                "handled_by": str(record.handled_by),
+                "notes": record.notes or "",
+            }
+            for record in db.execute(
+                select(BatchTracking.__table__).where(_in_range(start, end)).order_by(BatchTracking.id)
+            )
+        ]
+
+        if rows:
+            path = os.path.join(settings.TRACKING_ARCHIVE_DIR, f"{name}.{file_format}")
+            _write_archive(rows, path, file_format)
+            archive = TrackingArchive(partition_name=name, range_start=start, range_end=end,
+                                      file_path=path, file_format=file_format, row_count=len(rows))
+            db.add(archive)
+            db.flush()
+            db.add_all([TrackingArchiveBatch(archive_id=archive.id, batch_id=batch_id)
+                        for batch_id in sorted({row["batch_id"] for row in rows})])
+            archived.append(archive)
+
+        if partitioned:
+            db.execute(text(f'ALTER TABLE {TABLE} DETACH PARTITION "{name}"'))
+            db.execute(text(f'DROP TABLE "{name}"'))
+        else:
+            db.execute(delete(BatchTracking).where(_in_range(start, end)))
+        db.commit()
+
+    return archived
+
+
+# =============================================================================
+# ARCHIVED HISTORY READS
+# =============================================================================
+
+# Archive files are written once and never change, so their parsed rows never go stale
+_archive_rows = LRUTTLCache(settings.TRACKING_ARCHIVE_CACHE_MAX_BATCHES, ttl=float("inf"))
+
+
+def _rows_key(file_path: str, batch_id: int) -> str:
+    return f"{file_path}#{batch_id}"
+
+
+def iter_archive(archive: TrackingArchive) -> Iterator[dict]:
+    """Every row of an archive file, in file (ID) order"""
+    if archive.file_format == "parquet":
+        import pandas as pd
+        yield from pd.read_parquet(archive.file_path).fillna("").to_dict("records")
+        return
+    with gzip.open(archive.file_path, "rt", newline="") as f:
+        yield from csv.DictReader(f)
+
+
+def read_archive(archive: TrackingArchive, batch_id: int) -> List[dict]:
+    """One batch's rows of an archive file (cached; callers must not modify them)"""
+    key = _rows_key(archive.file_path, batch_id)
+    rows = _archive_rows.get(key, None)
+    if rows is not None:
+        return rows
+
+    if archive.file_format == "parquet":
+        import pandas as pd
+        frame = pd.read_parquet(archive.file_path, filters=[("batch_id", "==", batch_id)])
+        rows = frame.fillna("").to_dict("records")
+        _archive_rows.set(key, rows)
+        return rows
+
+    # One pass over the month caches every batch in it, so the next batch from this file is a hit
+    by_batch = defaultdict(list)
+    for row in iter_archive(archive):
+        by_batch[int(row["batch_id"])].append(row)
+    rows = by_batch.pop(batch_id, [])
+    for other_id, other_rows in by_batch.items():
+        _archive_rows.set(_rows_key(archive.file_path, other_id), other_rows)
+    _archive_rows.set(key, rows)
+    return rows
+
+
+def archived_through(db: Session) -> Optional[datetime]:
+    """
+    End of the newest archived month (None: nothing archived)
+    Read on every call, never cached: archival runs in another process, and a stale bound would
+    hide rows it just moved out of batch_tracking. The catalog has one row per month
+    """
+    end = db.execute(select(func.max(TrackingArchive.range_end))).scalar()
+    return _utc(end) if end is not None else None
+
+
+def archives_overlapping(db: Session, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                         batch_code: Optional[str] = None) -> List[TrackingArchive]:
+    """Archived months that overlap [start, end), oldest first; with batch_code, only those holding that batch"""
+    stmt = select(TrackingArchive).order_by(TrackingArchive.range_start)
+    if start is not None:
+        stmt = stmt.where(TrackingArchive.range_end > start)
+    if end is not None:
+        stmt = stmt.where(TrackingArchive.range_start < end)
+    if batch_code is not None:
+        stmt = stmt.join(
+            TrackingArchiveBatch, TrackingArchiveBatch.archive_id == TrackingArchive.id
+        ).join(
+            Batch, Batch.id == TrackingArchiveBatch.batch_id
+        ).where(Batch.batch_code == batch_code)
+    return list(db.execute(stmt).scalars())
+
+
+def archived_tracking_records(db: Session, batch_code: str, after: Optional[Sequence] = None,
+                              limit: Optional[int] = None) -> List[BatchTracking]:
+    """
+    Archived tracking rows of a batch as detached BatchTracking objects (never added to the session)
+    Only rows after the (timestamp, id) key `after` are returned, oldest first, at most `limit` of them.
+    Handlers are attached with their department so they match the "history" loader profile
+    """
+    through = archived_through(db)
+    if through is None or (after is not None and _utc(after[0]) >= through):
+        return []  # nothing archived, or the cursor is already past every archived month
+
+    archives = db.execute(
+        select(TrackingArchive, Batch.id).join(
+            TrackingArchiveBatch, TrackingArchiveBatch.archive_id == TrackingArchive.id
+        ).join(
+            Batch, Batch.id == TrackingArchiveBatch.batch_id
+        ).where(Batch.batch_code == batch_code).order_by(TrackingArchive.range_start)
+    ).all()
+    if not archives:
+        return []
+
+    keyed = []
+    for archive, batch_id in archives:
+        for row in read_archive(archive, batch_id):
+            sort_key = (_utc(datetime.fromisoformat(str(row["timestamp"]))), int(row["id"]))
+            if after is None or sort_key > (_utc(after[0]), after[1]):
+                keyed.append((sort_key, row))
+    keyed.sort(key=lambda item: item[0])
+    rows = [row for _, row in keyed[:limit]]
+
+    handler_ids = {uuid.UUID(str(row["handled_by"])) for row in rows}
+    handlers = {
+        employee.id: employee
+        for employee in db.query(Employee).options(
+            *loader_profiles.employee_options()
+        ).filter(Employee.id.in_(handler_ids)).all()
+    }
+
+    records = []
+    for row in rows:
+        record = BatchTracking(
+            id=int(row["id"]),
+            batch_id=int(row["batch_id"]),
+            location=row["location"],
+            status=BatchStatus[row["status"]],
+            timestamp=datetime.fromisoformat(str(row["timestamp"])),
+            handled_by=uuid.UUID(str(row["handled_by"])),
+            notes=row["notes"] or None
+        )
+        set_committed_value(record, "handler", handlers.get(record.handled_by))
+        records.append(record)
+    return records
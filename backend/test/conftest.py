@@ -0,0 +1,131 @@
+"""
+Shared pytest fixtures
+Tests run against an in-memory SQLite database so they never touch the real PostgreSQL server
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+# Before anything imports app.config: no .env, and the default engine is the in-memory stand-in
+os.environ["ENV_FILE"] = ""
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ["CHAT_CACHE_ENABLED"] = "true"  # one process, so process-local data versions are exact
+
+import pytest
+import pytest_asyncio
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy.orm import sessionmaker
+
+from database.database import Base, create_database_engine
+from models.user_models import Department, Employee, Product, Batch, BatchTracking, BatchStatus
+from services import cache_service
+
+
+@pytest.fixture(autouse=True)
+def empty_lookup_cache():
+    """The lookup cache is process-wide and keyed by ID/code, so every test's database starts with it empty"""
+    cache_service.cache.clear()
+    yield
+    cache_service.cache.clear()
+
+
+@pytest.fixture
+def engine():
+    engine = create_database_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def sample_data(db):
+    return populate_sample_data(db)
+
+
+@pytest_asyncio.fixture
+async def async_db(tmp_path):
+    """AsyncSession on an aiosqlite database file, seeded with the same sample data"""
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    session = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)()
+    try:
+        await session.run_sync(populate_sample_data)
+        yield session
+    finally:
+        await session.close()
+        await engine.dispose()
+
+
+def populate_sample_data(db):
+    """
+    Two products, three batches and a short tracking history:
+      VDT-052025-A  Manufactured -> In Transit -> Delivered
+      VDT-052025-B  Manufactured -> In Transit
+      PCM-062025-A  Manufactured
+    """
+    qa = Department(name="Quality Assurance")
+    logistics = Department(name="Logistics")
+    db.add_all([qa, logistics])
+    db.flush()
+
+    alice = Employee(name="Alice Kumar", email="alice@example.com", department_id=qa.id,
+                     designation="QA Lead", date_joined=date(2023, 1, 10))
+    bob = Employee(name="Bob Raj", email="bob@example.com", department_id=logistics.id,
+                   designation="Driver", date_joined=date(2024, 3, 1))
+    db.add_all([alice, bob])
+    db.flush()
+
+    vitamin = Product(name="Vitamin D Tablets", category="Supplements", unit_price=120)
+    paracetamol = Product(name="Paracetamol 500mg", category="Analgesics", unit_price=35)
+    db.add_all([vitamin, paracetamol])
+    db.flush()
+
+    batches = {
+        "VDT-052025-A": Batch(product_id=vitamin.id, batch_code="VDT-052025-A", quantity=500,
+                              manufactured_date=date(2025, 5, 1), expiry_date=date(2027, 5, 1),
+                              created_by=alice.id),
+        "VDT-052025-B": Batch(product_id=vitamin.id, batch_code="VDT-052025-B", quantity=300,
+                              manufactured_date=date(2025, 5, 15), expiry_date=date(2027, 5, 15),
+                              created_by=alice.id),
+        "PCM-062025-A": Batch(product_id=paracetamol.id, batch_code="PCM-062025-A", quantity=1000,
+                              manufactured_date=date(2025, 6, 1), expiry_date=date(2026, 12, 1),
+                              created_by=alice.id),
+    }
+    db.add_all(batches.values())
+    db.flush()
+
+    t0 = datetime(2025, 6, 1, 8, 0, tzinfo=timezone.utc)
+    history = [
+        ("VDT-052025-A", "Chennai Plant", BatchStatus.MANUFACTURED, alice, 0),
+        ("VDT-052025-A", "Highway NH48", BatchStatus.IN_TRANSIT, bob, 1),
+        ("VDT-052025-A", "Bangalore Warehouse", BatchStatus.DELIVERED, bob, 2),
+        ("VDT-052025-B", "Chennai Plant", BatchStatus.MANUFACTURED, alice, 0),
+        ("VDT-052025-B", "Highway NH48", BatchStatus.IN_TRANSIT, bob, 3),
+        ("PCM-062025-A", "Chennai Plant", BatchStatus.MANUFACTURED, alice, 4),
+    ]
+    for code, location, status, handler, day in history:
+        db.add(BatchTracking(batch_id=batches[code].id, location=location, status=status,
+                             handled_by=handler.id, timestamp=t0 + timedelta(days=day)))
+        db.flush()
+
+    db.commit()
+    return {"batches": batches, "employees": {"alice": alice, "bob": bob},
+            "products": {"vitamin": vitamin, "paracetamol": paracetamol},
+            "departments": {"qa": qa, "logistics": logistics}}
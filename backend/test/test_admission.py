@@ -0,0 +1,227 @@
+"""
+Tests for single-flight coalescing (services/single_flight.py) and admission control
+(services/admission_control.py, api/admission.py)
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from database.async_database import get_async_db
+from database.database import Base, create_database_engine
+from services import admission_control, ai_service, chatbot_services
+from services.admission_control import ConcurrencyLimiter, Overloaded
+from services.ai_service import StubLLMClient
+from services.single_flight import AsyncSingleFlight, SingleFlight
+from test.conftest import populate_sample_data
+
+
+# =============================================================================
+# SINGLE FLIGHT
+# =============================================================================
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test.threads")
+    calls = []
+    start = threading.Barrier(8)
+
+    def load():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"value": 42}
+
+    def ask(_):
+        start.wait()
+        return flight.do("key", load)
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(ask, range(8)))
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats()["leaders"] == 1 and flight.stats()["shared"] == 7
+    assert flight.in_flight() == 0
+    assert flight.do("key", lambda: "fresh") == "fresh"  # nothing is cached once the call is done
+
+
+def test_waiters_see_the_leaders_exception():
+    flight = SingleFlight("test.errors")
+    entered = threading.Event()
+
+    def fail():
+        entered.set()
+        time.sleep(0.1)
+        raise LookupError("boom")
+
+    def follow():
+        entered.wait()
+        return flight.do("key", lambda: "should not run")
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flight.do, "key", fail)
+        follower = pool.submit(follow)
+        for future in (leader, follower):
+            with pytest.raises(LookupError):
+                future.result()
+
+
+@pytest.mark.asyncio
+async def test_async_calls_share_one_task_and_survive_leader_cancellation():
+    flight = AsyncSingleFlight("test.async")
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    assert await asyncio.gather(*(flight.do("key", load) for _ in range(5))) == [1] * 5
+    assert len(calls) == 1
+
+    leader = asyncio.create_task(flight.do("key", load))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", load))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    assert await follower == 3  # the cancelled leader's call is dropped and the follower runs its own
+    assert flight.in_flight() == 0
+
+
+# =============================================================================
+# CONCURRENCY LIMITER
+# =============================================================================
+
+@pytest.mark.asyncio
+async def test_limiter_queues_then_sheds():
+    limiter = ConcurrencyLimiter("test", max_concurrent=1, max_queue=1, queue_timeout=5)
+    await limiter.acquire()
+
+    queued = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    with pytest.raises(Overloaded, match="queue full"):
+        await limiter.acquire()
+
+    limiter.release()  # the slot goes straight to the queued request
+    await queued
+    assert (limiter.active, limiter.stats()["waiting"]) == (1, 0)
+
+    limiter.release()
+    assert limiter.active == 0
+    assert limiter.stats()["shed_queue_full"] == 1 and limiter.stats()["admitted"] == 2
+
+
+@pytest.mark.asyncio
+async def test_limiter_sheds_requests_that_wait_too_long():
+    limiter = ConcurrencyLimiter("test", max_concurrent=1, max_queue=10, queue_timeout=0.05)
+    async with limiter:
+        with pytest.raises(Overloaded, match="queue timeout"):
+            await limiter.acquire()
+        assert limiter.stats()["waiting"] == 0
+    assert limiter.active == 0
+    assert limiter.stats()["shed_timeout"] == 1
+
+
+@pytest.mark.asyncio
+async def test_release_racing_a_queue_timeout_still_sheds_cleanly():
+    limiter = ConcurrencyLimiter("test", max_concurrent=1, max_queue=10, queue_timeout=0.05)
+    await limiter.acquire()
+    queued = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    # The holder releases in the loop turn between the timeout cancelling the waiter and
+    # the waiter resuming, so release() pops the cancelled waiter first
+    limiter._waiters[0].add_done_callback(lambda _: limiter.release())
+
+    with pytest.raises(Overloaded, match="queue timeout"):
+        await queued
+    assert (limiter.active, limiter.stats()["waiting"]) == (0, 0)
+    assert limiter.stats()["shed_timeout"] == 1
+
+
+@pytest.fixture
+def tiny_limiter():
+    limiter = ConcurrencyLimiter("batches.lookup", max_concurrent=1, max_queue=0, queue_timeout=1, retry_after=3)
+    admission_control.configure_limiter("batches.lookup", limiter)
+    yield limiter
+    admission_control.reset_limiters()
+
+
+@pytest.mark.asyncio
+async def test_overloaded_endpoint_answers_503_with_retry_after(async_db, tiny_limiter):
+    async def override_get_async_db():
+        yield async_db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            admitted = await client.post("/api/batches/lookup", json={"batch_codes": ["VDT-052025-A"]})
+            await tiny_limiter.acquire()  # every slot busy, no queue
+            shed = await client.post("/api/batches/lookup", json={"batch_codes": ["VDT-052025-A"]})
+            tiny_limiter.release()
+            stats = (await client.get("/api/admission/stats")).json()
+    finally:
+        app.dependency_overrides.clear()
+
+    assert admitted.status_code == 200
+    assert shed.status_code == 503
+    assert shed.headers["retry-after"] == "3"
+    assert stats["limiters"]["batches.lookup"]["shed_queue_full"] == 1
+    assert stats["limiters"]["batches.lookup"]["active"] == 0
+
+
+# =============================================================================
+# CHATBOT
+# =============================================================================
+
+def test_concurrent_chat_questions_about_one_batch_share_the_queries(tmp_path, monkeypatch):
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'chat.db'}")
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    with session_factory() as db:
+        populate_sample_data(db)
+        chatbot_services.get_entity_index(db)
+
+    executed = []
+    fast_path = chatbot_services.execute_fast_path
+
+    def slow_fast_path(db, intent):
+        executed.append(intent.name)
+        time.sleep(0.2)  # long enough for every other asker to arrive while this one is in flight
+        return fast_path(db, intent)
+
+    monkeypatch.setattr(chatbot_services, "execute_fast_path", slow_fast_path)
+    previous = ai_service.get_llm_client()
+    ai_service.configure_llm_client(StubLLMClient("unused"))
+    chatbot_services.answer_cache.clear()
+    start = threading.Barrier(6)
+
+    def ask(_):
+        with session_factory() as db:
+            start.wait()
+            return chatbot_services.answer_question(db, "Show me the tracking history for VDT-052025-A")
+
+    try:
+        with ThreadPoolExecutor(6) as pool:
+            answers = list(pool.map(ask, range(6)))
+    finally:
+        ai_service.configure_llm_client(previous)
+        chatbot_services.answer_cache.clear()
+        chatbot_services.router_stats.reset()
+        engine.dispose()
+
+    assert executed == ["batch_history"]
+    assert len({answer.answer for answer in answers}) == 1
+    assert len({id(answer) for answer in answers}) == 6  # each caller gets its own copy
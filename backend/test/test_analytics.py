@@ -0,0 +1,101 @@
+"""
+Tests for services/analytics_service.py
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from models.user_models import BatchTracking, BatchStatus
+from services import analytics_service
+from services.analytics_service import TrackingAnalytics
+
+
+def test_metrics_on_sample_history(db, sample_data):
+    result = analytics_service.get_supply_chain_analytics(db)
+    vitamin = sample_data["products"]["vitamin"].id
+    bob = str(sample_data["employees"]["bob"].id)
+
+    assert result.last_tracking_id == 6
+    # Chennai Plant: 1 day for VDT-A and 3 days for VDT-B; open stays are not counted
+    assert result.dwell_by_location.loc["Chennai Plant", "visits"] == 2
+    assert result.dwell_by_location.loc["Chennai Plant", "mean_hours"] == 48
+    assert result.dwell_by_location.loc["Highway NH48", "visits"] == 1
+    assert "Bangalore Warehouse" not in result.dwell_by_location.index
+
+    lead = result.lead_times_by_product.loc[vitamin]
+    assert lead["manufactured_to_transit_count"] == 2
+    assert lead["manufactured_to_delivered_mean_hours"] == 48
+
+    assert result.handler_throughput.loc[bob, "events"] == 3
+    assert result.handler_throughput.loc[bob, "batches"] == 2
+    assert result.as_dict()["late_deliveries"] == []
+
+
+def test_refresh_is_incremental_and_cached(db, sample_data, monkeypatch):
+    tracker = TrackingAnalytics(chunk_size=2, overlap_ids=2)
+    first = tracker.refresh(db)
+    assert tracker.refresh(db) is first  # no new rows: cached result
+
+    paracetamol = sample_data["products"]["paracetamol"].id
+    db.add(BatchTracking(batch_id=sample_data["batches"]["PCM-062025-A"].id, location="Highway NH44",
+                         status=BatchStatus.IN_TRANSIT, handled_by=sample_data["employees"]["bob"].id,
+                         timestamp=datetime(2025, 6, 7, 8, 0, tzinfo=timezone.utc)))
+    db.commit()
+
+    fetched = []
+    original = analytics_service.iter_event_frames
+
+    def spy(db, after_id=0, chunk_size=analytics_service.CHUNK_SIZE):
+        for frame in original(db, after_id, chunk_size):
+            fetched.append(len(frame))
+            yield frame
+
+    monkeypatch.setattr(analytics_service, "iter_event_frames", spy)
+    second = tracker.refresh(db)
+
+    assert fetched == [2, 1]  # IDs 5-7: the overlap below the last ID plus the new row
+    assert second.last_tracking_id == 7
+    assert second.lead_times_by_product.loc[paracetamol, "manufactured_to_transit_mean_hours"] == 48
+    assert second.dwell_by_location.loc["Chennai Plant", "visits"] == 3
+    assert len(tracker.intervals) == 7  # one row per event, each counted once
+
+
+def test_refresh_picks_up_rows_committed_out_of_id_order(db, sample_data):
+    tracker = TrackingAnalytics()
+    batch_id = sample_data["batches"]["PCM-062025-A"].id
+    bob = sample_data["employees"]["bob"].id
+
+    def scan(tracking_id, location, status, day):
+        db.add(BatchTracking(id=tracking_id, batch_id=batch_id, location=location, status=status, handled_by=bob,
+                             timestamp=datetime(2025, 6, day, tzinfo=timezone.utc)))
+        db.commit()
+
+    scan(20, "Pune Depot", BatchStatus.DELIVERED, 9)
+    assert tracker.refresh(db).last_tracking_id == 20
+    scan(15, "Highway NH44", BatchStatus.IN_TRANSIT, 7)  # drew its ID earlier, committed later
+
+    result = tracker.refresh(db)
+    assert result.last_tracking_id == 20
+    assert result.dwell_by_location.loc["Highway NH44", "visits"] == 1
+    assert len(tracker.intervals) == 8
+    assert tracker.refresh(db) is result
+
+
+def test_late_deliveries_flags_upper_outliers():
+    lead = [10.0, 11.0, 12.0, 10.5, 11.5, 40.0]
+    milestones = pd.DataFrame({
+        "product_id": [1] * len(lead),
+        "manufactured_to_delivered_hours": lead,
+    }, index=pd.Index(range(100, 100 + len(lead)), name="batch_id"))
+
+    late = analytics_service.late_deliveries(milestones)
+    assert list(late.index) == [105]
+    assert late.iloc[0]["threshold_hours"] < 40
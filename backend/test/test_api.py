@@ -0,0 +1,148 @@
+"""
+API tests: the FastAPI app with the async session dependency pointed at aiosqlite
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import json
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from api.schemas import BatchPage, TrackingPage, ProductLookup
+from app.config import settings
+from app.main import app
+from database.async_database import get_async_db
+from models.user_models import Batch, BatchStatus, BatchTracking, Employee
+from services import async_crud_service, tracking_partition_service
+from sqlalchemy import select
+
+
+@pytest_asyncio.fixture
+async def client(async_db):
+    async def override_get_async_db():
+        yield async_db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+
+
+async def _employee_id(async_db, email):
+    return str((await async_db.execute(select(Employee.id).where(Employee.email == email))).scalar_one())
+
+
+@pytest.mark.asyncio
+async def test_bulk_ingest_ndjson(client, async_db):
+    bob = await _employee_id(async_db, "bob@example.com")
+    body = "\n".join([
+        json.dumps({"batch_code": "PCM-062025-A", "location": "Highway NH44", "status": "In Transit",
+                    "handled_by": bob, "timestamp": "2025-06-10T09:00:00Z"}),
+        json.dumps({"batch_code": "MISSING", "location": "X", "status": "In Transit", "handled_by": bob}),
+    ])
+
+    response = await client.post("/api/batches/tracking/bulk?chunk_size=1", content=body,
+                                 headers={"content-type": "application/x-ndjson"})
+
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["received"], report["accepted"], report["rejected"]) == (2, 1, 1)
+    assert report["rejects"][0]["row"] == 2
+    assert await async_crud_service.get_current_batch_location(async_db, "PCM-062025-A") == "Highway NH44"
+
+
+@pytest.mark.asyncio
+async def test_bulk_ingest_csv(client, async_db):
+    alice = await _employee_id(async_db, "alice@example.com")
+    body = f"batch_code,location,status,handled_by\r\nVDT-052025-B,Mysore Depot,Delivered,{alice}\r\n"
+
+    response = await client.post("/api/batches/tracking/bulk", content=body,
+                                 headers={"content-type": "text/csv"})
+
+    assert response.json()["accepted"] == 1
+    assert await async_crud_service.get_current_batch_location(async_db, "VDT-052025-B") == "Mysore Depot"
+
+
+@pytest.mark.asyncio
+async def test_bulk_ingest_rejects_bad_csv_header(client):
+    response = await client.post("/api/batches/tracking/bulk?format=csv", content="code,where\n")
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_multi_key_lookup_endpoints(client, async_db):
+    response = await client.post("/api/batches/lookup", json={"batch_codes": ["VDT-052025-B", "NOPE", "PCM-062025-A"]})
+    body = response.json()
+    assert [(b["batch_code"], b["status"]) for b in body["items"]] == [
+        ("VDT-052025-B", "In Transit"), ("PCM-062025-A", "Manufactured")
+    ]
+    assert body["missing"] == ["NOPE"]
+
+    bob = await _employee_id(async_db, "bob@example.com")
+    employees = (await client.post("/api/batches/lookup/employees", json={"employee_ids": [bob, "x"]})).json()
+    assert ([e["department"] for e in employees["items"]], employees["missing"]) == (["Logistics"], ["x"])
+
+    products = (await client.post("/api/batches/lookup/products", json={"product_ids": [2, 1]})).json()
+    assert [p["name"] for p in products["items"]] == ["Paracetamol 500mg", "Vitamin D Tablets"]
+
+    assert (await client.post("/api/batches/lookup", json={"batch_codes": []})).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_batch_list_and_tracking_history_match_response_models(client):
+    response = await client.get("/api/batches", params={"limit": 2})
+    assert response.headers["content-type"] == "application/json"
+    page = BatchPage.model_validate_json(response.content)
+    assert [b.batch_code for b in page.items] == ["VDT-052025-A", "VDT-052025-B"] and page.next_cursor
+
+    history = TrackingPage.model_validate_json((await client.get("/api/batches/VDT-052025-A/tracking")).content)
+    assert [(t.status, t.handler_department) for t in history.items] == [
+        ("Manufactured", "Quality Assurance"), ("In Transit", "Logistics"), ("Delivered", "Logistics")
+    ]
+
+    products = ProductLookup.model_validate_json(
+        (await client.post("/api/batches/lookup/products", json={"product_ids": [1]})).content
+    )
+    assert str(products.items[0].unit_price) == "120.00"
+
+
+def _deliver_and_archive_june(db):
+    bob = db.scalar(select(Employee).where(Employee.email == "bob@example.com"))
+    for code in ["VDT-052025-B", "PCM-062025-A"]:
+        db.add(BatchTracking(batch_id=db.scalar(select(Batch.id).where(Batch.batch_code == code)),
+                             location="Final Depot", status=BatchStatus.DELIVERED, handled_by=bob.id,
+                             timestamp=datetime(2025, 8, 2, tzinfo=timezone.utc)))
+    db.commit()
+    tracking_partition_service.archive_closed_partitions(db, now=datetime(2026, 1, 15, tzinfo=timezone.utc))
+
+
+@pytest.mark.asyncio
+async def test_tracking_history_endpoint_includes_archived_months(client, async_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TRACKING_ARCHIVE_DIR", str(tmp_path / "archive"))
+    await async_db.run_sync(_deliver_and_archive_june)
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = TrackingPage.model_validate_json((await client.get("/api/batches/VDT-052025-B/tracking",
+                                                                  params=params)).content)
+        pages.append([(t.location, t.handler_department) for t in page.items])
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    # June is archived, the August delivery is live
+    assert pages == [[("Chennai Plant", "Quality Assurance"), ("Highway NH48", "Logistics")],
+                     [("Final Depot", "Logistics")]]
+
+    archived_only = TrackingPage.model_validate_json((await client.get("/api/batches/VDT-052025-A/tracking")).content)
+    assert [t.location for t in archived_only.items] == ["Chennai Plant", "Highway NH48", "Bangalore Warehouse"]
@@ -0,0 +1,66 @@
+"""
+Tests for services/async_crud_service.py on an aiosqlite database
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import asyncio
+import inspect
+
+import pytest
+
+from models.user_models import BatchStatus
+from services import crud_service, async_crud_service
+
+
+def test_every_crud_function_has_an_async_version():
+    sync_names = {name for name, fn in inspect.getmembers(crud_service, inspect.isfunction)
+                  if fn.__module__ == crud_service.__name__ and not name.startswith("_")}
+    missing = {name for name in sync_names
+               if not inspect.iscoroutinefunction(getattr(async_crud_service, name, None))}
+    assert missing == set()
+
+
+@pytest.mark.asyncio
+async def test_async_lookups(async_db):
+    batch = await async_crud_service.get_batch_by_code(async_db, "VDT-052025-A")
+    assert batch.product.name == "Vitamin D Tablets"
+    assert len(batch.tracking_records) == 3
+
+    assert await async_crud_service.get_current_batch_location(async_db, "VDT-052025-B") == "Highway NH48"
+
+    page = await async_crud_service.get_batches_by_status(async_db, BatchStatus.MANUFACTURED)
+    assert [b.batch_code for b in page.items] == ["PCM-062025-A"]
+
+    stats = await async_crud_service.get_batch_statistics(async_db)
+    assert stats["total_batches"] == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sessions_share_the_engine(async_db):
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    async def lookup(code):
+        async with AsyncSession(async_db.bind) as session:
+            return await async_crud_service.get_batch_current_status(session, code)
+
+    statuses = await asyncio.gather(*(lookup(code) for code in ["VDT-052025-A", "VDT-052025-B", "PCM-062025-A"]))
+    assert statuses == [BatchStatus.DELIVERED, BatchStatus.IN_TRANSIT, BatchStatus.MANUFACTURED]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_cache_misses_on_one_key_do_not_block_the_loop(async_db):
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    async def lookup():
+        async with AsyncSession(async_db.bind) as session:
+            return await async_crud_service.get_current_batch_location(session, "VDT-052025-B")
+
+    # run_sync executes on the event-loop thread, where waiting for another caller's load would deadlock
+    locations = await asyncio.wait_for(asyncio.gather(*(lookup() for _ in range(5))), timeout=10)
+    assert locations == ["Highway NH48"] * 5
@@ -0,0 +1,214 @@
+"""
+Tests for the columnar dashboard snapshot (services/batch_snapshot.py)
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import threading
+import time
+from datetime import date, datetime, timezone
+
+import httpx
+import numpy as np
+import pytest
+from sqlalchemy import insert
+
+from app.main import app
+from database.async_database import get_async_db
+from models.user_models import Batch, BatchTracking, BatchStatus
+from services import batch_snapshot, crud_service
+from services.batch_snapshot import BatchSnapshot, COLUMNS
+from services.query_metrics_service import instrument_engine, track_queries
+from services.realtime_service import TrackingEvent
+
+
+def _event(tracking_id, batch_id, status="In Transit", location="Highway NH44",
+           timestamp="2025-06-20T10:00:00+00:00"):
+    return TrackingEvent(tracking_id=tracking_id, batch_id=batch_id, batch_code="", product_id=0,
+                         status=status, location=location, timestamp=timestamp)
+
+
+def test_bulk_build_and_vectorized_filters(db, sample_data):
+    result = crud_service.get_batch_state_snapshot(db)
+    assert (result.batches, result.quantity) == (3, 1800)
+    assert {status: totals.batches for status, totals in result.by_status.items()} == {
+        "Manufactured": 1, "In Transit": 1, "Delivered": 1
+    }
+    assert result.by_location["Highway NH48"].quantity == 300
+    assert [item.expiry_date for item in result.items] == [date(2026, 12, 1), date(2027, 5, 1), date(2027, 5, 15)]
+
+    in_transit = crud_service.get_batch_state_snapshot(db, status=["In Transit", "Manufactured"],
+                                                       expiry_to=date(2027, 5, 10))
+    assert [item.location for item in in_transit.items] == ["Chennai Plant"]
+
+    vitamin = sample_data["products"]["vitamin"].id
+    assert crud_service.get_batch_state_snapshot(db, product_id=vitamin, limit=0).batches == 2
+    assert crud_service.get_batch_state_snapshot(db, location="Nowhere").batches == 0
+
+
+def test_tracking_events_update_state_without_queries(engine, db, sample_data):
+    batch = sample_data["batches"]["PCM-062025-A"]
+    snapshot = batch_snapshot.get_batch_snapshot(db)
+
+    db.add(BatchTracking(batch_id=batch.id, location="Highway NH44", status=BatchStatus.IN_TRANSIT,
+                         handled_by=batch.created_by, timestamp=datetime(2025, 6, 10, tzinfo=timezone.utc)))
+    db.commit()  # delivered to the snapshot through the in-process notifier
+
+    instrument_engine(engine)
+    with track_queries() as stats:
+        result = snapshot.query(location="Highway NH44")
+    assert stats.query_count == 0
+    assert [(item.batch_id, item.status) for item in result.items] == [(batch.id, "In Transit")]
+
+    # an older event (e.g. a late notification) does not overwrite the newer state
+    assert snapshot.apply_events([_event(1, batch.id, "Manufactured", "Chennai Plant",
+                                         "2025-06-02T00:00:00+00:00")]) == 0
+    # of several events for one batch, the newest wins
+    assert snapshot.apply_events([_event(901, batch.id, "Delivered", "Pune Depot", "2025-06-12T00:00:00+00:00"),
+                                  _event(900, batch.id, "In Transit", "Highway NH48",
+                                         "2025-06-11T00:00:00+00:00")]) == 1
+    assert snapshot.query(status="Delivered", location="Pune Depot").batches == 1
+
+
+def test_pushed_events_never_wait_for_a_busy_snapshot(db, sample_data):
+    batch = sample_data["batches"]["PCM-062025-A"]
+    snapshot = batch_snapshot.get_batch_snapshot(db)
+    holding, done = threading.Event(), threading.Event()
+
+    def hold_lock():  # stands in for a request streaming a catch-up
+        with snapshot._lock:
+            holding.set()
+            done.wait(5)
+
+    holder = threading.Thread(target=hold_lock)
+    holder.start()
+    holding.wait(5)
+    started = time.perf_counter()
+    batch_snapshot.apply_tracking_events([_event(902, batch.id, "Delivered", "Pune Depot",
+                                                 "2025-06-12T00:00:00+00:00")])
+    assert time.perf_counter() - started < 0.5  # the event loop would have stalled here
+    assert snapshot.stats()["queued_pushes"] == 1
+    done.set()
+    holder.join()
+
+    assert snapshot.query(location="Pune Depot").batches == 1  # applied by the next reader
+    assert snapshot.stats()["queued_pushes"] == 0
+
+
+def test_catch_up_reads_only_new_batches_and_edits_apply_on_commit(db, sample_data):
+    snapshot = batch_snapshot.get_batch_snapshot(db)
+    new = Batch(batch_code="VDT-072025-A", product_id=sample_data["products"]["vitamin"].id, quantity=10,
+                created_by=sample_data["employees"]["alice"].id, manufactured_date=date(2025, 7, 1),
+                expiry_date=date(2027, 7, 1))
+    db.add(new)
+    db.commit()
+    snapshot.catch_up(db, force=True)
+    assert snapshot.query().by_status[None].batches == 1  # no tracking events yet
+
+    new.quantity = 25
+    db.commit()
+    vitamin = new.product_id
+    assert snapshot.query(product_id=vitamin).quantity == 500 + 300 + 25
+
+    new.quantity = 99
+    db.flush()
+    db.rollback()  # rolled back edits never reach the snapshot
+    assert snapshot.query(product_id=vitamin).quantity == 825
+
+    db.delete(new)
+    db.commit()
+    assert snapshot.query(product_id=vitamin).batches == 2
+    assert len(snapshot) == 3 and snapshot.last_batch_id == new.id
+
+
+def test_catch_up_picks_up_rows_committed_out_of_id_order(engine, db, sample_data):
+    snapshot = batch_snapshot.get_batch_snapshot(db)
+    vitamin, alice = sample_data["products"]["vitamin"].id, sample_data["employees"]["alice"].id
+    pcm = sample_data["batches"]["PCM-062025-A"].id
+
+    def write(table, **values):  # another worker's commit: no session hooks, no notification
+        with engine.begin() as connection:
+            connection.execute(insert(table).values(**values))
+
+    def batch(batch_id):
+        write(Batch, id=batch_id, batch_code=f"VDT-0{batch_id}2025-A", product_id=vitamin, quantity=10,
+              created_by=alice, manufactured_date=date(2025, 7, 1), expiry_date=date(2027, 7, 1))
+
+    def scan(tracking_id, batch_id, location):
+        write(BatchTracking, id=tracking_id, batch_id=batch_id, location=location, status=BatchStatus.IN_TRANSIT,
+              handled_by=alice, timestamp=datetime(2025, 7, tracking_id % 28 + 1, tzinfo=timezone.utc))
+
+    batch(10)
+    scan(30, 10, "Pune Depot")
+    snapshot.catch_up(db, force=True)
+    batch(7)  # drew its ID before 10, committed after the catch-up
+    scan(25, pcm, "Highway NH44")
+    snapshot.catch_up(db, force=True)
+
+    assert snapshot.column("batch_id").tolist() == sorted(snapshot.column("batch_id").tolist())
+    assert snapshot.query(product_id=vitamin).batches == 4
+    assert [item.batch_id for item in snapshot.query(location="Highway NH44").items] == [pcm]
+    assert (snapshot.last_batch_id, snapshot.last_tracking_id) == (10, 30)
+
+
+def test_million_batches_fit_in_tens_of_megabytes():
+    n = 1_000_000
+    snapshot = BatchSnapshot()
+    snapshot._reserve(n)
+    rng = np.random.default_rng(5)
+    for name, values in {
+        "batch_id": np.arange(1, n + 1),
+        "product_id": rng.integers(1, 500, n),
+        "quantity": rng.integers(1, 1000, n),
+        "expiry": rng.integers(19000, 21000, n),
+        "status": rng.integers(0, 3, n),
+        "location": rng.integers(0, 200, n),
+        "updated_at": np.zeros(n),
+        "tracking_id": np.arange(n),
+        "alive": np.ones(n),
+    }.items():
+        snapshot.arrays[name][:n] = values.astype(COLUMNS[name])
+    snapshot.locations = [f"Location {i}" for i in range(200)]
+    snapshot.location_codes = {name: i for i, name in enumerate(snapshot.locations)}
+    snapshot.size = n
+
+    assert snapshot.nbytes() < 40 * 1024 * 1024
+
+    started = time.perf_counter()
+    result = snapshot.query(status="In Transit", location=["Location 3", "Location 7"], limit=20)
+    assert time.perf_counter() - started < 0.5
+    assert result.batches == sum(totals.batches for totals in result.by_location.values())
+    assert [item.expiry_date for item in result.items] == sorted(item.expiry_date for item in result.items)
+
+    events = [_event(n + 1, 12345, timestamp="2030-01-01T00:00:00+00:00")]
+    started = time.perf_counter()
+    for _ in range(100):
+        snapshot.apply_events(events)
+    assert (time.perf_counter() - started) / 100 < 0.005
+    assert snapshot.query(location="Highway NH44").items[0].batch_id == 12345
+
+
+@pytest.mark.asyncio
+async def test_snapshot_endpoint(async_db, sample_data):
+    async def override():
+        yield async_db
+
+    app.dependency_overrides[get_async_db] = override
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/api/batches/snapshot",
+                                        params=[("status", "Manufactured"), ("status", "In Transit"), ("limit", 1)])
+            bad_status = await client.get("/api/batches/snapshot", params={"status": "Lost"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["batches"] == 2
+    assert [item["expiry_date"] for item in body["items"]] == ["2026-12-01"]
+    assert bad_status.status_code == 422
@@ -0,0 +1,109 @@
+"""
+Tests for database/sample_data.py and the benchmarks/ harness
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import json
+
+import pytest
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from api.schemas import BatchPage, TrackingPage
+from benchmarks import harness, bench_serialization, bench_statements
+from benchmarks.bench_crud import CACHED_CASES, IN_MEMORY_CASES, run_benchmarks
+from database import sample_data
+from models.user_models import Batch, BatchTracking, BatchCurrentState
+
+
+def _generate(seed):
+    scale = sample_data.SCALES["tiny"]
+    departments = sample_data.department_rows(scale, seed)
+    employees = sample_data.employee_rows(scale, seed, departments)
+    products = sample_data.product_rows(scale, seed)
+    batches = list(sample_data.batch_rows(scale, seed, products, employees))
+    tracking = list(sample_data.tracking_rows(scale, seed, employees))
+    return departments, employees, products, batches, tracking
+
+
+def test_generator_is_deterministic():
+    assert _generate(7) == _generate(7)
+    assert _generate(7) != _generate(8)
+
+
+@pytest.fixture
+def loaded(engine):
+    with engine.begin() as connection:
+        counts = sample_data.load_sample_data(connection, scale="tiny", seed=3, chunk_size=16)
+    return counts
+
+
+def test_load_tiny_scale(engine, db, loaded):
+    assert loaded["batches"] == sample_data.SCALES["tiny"].batches
+    assert db.scalar(select(func.count()).select_from(Batch)) == loaded["batches"]
+    assert db.scalar(select(func.count()).select_from(BatchTracking)) == loaded["batch_tracking"]
+    # every batch has at least one event, so every batch has a current state row
+    assert db.scalar(select(func.count()).select_from(BatchCurrentState)) == loaded["batches"]
+
+
+def test_percentile_interpolates():
+    values = [10, 1, 2, 3, 4, 5, 6, 7, 8, 9]
+    assert harness.percentile(values, 50) == pytest.approx(5.5)
+    assert harness.percentile(values, 100) == 10
+    assert harness.percentile([3.0], 95) == 3.0
+
+
+def test_compare_flags_latency_and_query_regressions():
+    baseline = {"cases": {"a": {"p95_ms": 10.0, "queries_per_call": 1},
+                          "b": {"p95_ms": 0.1, "queries_per_call": 1}}}
+    current = {"cases": {"a": {"p95_ms": 20.0, "queries_per_call": 1},
+                         "b": {"p95_ms": 0.3, "queries_per_call": 2}}}
+    regressions = harness.compare(current, baseline, tolerance=0.25, min_delta_ms=0.5)
+    assert any(line.startswith("a: p95") for line in regressions)
+    # b tripled but stays under the noise floor; only its extra query counts
+    assert [line for line in regressions if line.startswith("b")] == ["b: queries/call 1 -> 2"]
+    assert harness.compare(baseline, baseline) == []
+
+
+def test_bench_crud_smoke(engine, loaded):
+    data, results = run_benchmarks(engine, "tiny", seed=3, iterations=2, warmup=0)
+    assert data["dialect"] == "sqlite"
+    assert {"get_batch_by_code", "get_batches_by_codes", "get_expiring_batches",
+            "suggest_similar", "get_batch_state_snapshot"} <= set(data["cases"])
+    for result in results:
+        assert result.p50_ms <= result.p95_ms <= result.p99_ms
+        if result.name not in IN_MEMORY_CASES | CACHED_CASES:
+            assert result.queries_per_call >= 1
+
+
+def test_serialization_benchmark_encoders_agree():
+    for rows, page_model in ((bench_serialization.batch_rows(50), BatchPage),
+                             (bench_serialization.tracking_rows(50), TrackingPage)):
+        outputs = {name: json.loads(fn()) for name, fn in bench_serialization.encoders(rows, page_model).items()}
+        assert outputs["orjson_rows"] == outputs["jsonable_encoder"]
+        # pydantic writes UTC as "Z"; compare as parsed models
+        assert page_model.model_validate(outputs["orjson_rows"]) == page_model.model_validate(outputs["pydantic_models"])
+
+    results = bench_serialization.run(batches=200, tracking=200, runs=1)
+    assert {(r.case, r.encoder) for r in results} == {
+        (case, encoder) for case in ("batch_list", "tracking_history")
+        for encoder in ("jsonable_encoder", "pydantic_models", "orjson_rows")
+    }
+
+
+def test_statement_benchmark_compares_identical_lookups():
+    engine = bench_statements.create_sample_engine()
+    with Session(engine) as db:
+        for name, (before, after, keys) in bench_statements.lookups(engine).items():
+            for key in keys[:5]:
+                assert before(db, key) is after(db, key), name
+
+    results = bench_statements.run(engine, calls=20, repeats=1)
+    assert [r.lookup for r in results] == list(bench_statements.lookups(engine))
+    assert all(r.query_chain_us > 0 and r.statement_us > 0 for r in results)
@@ -0,0 +1,153 @@
+"""
+Tests for services/cache_service.py
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import json
+
+import pytest
+from sqlalchemy import event
+
+from models.user_models import BatchTracking, BatchCurrentState, BatchStatus, Product
+from services import cache_service, crud_service, ingestion_service
+from services.cache_service import LRUTTLCache, FakeRedis, RedisTier, TwoTierCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def cache():
+    """Fresh two-tier cache backed by FakeRedis for each test"""
+    previous = cache_service.cache
+    new_cache = TwoTierCache(LRUTTLCache(max_entries=100, ttl=30), RedisTier(FakeRedis(), ttl=600))
+    cache_service.configure_cache(new_cache)
+    yield new_cache
+    cache_service.configure_cache(previous)
+
+
+@pytest.fixture
+def query_counter(engine):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    yield statements
+    event.remove(engine, "before_cursor_execute", count)
+
+
+def test_lru_eviction_and_ttl():
+    clock = FakeClock()
+    lru = LRUTTLCache(max_entries=2, ttl=10, clock=clock)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1          # a is now most recently used
+    lru.set("c", 3)                   # evicts b
+    assert lru.get("b", None) is None
+    clock.now = 11
+    assert lru.get("a", None) is None
+    assert lru.stats() == {"entries": 1, "max_entries": 2, "hits": 1, "misses": 2,
+                           "evictions": 1, "expirations": 1}
+
+
+def test_read_through_hits_skip_the_database(db, sample_data, cache, query_counter):
+    first = cache_service.get_batch_by_code(db, "VDT-052025-A")
+    assert first["current_status"] == "Delivered"
+    assert first["product"]["name"] == "Vitamin D Tablets"
+    assert first["creator"]["department"]["name"] == "Quality Assurance"
+
+    queries = len(query_counter)
+    assert cache_service.get_batch_by_code(db, "VDT-052025-A") == first
+    assert len(query_counter) == queries
+
+    assert cache_service.get_batch_by_code(db, "NOPE") is None
+    queries = len(query_counter)
+    assert cache_service.get_batch_by_code(db, "NOPE") is None
+    assert len(query_counter) == queries
+
+
+def test_redis_tier_serves_other_workers(db, sample_data, cache):
+    cache_service.get_product_by_id(db, sample_data["products"]["vitamin"].id)
+    cache.local.clear()
+    assert cache_service.get_product_by_id(db, sample_data["products"]["vitamin"].id)["category"] == "Supplements"
+    assert cache.remote.hits == 1
+    json.dumps(cache.stats())
+
+
+def test_tracking_write_invalidates_batch(db, sample_data, cache):
+    assert cache_service.get_batch_by_code(db, "PCM-062025-A")["current_location"] == "Chennai Plant"
+
+    batch = sample_data["batches"]["PCM-062025-A"]
+    db.add(BatchTracking(batch_id=batch.id, location="Highway NH44", status=BatchStatus.IN_TRANSIT,
+                         handled_by=sample_data["employees"]["bob"].id))
+    db.commit()
+
+    assert cache_service.get_batch_by_code(db, "PCM-062025-A")["current_location"] == "Highway NH44"
+
+
+def test_rollback_keeps_cache(db, sample_data, cache):
+    product = db.get(Product, sample_data["products"]["vitamin"].id)
+    cache_service.get_product_by_id(db, product.id)
+    product.name = "Renamed"
+    db.flush()
+    db.rollback()
+    assert cache.local.get(cache_service.product_key(product.id))["name"] == "Vitamin D Tablets"
+
+
+def test_product_update_and_bulk_ingest_invalidate(db, sample_data, cache):
+    vitamin = sample_data["products"]["vitamin"]
+    assert cache_service.get_batch_by_code(db, "VDT-052025-B")["product"]["name"] == "Vitamin D Tablets"
+
+    vitamin.name = "Vitamin D3 Tablets"
+    db.commit()
+    assert cache_service.get_batch_by_code(db, "VDT-052025-B")["product"]["name"] == "Vitamin D3 Tablets"
+
+    bob = str(sample_data["employees"]["bob"].id)
+    lines = [json.dumps({"batch_code": "VDT-052025-B", "location": "Mysore Depot",
+                         "status": "Delivered", "handled_by": bob})]
+    ingestion_service.ingest_tracking_events(db, ingestion_service.parse_ndjson(lines))
+    assert cache_service.get_batch_by_code(db, "VDT-052025-B")["current_status"] == "Delivered"
+
+
+def test_data_versions_local_and_redis():
+    for versions in (cache_service.DataVersions(stripes=8), cache_service.RedisDataVersions(FakeRedis(), stripes=8)):
+        before = versions.snapshot([1, 2])
+        versions.bump([1])
+        after = versions.snapshot([1, 2])
+        assert after[1] == before[1] + 1 and after[2] == before[2]
+        assert versions.global_version() == 1
+        versions.bump([])  # non-batch writes still move the global version
+        assert versions.global_version() == 2
+        before = versions.snapshot([1, 2])
+        versions.bump_all()  # backfills move every batch at once
+        after = versions.snapshot([1, 2])
+        assert after[1] != before[1] and after[2] != before[2] and versions.global_version() == 3
+
+
+def test_current_state_rebuild_clears_both_tiers(db, sample_data, cache):
+    batch_id = sample_data["batches"]["PCM-062025-A"].id
+    # A gap in the projection that only the rebuild repairs; bulk deletes skip the invalidation listener
+    db.query(BatchCurrentState).filter(BatchCurrentState.batch_id == batch_id).delete()
+    db.commit()
+    assert cache_service.get_batch_by_code(db, "PCM-062025-A")["current_location"] is None
+    before = cache_service.versions.snapshot([batch_id])
+
+    crud_service.rebuild_batch_current_state(db)
+    assert cache_service.versions.snapshot([batch_id]) != before
+    other_worker = TwoTierCache(LRUTTLCache(max_entries=100, ttl=30), cache.remote)
+    cache_service.configure_cache(other_worker)
+    assert cache_service.get_batch_by_code(db, "PCM-062025-A")["current_location"] == "Chennai Plant"
+    assert cache.remote.hits == 0
@@ -0,0 +1,204 @@
+"""
+Tests for the chatbot fast-path router (services/chatbot_services.py)
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import subprocess
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+
+from app.main import app
+from database.database import get_db
+from models.user_models import BatchTracking, BatchStatus
+from app.config import settings
+from services import ai_service, cache_service, chatbot_services, crud_service
+from services.ai_service import StubLLMClient
+from services.chatbot_services import ChatAnswer, ChatAnswerCache
+from services.query_metrics_service import instrument_engine, track_queries
+
+
+@pytest.fixture
+def llm():
+    stub = StubLLMClient("Here is a general answer.")
+    previous = ai_service.get_llm_client()
+    ai_service.configure_llm_client(stub)
+    chatbot_services.router_stats.reset()
+    chatbot_services.answer_cache.clear()
+    yield stub
+    ai_service.configure_llm_client(previous)
+    chatbot_services.router_stats.reset()
+    chatbot_services.answer_cache.clear()
+
+
+@pytest.mark.parametrize("question, intent, expected", [
+    ("Where is batch VDT-052025-A?", "batch_location", "Bangalore Warehouse"),
+    ("status of vdt-052025-b", "batch_status", "In Transit at Highway NH48"),
+    ("Show me the tracking history for VDT-052025-A", "batch_history", "Delivered at Bangalore Warehouse (Bob Raj)"),
+    ("who handled VDT-052025-A", "batch_handlers", "Alice Kumar, Bob Raj"),
+    ("when does PCM-062025-A expire", "batch_expiry", "2026-12-01"),
+    ("Which batches are in transit?", "batches_by_status", "VDT-052025-B"),
+    ("any paracetamol batches?", "product_batches", "PCM-062025-A"),
+])
+def test_fast_path_answers_without_llm(db, sample_data, llm, question, intent, expected):
+    answer = chatbot_services.answer_question(db, question)
+    assert (answer.path, answer.intent) == ("fast", intent)
+    assert expected in answer.answer
+    assert llm.prompts == []
+
+
+def test_unknown_batch_suggests_neighbours(db, sample_data, llm):
+    answer = chatbot_services.answer_question(db, "where is VDT-052025-Z")
+    assert answer.intent == "unknown_batch"
+    assert answer.data["suggestions"] == ["VDT-052025-A", "VDT-052025-B"]
+
+    # an unknown prefix in the PREFIX-MMYYYY-N shape is still a batch lookup, not an LLM call
+    assert chatbot_services.answer_question(db, "status of ZZZ-012020-1").intent == "unknown_batch"
+    assert llm.prompts == []
+
+
+def test_open_questions_go_to_llm_and_stats_track_fractions(db, sample_data, llm):
+    chatbot_services.answer_question(db, "Where is VDT-052025-A?")
+    chatbot_services.answer_question(db, "How does COVID-19 affect our cold chain policy?")
+    chatbot_services.answer_question(db, "status of PCM-062025-A")
+    answer = chatbot_services.answer_question(db, "Summarise last quarter for the board")
+
+    assert answer.path == "llm" and answer.answer == "Here is a general answer."
+    assert len(llm.prompts) == 2
+    stats = chatbot_services.router_stats.snapshot()
+    assert stats["total"] == 4
+    assert stats["paths"]["fast"]["fraction"] == 0.5
+    assert stats["paths"]["llm"]["count"] == 2
+
+
+def test_llm_failure_is_reported(db, sample_data, llm):
+    def fail(prompt):
+        raise ai_service.LLMError("quota exceeded")
+
+    llm.reply = fail
+    answer = chatbot_services.answer_question(db, "Tell me a joke")
+    assert (answer.path, answer.intent) == ("llm", "llm_error")
+
+
+def test_entity_index_picks_up_new_batches(db, sample_data):
+    from datetime import date
+    from models.user_models import Batch
+
+    index = chatbot_services.get_entity_index(db)
+    assert "VDT" in index.code_prefixes and "NEW" not in index.code_prefixes
+    db.add(Batch(product_id=sample_data["products"]["vitamin"].id, batch_code="NEW-012026-A", quantity=1,
+                 manufactured_date=date(2026, 1, 1), expiry_date=date(2027, 1, 1),
+                 created_by=sample_data["employees"]["alice"].id))
+    db.commit()
+    assert "NEW" in chatbot_services.get_entity_index(db).code_prefixes
+
+
+def _move(db, sample_data, code, location, day):
+    db.add(BatchTracking(batch_id=sample_data["batches"][code].id, location=location,
+                         status=BatchStatus.IN_TRANSIT, handled_by=sample_data["employees"]["bob"].id,
+                         timestamp=datetime(2025, 6, day, tzinfo=timezone.utc)))
+    db.commit()
+
+
+def test_repeat_questions_are_served_from_cache_without_sql(engine, db, sample_data, llm):
+    instrument_engine(engine)
+    first = chatbot_services.answer_question(db, "Where is batch VDT-052025-B?")
+    with track_queries() as stats:
+        second = chatbot_services.answer_question(db, "where is vdt-052025-b")
+
+    assert (first.cached, second.cached) == (False, True)
+    assert second.answer == first.answer
+    assert stats.query_count == 0
+
+
+def test_batch_lookups_read_through_the_lookup_cache(engine, db, sample_data, llm, monkeypatch):
+    monkeypatch.setattr(settings, "CHAT_CACHE_ENABLED", False)  # no answer cache: only the lookup cache helps
+    instrument_engine(engine)
+    chatbot_services.answer_question(db, "Where is batch VDT-052025-B?")
+    with track_queries() as stats:
+        status = chatbot_services.answer_question(db, "status of VDT-052025-B")
+        expiry = chatbot_services.answer_question(db, "when does VDT-052025-B expire")
+    assert "In Transit at Highway NH48" in status.answer
+    assert "2027-05-15" in expiry.answer
+    assert stats.query_count == 0
+
+    _move(db, sample_data, "VDT-052025-B", "Mysore Depot", 12)  # the commit drops the cached record
+    assert "Mysore Depot" in chatbot_services.answer_question(db, "where is VDT-052025-B").answer
+    assert crud_service.get_current_batch_location(db, "VDT-052025-B") == "Mysore Depot"
+
+
+def test_tracking_write_invalidates_only_that_batch(db, sample_data, llm):
+    chatbot_services.answer_question(db, "where is VDT-052025-B")
+    chatbot_services.answer_question(db, "where is PCM-062025-A")
+
+    _move(db, sample_data, "VDT-052025-B", "Pune Hub", 10)
+
+    moved = chatbot_services.answer_question(db, "where is VDT-052025-B")
+    untouched = chatbot_services.answer_question(db, "where is PCM-062025-A")
+    assert not moved.cached and "Pune Hub" in moved.answer
+    assert untouched.cached
+    # list answers depend on every batch, so any write refreshes them
+    chatbot_services.answer_question(db, "which batches are in transit")
+    _move(db, sample_data, "PCM-062025-A", "Highway NH44", 11)
+    listing = chatbot_services.answer_question(db, "which batches are in transit")
+    assert not listing.cached and "PCM-062025-A" in listing.answer
+
+    stats = chatbot_services.answer_cache.stats()
+    assert stats["hits"] == 1 and stats["stale"] == 2
+
+
+def test_llm_answers_are_cached_by_normalized_question(db, sample_data, llm):
+    chatbot_services.answer_question(db, "Summarise last quarter for the board!")
+    answer = chatbot_services.answer_question(db, "summarise last  quarter for the board")
+    assert answer.cached and answer.path == "llm"
+    assert len(llm.prompts) == 1
+
+
+def test_answer_cache_is_bounded_lru():
+    cache = ChatAnswerCache(max_entries=2, ttl=60)
+    version = cache_service.versions.global_version()
+    for key in "abc":
+        cache.put(key, ChatAnswer(key, "llm", "open_question", batch_ids=[]), version)
+    assert cache.get("a") is None
+    assert cache.get("c").answer == "c"
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"], stats["hit_ratio"]) == (2, 1, 0.5)
+
+
+@pytest.mark.asyncio
+async def test_chat_endpoint(db, sample_data, llm):
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.post("/api/chat", json={"question": "where is VDT-052025-B"})
+            stats = (await client.get("/api/chat/stats")).json()
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json()["path"] == "fast"
+    assert "Highway NH48" in response.json()["answer"]
+    assert stats["paths"]["fast"]["count"] == 1
+
+
+@pytest.mark.parametrize("chat_cache, redis, enabled", [
+    (None, "False", False),   # process-local versions: other workers' writes would not reach them
+    (None, "True", True),
+    ("true", "False", True),  # single worker, set explicitly
+    ("false", "True", False),
+])
+def test_answer_cache_is_on_by_default_only_with_shared_versions(chat_cache, redis, enabled):
+    env = {key: value for key, value in os.environ.items() if key != "CHAT_CACHE_ENABLED"}
+    env["CACHE_REDIS_ENABLED"] = redis
+    if chat_cache is not None:
+        env["CHAT_CACHE_ENABLED"] = chat_cache
+    completed = subprocess.run([sys.executable, "-c", "from app.config import settings; print(settings.CHAT_CACHE_ENABLED)"],
+                               cwd=parent_dir, env=env, capture_output=True, text=True, check=True)
+    assert completed.stdout == f"{enabled}\n"
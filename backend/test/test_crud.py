@@ -0,0 +1,254 @@
+"""
+Tests for services/crud_service.py against the in-memory SQLite fixture
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import pytest
+import uuid
+from datetime import date, datetime, timezone
+
+from app.config import settings
+
+from models.user_models import Batch, BatchTracking, BatchCurrentState, BatchStatus
+from sqlalchemy.exc import InvalidRequestError
+from services import crud_service, loader_profiles, projections, statements
+from services.bulk_lookup import fetch_by_keys
+from services.query_metrics_service import instrument_engine, track_queries
+
+
+# =============================================================================
+# CURRENT STATE PROJECTION
+# =============================================================================
+
+def test_current_state_follows_latest_tracking_record(db, sample_data):
+    state = crud_service.get_batch_current_state(db, "VDT-052025-A")
+    assert state.status == BatchStatus.DELIVERED
+    assert state.location == "Bangalore Warehouse"
+    assert state.handled_by == sample_data["employees"]["bob"].id
+
+    assert crud_service.get_batch_current_status(db, "VDT-052025-B") == BatchStatus.IN_TRANSIT
+    assert crud_service.get_current_batch_location(db, "PCM-062025-A") == "Chennai Plant"
+    assert crud_service.get_batch_current_status(db, "UNKNOWN") is None
+
+
+def test_current_state_ignores_out_of_order_events(db, sample_data):
+    batch = sample_data["batches"]["VDT-052025-B"]
+    db.add(BatchTracking(batch_id=batch.id, location="Late Scan Depot", status=BatchStatus.MANUFACTURED,
+                         handled_by=sample_data["employees"]["alice"].id,
+                         timestamp=datetime(2025, 5, 1, tzinfo=timezone.utc)))
+    db.commit()
+
+    assert crud_service.get_current_batch_location(db, "VDT-052025-B") == "Highway NH48"
+
+
+def test_get_batches_by_status_reads_projection(db, sample_data):
+    in_transit = crud_service.get_batches_by_status(db, BatchStatus.IN_TRANSIT).items
+    assert [b.batch_code for b in in_transit] == ["VDT-052025-B"]
+    assert in_transit[0].current_status == BatchStatus.IN_TRANSIT
+    assert in_transit[0].current_location == "Highway NH48"
+
+    at_plant = crud_service.get_batches_by_location(db, "Chennai Plant").items
+    assert [b.batch_code for b in at_plant] == ["PCM-062025-A"]
+
+
+def test_rebuild_batch_current_state(db, sample_data):
+    db.query(BatchCurrentState).delete()
+    db.commit()
+    assert crud_service.get_batch_current_state(db, "VDT-052025-A") is None
+
+    crud_service.rebuild_batch_current_state(db)
+
+    assert db.query(BatchCurrentState).count() == 3
+    assert crud_service.get_batch_current_status(db, "VDT-052025-A") == BatchStatus.DELIVERED
+
+
+# =============================================================================
+# STATISTICS
+# =============================================================================
+
+def test_get_batch_statistics_rollup(db, sample_data):
+    stats = crud_service.get_batch_statistics(db)
+
+    assert stats["total_batches"] == 3
+    assert (stats["manufactured"], stats["in_transit"], stats["delivered"]) == (1, 1, 1)
+    assert stats["total_quantity"] == 1800
+    assert stats["by_category"]["Supplements"] == {"batches": 2, "quantity": 800}
+    assert stats["by_location"]["Highway NH48"] == {"batches": 1, "quantity": 300}
+    vitamin = sample_data["products"]["vitamin"]
+    assert stats["by_product"][vitamin.id]["batches"] == 2
+
+
+def test_get_batch_statistics_filters(db, sample_data):
+    paracetamol = sample_data["products"]["paracetamol"]
+    stats = crud_service.get_batch_statistics(db, product_ids=[paracetamol.id])
+    assert stats["total_batches"] == 1
+    assert stats["manufactured"] == 1
+
+    stats = crud_service.get_batch_statistics(db, start_date=date(2025, 5, 10), end_date=date(2025, 5, 31))
+    assert stats["total_batches"] == 1
+    assert stats["in_transit"] == 1
+
+
+# =============================================================================
+# PAGINATION
+# =============================================================================
+
+def _collect(fetch, limit):
+    items, cursor = [], None
+    while True:
+        page = fetch(limit=limit, cursor=cursor)
+        assert len(page.items) <= limit
+        items.extend(page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            return items
+
+
+def test_tracking_history_pages_in_timestamp_order(db, sample_data):
+    history = _collect(lambda **kw: crud_service.get_batch_tracking_history(db, "VDT-052025-A", **kw), 2)
+    assert [record.status for record in history] == [
+        BatchStatus.MANUFACTURED, BatchStatus.IN_TRANSIT, BatchStatus.DELIVERED
+    ]
+    assert history[-1].handler.department.name == "Logistics"
+
+
+def test_list_functions_page_without_gaps(db, sample_data):
+    batches = _collect(lambda **kw: crud_service.get_batches_by_date_range(
+        db, date(2025, 1, 1), date(2025, 12, 31), **kw), 1)
+    assert [b.batch_code for b in batches] == ["VDT-052025-A", "VDT-052025-B", "PCM-062025-A"]
+
+    handlers = _collect(lambda **kw: crud_service.get_batch_handlers(db, "VDT-052025-A", **kw), 1)
+    assert [e.name for e in handlers] == ["Alice Kumar", "Bob Raj"]
+
+    vitamin = _collect(lambda **kw: crud_service.get_batches_by_product(db, "vitamin", **kw), 1)
+    assert len(vitamin) == 2
+
+
+def test_page_size_is_capped(db, sample_data, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_PAGE_SIZE", 2)
+    page = crud_service.get_batches_by_date_range(db, date(2025, 1, 1), date(2025, 12, 31), limit=1000)
+    assert len(page.items) == 2
+    assert page.has_more
+
+
+def test_invalid_cursor_is_rejected(db, sample_data):
+    with pytest.raises(ValueError):
+        crud_service.get_batches_by_status(db, BatchStatus.IN_TRANSIT, cursor="garbage!")
+
+
+# =============================================================================
+# LOADER PROFILES & PROJECTIONS
+# =============================================================================
+
+def test_detail_profile_loads_history_and_creator(db, sample_data):
+    batch = crud_service.get_batch_by_code(db, "VDT-052025-A")
+    assert batch.product.name == "Vitamin D Tablets"
+    assert batch.creator.department.name == "Quality Assurance"
+    assert [record.handler.name for record in batch.tracking_records] == ["Alice Kumar", "Bob Raj", "Bob Raj"]
+    assert batch.current_status == BatchStatus.DELIVERED
+
+
+def test_summary_profile_raises_on_lazy_load(db, sample_data):
+    db.expunge_all()
+    batch = crud_service.get_batch_by_code(db, "VDT-052025-A", profile="summary")
+    assert batch.current_location == "Bangalore Warehouse"
+    with pytest.raises(InvalidRequestError):
+        batch.tracking_records
+
+
+def test_unknown_profile(db, sample_data):
+    with pytest.raises(ValueError):
+        crud_service.get_batch_by_code(db, "VDT-052025-A", profile="everything")
+
+
+def test_batch_summary_projection(db, sample_data):
+    page = projections.list_batch_summaries(db, status=BatchStatus.IN_TRANSIT)
+    assert len(page.items) == 1
+    summary = page.items[0]
+    assert isinstance(summary, projections.BatchSummary)
+    assert (summary.batch_code, summary.product_name, summary.status, summary.location) == (
+        "VDT-052025-B", "Vitamin D Tablets", "In Transit", "Highway NH48"
+    )
+
+    first = projections.list_batch_summaries(db, limit=2)
+    rest = projections.list_batch_summaries(db, limit=2, cursor=first.next_cursor)
+    assert [b.batch_code for b in first.items + rest.items] == ["VDT-052025-A", "VDT-052025-B", "PCM-062025-A"]
+
+
+def test_tracking_entry_projection(db, sample_data):
+    entries = projections.list_tracking_entries(db, "VDT-052025-A").items
+    assert [(e.status, e.handler_department) for e in entries] == [
+        ("Manufactured", "Quality Assurance"), ("In Transit", "Logistics"), ("Delivered", "Logistics")
+    ]
+
+    employees = projections.list_employee_summaries(db, department_name="logistics").items
+    assert [e.name for e in employees] == ["Bob Raj"]
+
+
+# =============================================================================
+# MULTI-KEY LOOKUPS
+# =============================================================================
+
+def test_bulk_lookups_keep_input_order_and_report_missing(engine, db, sample_data):
+    instrument_engine(engine)
+    with track_queries() as stats:
+        found = crud_service.get_batches_by_codes(db, ["PCM-062025-A", "NOPE", "VDT-052025-A", "PCM-062025-A"])
+    assert stats.query_count == 1
+    assert [b.batch_code for b in found.items] == ["PCM-062025-A", "VDT-052025-A"]
+    assert found.missing == ["NOPE"]
+    assert found.items[0].product.name == "Paracetamol 500mg"  # summary profile: product is loaded
+
+    alice, bob = sample_data["employees"]["alice"], sample_data["employees"]["bob"]
+    employees = crud_service.get_employees_by_ids(db, [str(bob.id), "not-a-uuid", alice.id])
+    assert [e.name for e in employees.items] == ["Bob Raj", "Alice Kumar"]
+    assert employees.missing == ["not-a-uuid"]
+
+    vitamin = sample_data["products"]["vitamin"]
+    products = crud_service.get_products_by_ids(db, [9999, vitamin.id])
+    assert ([p.name for p in products.items], products.missing) == (["Vitamin D Tablets"], [9999])
+
+    with track_queries() as stats:  # long lists are split into chunks, one IN query each
+        chunked = fetch_by_keys(db.query(Batch), Batch.batch_code, [f"X-{i}" for i in range(5)] + ["VDT-052025-B"],
+                                key_of=lambda batch: batch.batch_code, chunk_size=2)
+    assert stats.query_count == 3
+    assert [b.batch_code for b in chunked.items] == ["VDT-052025-B"] and len(chunked.missing) == 5
+
+
+def test_hot_lookups_reuse_prebuilt_statements(db, sample_data):
+    assert statements.batch_by_code(loader_profiles.SUMMARY) is statements.batch_by_code(loader_profiles.SUMMARY)
+    batch = crud_service.get_batch_by_code(db, "PCM-062025-A", profile=loader_profiles.SUMMARY)
+    assert crud_service.get_batch_by_id(db, batch.id) is batch
+    assert crud_service.get_batch_by_code(db, "NOPE") is None
+
+    alice = crud_service.get_employee_by_email(db, "alice@example.com")
+    assert crud_service.get_employee_by_id(db, alice.id).department.name == "Quality Assurance"
+    assert crud_service.get_product_by_id(db, batch.product_id).name == "Paracetamol 500mg"
+    assert crud_service.get_department_by_id(db, alice.department_id).name == "Quality Assurance"
+
+
+def test_by_id_lookups_read_through_the_cache(db, sample_data):
+    alice = sample_data["employees"]["alice"]
+    product = sample_data["products"]["vitamin"]
+    crud_service.get_employee_by_id(db, alice.id)
+    crud_service.get_product_by_id(db, product.id)
+
+    instrument_engine(db.get_bind())
+    with track_queries() as stats:
+        employee = crud_service.get_employee_by_id(db, str(alice.id).upper())
+        cached_product = crud_service.get_product_by_id(db, product.id)
+        department = crud_service.get_department_by_id(db, alice.department_id)
+    assert stats.query_count == 0
+    assert (employee.email, employee.date_joined, employee.department.name) == (
+        "alice@example.com", alice.date_joined, "Quality Assurance")
+    assert cached_product.unit_price == product.unit_price and department.id == alice.department_id
+
+    product.name = "Vitamin D3 Tablets"
+    db.commit()
+    assert crud_service.get_product_by_id(db, product.id).name == "Vitamin D3 Tablets"
+    assert crud_service.get_employee_by_id(db, uuid.uuid4()) is None
@@ -0,0 +1,157 @@
+"""
+Tests for services/expiry_service.py and the expiry endpoints
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from datetime import date, datetime, timezone
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
+
+from app.main import app
+from database.async_database import get_async_db
+from models.user_models import Batch, BatchTracking, BatchStatus, ExpiryRiskBucket, ExpiryRiskState
+from services import expiry_service, ingestion_service
+from services.query_metrics_service import instrument_engine, track_queries
+
+# Sample expiries: PCM-062025-A 2026-12-01, VDT-052025-A 2027-05-01 (delivered), VDT-052025-B 2027-05-15
+TODAY = date(2026, 11, 20)
+
+
+def test_expiring_batches_skips_delivered_by_default(db, sample_data):
+    page = expiry_service.get_expiring_batches(db, within_days=30, today=TODAY)
+    assert [(b.batch_code, b.days_left, b.location) for b in page.items] == [("PCM-062025-A", 11, "Chennai Plant")]
+
+    in_six_months = expiry_service.get_expiring_batches(db, within_days=180, today=TODAY)
+    assert [b.batch_code for b in in_six_months.items] == ["PCM-062025-A", "VDT-052025-B"]
+
+    with_delivered = expiry_service.get_expiring_batches(db, within_days=180, include_delivered=True, today=TODAY)
+    assert [b.batch_code for b in with_delivered.items] == ["PCM-062025-A", "VDT-052025-A", "VDT-052025-B"]
+
+
+def test_expiring_batches_paginates(db, sample_data):
+    first = expiry_service.get_expiring_batches(db, within_days=365, include_delivered=True, today=TODAY, limit=2)
+    second = expiry_service.get_expiring_batches(db, within_days=365, include_delivered=True, today=TODAY,
+                                                 limit=2, cursor=first.next_cursor)
+    assert [b.batch_code for b in first.items + second.items] == ["PCM-062025-A", "VDT-052025-A", "VDT-052025-B"]
+    assert second.next_cursor is None
+
+
+def test_bucket_summary_is_precomputed_and_refreshed_when_stale(db, sample_data):
+    summary = expiry_service.get_expiry_risk_summary(db, today=TODAY, include_delivered=True)
+    buckets = {(b.bucket, b.location): (b.batches, b.quantity) for b in summary.buckets}
+    assert buckets == {
+        ("0-30d", "Chennai Plant"): (1, 1000),
+        ("90d+", "Highway NH48"): (1, 300),
+        ("90d+", "Bangalore Warehouse"): (1, 500),
+    }
+    assert [b.bucket for b in expiry_service.get_expiry_risk_summary(db, today=TODAY).buckets] == ["0-30d", "90d+"]
+
+    # unchanged data and day: served from the table without a rebuild
+    stored_ids = db.scalars(select(ExpiryRiskBucket.id)).all()
+    expiry_service.get_expiry_risk_summary(db, today=TODAY)
+    assert db.scalars(select(ExpiryRiskBucket.id)).all() == stored_ids
+
+    # a new tracking event moves PCM-062025-A and triggers a rebuild
+    db.add(BatchTracking(batch_id=sample_data["batches"]["PCM-062025-A"].id, location="Highway NH44",
+                         status=BatchStatus.IN_TRANSIT, handled_by=sample_data["employees"]["bob"].id,
+                         timestamp=datetime(2025, 6, 9, tzinfo=timezone.utc)))
+    db.commit()
+    summary = expiry_service.get_expiry_risk_summary(db, today=TODAY)
+    assert [(b.bucket, b.location) for b in summary.buckets][0] == ("0-30d", "Highway NH44")
+
+    # the next day everything shifts; PCM-062025-A has expired by 2026-12-02
+    later = expiry_service.get_expiry_risk_summary(db, today=date(2026, 12, 2))
+    assert later.buckets[0].bucket == "expired"
+    assert db.scalar(select(func.count()).select_from(ExpiryRiskBucket).where(
+        ExpiryRiskBucket.as_of != date(2026, 12, 2))) == 0
+
+
+def test_edits_that_add_no_rows_still_refresh_the_buckets(db, sample_data):
+    expiry_service.get_expiry_risk_summary(db, today=TODAY)
+    batch = sample_data["batches"]["PCM-062025-A"]
+    batch.quantity = 750  # no new IDs anywhere: only the edit's version bump shows the change
+    db.commit()
+    assert expiry_service.get_expiry_risk_summary(db, today=TODAY).buckets[0].quantity == 750
+
+    batch.expiry_date = date(2027, 6, 1)
+    db.commit()
+    assert [b.bucket for b in expiry_service.get_expiry_risk_summary(db, today=TODAY).buckets] == ["90d+", "90d+"]
+
+    # Core inserts from bulk ingestion leave the version alone; the new tracking ID shows them
+    version = db.get(ExpiryRiskState, expiry_service.STATE_ID).version
+    rows = ingestion_service.parse_ndjson([
+        '{"batch_code": "PCM-062025-A", "location": "Pune Depot", "status": "IN_TRANSIT", '
+        f'"handled_by": "{sample_data["employees"]["bob"].id}", "timestamp": "2025-06-10T08:00:00+00:00"}}'
+    ])
+    assert ingestion_service.ingest_tracking_events(db, rows).accepted == 1
+    summary = expiry_service.get_expiry_risk_summary(db, today=TODAY)
+    assert "Pune Depot" in [b.location for b in summary.buckets]
+    db.expire_all()
+    assert db.get(ExpiryRiskState, expiry_service.STATE_ID).version == version
+
+
+def test_inserts_do_not_write_the_state_row(db, sample_data):
+    expiry_service.get_expiry_risk_summary(db, today=TODAY)
+    instrument_engine(db.get_bind())
+    with track_queries() as stats:
+        db.add(BatchTracking(batch_id=sample_data["batches"]["PCM-062025-A"].id, location="Highway NH44",
+                             status=BatchStatus.IN_TRANSIT, handled_by=sample_data["employees"]["bob"].id))
+        db.commit()
+    assert not any("expiry_risk_state" in sql for sql in stats.statement_counts)
+    summary = expiry_service.get_expiry_risk_summary(db, today=TODAY)
+    assert ("0-30d", "Highway NH44") in [(b.bucket, b.location) for b in summary.buckets]
+
+
+def test_refresh_after_waiting_for_the_lock_keeps_a_current_build(db, sample_data):
+    expiry_service.get_expiry_risk_summary(db, today=TODAY)
+    stored_ids = db.scalars(select(ExpiryRiskBucket.id)).all()
+    state = db.get(ExpiryRiskState, expiry_service.STATE_ID)
+    assert (state.built_version, state.as_of) == (state.version, TODAY)
+    assert (state.built_batch_id, state.built_tracking_id) == (
+        db.scalar(select(func.max(Batch.id))), db.scalar(select(func.max(BatchTracking.id))))
+
+    # what a second worker does once the first has committed its rebuild
+    expiry_service.refresh_expiry_buckets(db, TODAY, only_if_stale=True)
+    assert db.scalars(select(ExpiryRiskBucket.id)).all() == stored_ids
+
+
+def test_bucket_rows_are_unique_per_key(db, sample_data):
+    for _ in range(2):  # NULL location and status must collide too
+        db.add(ExpiryRiskBucket(as_of=TODAY, bucket="0-30d", location=None, status=None, batches=1, quantity=1))
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+
+
+@pytest_asyncio.fixture
+async def client(async_db):
+    async def override_get_async_db():
+        yield async_db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_expiry_endpoints(client):
+    response = await client.get("/api/batches/expiring", params={"within_days": 3650})
+    assert response.status_code == 200
+    assert "VDT-052025-A" not in [item["batch_code"] for item in response.json()["items"]]  # delivered
+
+    response = await client.get("/api/batches/expiry-risk", params={"include_delivered": "true"})
+    assert response.status_code == 200
+    assert sum(bucket["batches"] for bucket in response.json()["buckets"]) == 3
@@ -0,0 +1,150 @@
+"""
+Tests for services/export_service.py and the export endpoints
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import csv
+import gzip
+import io
+import json
+from datetime import date, datetime, timezone
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from app.config import settings
+from app.main import app
+from database.async_database import get_async_db
+from models.user_models import Batch, BatchStatus, BatchTracking, Employee, Product
+from services import export_service, tracking_partition_service
+
+
+def _archive_june(db):
+    """Deliver everything in August and archive June; an undelivered batch keeps May live"""
+    bob = db.scalar(select(Employee).where(Employee.email == "bob@example.com"))
+    vitamin = db.scalar(select(Product).where(Product.name == "Vitamin D Tablets"))
+    for code in ["VDT-052025-B", "PCM-062025-A"]:
+        batch_id = db.scalar(select(Batch.id).where(Batch.batch_code == code))
+        db.add(BatchTracking(batch_id=batch_id, location="Final Depot", status=BatchStatus.DELIVERED,
+                             handled_by=bob.id, timestamp=datetime(2025, 8, 2, tzinfo=timezone.utc)))
+    early = Batch(product_id=vitamin.id, batch_code="VDT-042025-A", quantity=50, manufactured_date=date(2025, 4, 20),
+                  expiry_date=date(2027, 4, 20), created_by=bob.id)
+    db.add(early)
+    db.flush()
+    db.add(BatchTracking(batch_id=early.id, location="Chennai Plant", status=BatchStatus.MANUFACTURED,
+                         handled_by=bob.id, timestamp=datetime(2025, 5, 20, tzinfo=timezone.utc)))
+    db.commit()
+    archived = tracking_partition_service.archive_closed_partitions(db, now=datetime(2026, 1, 15, tzinfo=timezone.utc))
+    assert [archive.partition_name for archive in archived] == ["batch_tracking_y2025m06"]
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TRACKING_ARCHIVE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _export(db, fmt="csv", chunk_size=2, **filters):
+    stmt = export_service.tracking_export_query(**filters)
+    body = b"".join(export_service.export_rows(db, stmt, fmt=fmt, chunk_size=chunk_size,
+                                               archived=export_service.ArchivedTracking(**filters)))
+    return list(csv.DictReader(io.StringIO(body.decode())))
+
+
+def _instant(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed.replace(tzinfo=timezone.utc) if parsed.tzinfo is None else parsed
+
+
+def test_tracking_export_csv_streams_in_partitions(db, sample_data):
+    stmt = export_service.tracking_export_query()
+    chunks = list(export_service.export_rows(db, stmt, fmt="csv", chunk_size=2))
+
+    # header plus one chunk per partition of two rows
+    assert len(chunks) == 1 + 3
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+    assert len(rows) == 6
+    assert rows[0]["batch_code"] == "VDT-052025-A" and rows[0]["status"] == "Manufactured"
+    assert rows[0]["handler_department"] == "Quality Assurance"
+    assert [r["timestamp"] for r in rows] == sorted(r["timestamp"] for r in rows)
+
+
+def test_batch_export_ndjson_gzip_and_filters(db, sample_data):
+    stmt = export_service.batch_export_query(status=BatchStatus.IN_TRANSIT)
+    body = gzip.decompress(b"".join(export_service.export_rows(db, stmt, fmt="ndjson", gzip=True)))
+
+    records = [json.loads(line) for line in body.decode().splitlines()]
+    assert [r["batch_code"] for r in records] == ["VDT-052025-B"]
+    assert records[0]["location"] == "Highway NH48"
+    assert records[0]["manufactured_date"]
+
+
+def test_tracking_export_date_range_is_inclusive(db, sample_data):
+    everything = db.execute(export_service.tracking_export_query()).all()
+    first_day = everything[0].timestamp.date()
+    stmt = export_service.tracking_export_query(start_date=first_day, end_date=first_day)
+    assert 0 < len(db.execute(stmt).all()) < len(everything)
+
+
+def test_tracking_export_reads_archived_months_back_in_order(db, sample_data, archive_dir):
+    _archive_june(db)
+    assert db.query(BatchTracking).count() == 3  # May and August are still live
+
+    rows = _export(db)
+    assert len(rows) == 9
+    assert [r["batch_code"] for r in rows[:2]] == ["VDT-042025-A", "VDT-052025-A"]  # live May, then archived June
+    assert [_instant(r["timestamp"]) for r in rows] == sorted(_instant(r["timestamp"]) for r in rows)
+    assert rows[1]["status"] == "Manufactured" and rows[1]["handler_department"] == "Quality Assurance"
+    assert rows[-1]["location"] == "Final Depot"
+
+    paracetamol = sample_data["products"]["paracetamol"].id
+    assert [r["location"] for r in _export(db, product_id=paracetamol)] == ["Chennai Plant", "Final Depot"]
+    june_first_days = _export(db, batch_code="VDT-052025-B", start_date=date(2025, 6, 1), end_date=date(2025, 6, 3))
+    assert [r["location"] for r in june_first_days] == ["Chennai Plant"]
+    assert _export(db, start_date=date(2025, 8, 1)) == _export(db)[-2:]
+
+
+@pytest_asyncio.fixture
+async def client(async_db):
+    async def override_get_async_db():
+        yield async_db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_export_endpoints(client):
+    response = await client.get("/api/batches/tracking/export", params={"batch_code": "VDT-052025-A"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "attachment" in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [r["status"] for r in rows] == ["Manufactured", "In Transit", "Delivered"]
+
+    response = await client.get("/api/batches/export", params={"format": "ndjson", "gzip": "true", "chunk_size": 1})
+    assert response.headers["content-encoding"] == "gzip"
+    codes = [json.loads(line)["batch_code"] for line in response.text.splitlines()]  # httpx decodes gzip
+    assert codes == ["VDT-052025-A", "VDT-052025-B", "PCM-062025-A"]
+
+
+@pytest.mark.asyncio
+async def test_export_endpoint_includes_archived_months(client, async_db, archive_dir):
+    await async_db.run_sync(_archive_june)
+    response = await client.get("/api/batches/tracking/export",
+                                params={"format": "ndjson", "batch_code": "VDT-052025-A", "chunk_size": 1})
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["status"] for r in records] == ["Manufactured", "In Transit", "Delivered"]
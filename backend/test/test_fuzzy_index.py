@@ -0,0 +1,118 @@
+"""
+Tests for the "did you mean" index (services/fuzzy_index.py)
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import time
+from datetime import date
+
+import httpx
+import pytest
+from sqlalchemy import insert
+
+from app.main import app
+from database.async_database import get_async_db
+from models.user_models import Batch
+from services import crud_service, fuzzy_index
+from services.fuzzy_index import NGramIndex, edit_distance
+from services.query_metrics_service import instrument_engine, track_queries
+
+
+def test_edit_distance():
+    assert edit_distance("VDT-052025-A", "VDT-052025-A") == 0
+    assert edit_distance("VDT-05205-A", "VDT-052025-A") == 1
+    assert edit_distance("paracetmol", "paracetamol") == 1
+    assert edit_distance("", "abc") == 3
+
+
+def test_ngram_index_ranks_closest_first_and_honours_removals():
+    index = NGramIndex()
+    for ref, code in enumerate(["VDT-052025-A", "VDT-052025-B", "PCM-062025-A", "AMX-012026-C"]):
+        index.add(ref, code)
+
+    hits = index.search("vdt-05202-a", limit=2)
+    assert [hit.text for hit in hits] == ["VDT-052025-A", "VDT-052025-B"]
+    assert hits[0].distance == 1
+
+    index.add(0, "VDT-052025-X")  # rename replaces the old entry
+    index.remove(1)
+    assert [hit.text for hit in index.search("VDT-052025-A", limit=5)][0] == "VDT-052025-X"
+    assert "VDT-052025-B" not in [hit.text for hit in index.search("VDT-052025-B")]
+    assert len(index) == 3
+
+
+def test_suggestions_cover_codes_products_and_employees(engine, db, sample_data):
+    assert crud_service.suggest_similar(db, "batch", "VDT-05202-B")[0].text == "VDT-052025-B"
+    assert crud_service.suggest_similar(db, "product", "paracetmol")[0].text == "Paracetamol 500mg"
+    assert crud_service.suggest_similar(db, "employee", "alise kumar")[0].text == "Alice Kumar"
+    with pytest.raises(ValueError):
+        crud_service.suggest_similar(db, "location", "Chennai")
+
+    instrument_engine(engine)
+    with track_queries() as stats:  # loaded and fresh: lookups never touch the database
+        started = time.perf_counter()
+        crud_service.suggest_similar(db, "batch", "PCM-06202-A")
+        elapsed = time.perf_counter() - started
+    assert stats.query_count == 0
+    assert elapsed < 0.01
+
+
+def test_committed_inserts_update_the_index_without_reloading(engine, db, sample_data):
+    fuzzy_index.get_fuzzy_index(db)
+    db.add(Batch(batch_code="VDT-072025-A", product_id=sample_data["products"]["vitamin"].id, quantity=10,
+                 created_by=sample_data["employees"]["alice"].id, manufactured_date=date(2025, 7, 1), expiry_date=date(2027, 7, 1)))
+    db.commit()
+
+    instrument_engine(engine)
+    with track_queries() as stats:
+        hits = crud_service.suggest_similar(db, "batch", "VDT-07205-A", limit=1)
+    assert [hit.text for hit in hits] == ["VDT-072025-A"]
+    assert stats.query_count == 0
+
+
+def test_rolled_back_inserts_are_not_indexed(db, sample_data):
+    fuzzy_index.get_fuzzy_index(db)
+    db.add(Batch(batch_code="ZZQ-012030-A", product_id=sample_data["products"]["vitamin"].id, quantity=1,
+                 created_by=sample_data["employees"]["alice"].id, manufactured_date=date(2025, 7, 1), expiry_date=date(2030, 1, 1)))
+    db.flush()
+    db.rollback()
+    assert crud_service.suggest_similar(db, "batch", "ZZQ-012030-A") == []
+
+
+def test_catch_up_indexes_rows_committed_out_of_id_order(engine, db, sample_data):
+    index = fuzzy_index.get_fuzzy_index(db)
+    values = dict(product_id=sample_data["products"]["vitamin"].id, quantity=10, created_by=sample_data["employees"]["alice"].id,
+                  manufactured_date=date(2025, 7, 1), expiry_date=date(2027, 7, 1))
+    with engine.begin() as connection:  # another worker's commits: no session hooks
+        connection.execute(insert(Batch).values(id=10, batch_code="QRX-102025-A", **values))
+    index.load(db)
+    with engine.begin() as connection:  # drew its ID before 10, committed after the catch-up
+        connection.execute(insert(Batch).values(id=7, batch_code="QRX-072025-A", **values))
+    index.load(db)
+
+    assert [hit.text for hit in index.suggest("batch", "QRX-07205-A", limit=1)] == ["QRX-072025-A"]
+    assert index.last_batch_id == 10
+
+
+@pytest.mark.asyncio
+async def test_suggest_endpoint(async_db, sample_data):
+    async def override():
+        yield async_db
+
+    app.dependency_overrides[get_async_db] = override
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/api/batches/suggest", params={"q": "paracetamol 50mg", "kind": "product"})
+            bad_kind = await client.get("/api/batches/suggest", params={"q": "x", "kind": "location"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json()["suggestions"][0]["text"] == "Paracetamol 500mg"
+    assert bad_kind.status_code == 422
@@ -0,0 +1,72 @@
+"""
+Tests for services/ingestion_service.py
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import json
+
+from models.user_models import BatchTracking, BatchStatus
+from services import crud_service, ingestion_service
+
+
+def _ndjson(*records):
+    return [json.dumps(record) if isinstance(record, dict) else record for record in records]
+
+
+def test_ndjson_ingestion_updates_current_state(db, sample_data):
+    bob = str(sample_data["employees"]["bob"].id)
+    lines = _ndjson(
+        {"batch_code": "PCM-062025-A", "location": "Highway NH44", "status": "In Transit",
+         "handled_by": bob, "timestamp": "2025-06-10T09:00:00Z"},
+        {"batch_code": "PCM-062025-A", "location": "Hyderabad Depot", "status": "DELIVERED",
+         "handled_by": bob, "timestamp": "2025-06-11T09:00:00Z"},
+        {"batch_code": "VDT-052025-B", "location": "Mysore Depot", "status": "delivered", "handled_by": bob},
+    )
+
+    report = ingestion_service.ingest_tracking_events(db, ingestion_service.parse_ndjson(lines), chunk_size=2)
+
+    assert (report.received, report.accepted, report.rejected) == (3, 3, 0)
+    assert db.query(BatchTracking).count() == 9
+    assert crud_service.get_current_batch_location(db, "PCM-062025-A") == "Hyderabad Depot"
+    assert crud_service.get_batch_current_status(db, "VDT-052025-B") == BatchStatus.DELIVERED
+
+
+def test_bad_rows_are_rejected_individually(db, sample_data):
+    bob = str(sample_data["employees"]["bob"].id)
+    lines = _ndjson(
+        {"batch_code": "PCM-062025-A", "location": "Highway NH44", "status": "In Transit", "handled_by": bob},
+        "{not json",
+        {"batch_code": "NOPE-1", "location": "X", "status": "In Transit", "handled_by": bob},
+        {"batch_code": "PCM-062025-A", "location": "X", "status": "Lost", "handled_by": bob},
+        {"batch_code": "PCM-062025-A", "location": "X", "status": "In Transit",
+         "handled_by": "00000000-0000-0000-0000-000000000000"},
+        {"batch_code": "PCM-062025-A", "location": "", "status": "In Transit", "handled_by": bob},
+    )
+
+    report = ingestion_service.ingest_tracking_events(db, ingestion_service.parse_ndjson(lines))
+
+    assert (report.received, report.accepted, report.rejected) == (6, 1, 5)
+    assert [reject["row"] for reject in report.rejects] == [2, 4, 6, 3, 5]
+    assert "unknown batch code" in report.rejects[3]["error"]
+    assert crud_service.get_current_batch_location(db, "PCM-062025-A") == "Highway NH44"
+
+
+def test_csv_ingestion(db, sample_data):
+    alice = str(sample_data["employees"]["alice"].id)
+    lines = [
+        "batch_code,status,location,handled_by,timestamp",
+        f"VDT-052025-B,Delivered,\"Mysore Depot, Bay 2\",{alice},2025-06-20T10:00:00+00:00",
+        f"VDT-052025-B,In Transit,Highway,{alice},2025-06-19T10:00:00+00:00,extra",
+    ]
+
+    report = ingestion_service.ingest_tracking_events(db, ingestion_service.parse_csv(lines))
+
+    assert (report.accepted, report.rejected) == (1, 1)
+    assert report.rejects[0] == {"row": 3, "batch_code": None, "error": "too many columns"}
+    assert crud_service.get_current_batch_location(db, "VDT-052025-B") == "Mysore Depot, Bay 2"
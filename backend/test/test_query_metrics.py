@@ -0,0 +1,93 @@
+"""
+Tests for services/query_metrics_service.py and the /metrics endpoint
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import json
+
+import httpx
+import pytest
+from sqlalchemy import select
+
+from app.main import app
+from database.async_database import get_async_db
+from models.user_models import Employee, Product
+from services import query_metrics_service
+from services.query_metrics_service import Histogram, instrument_engine, track_queries
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    query_metrics_service.reset_metrics()
+    yield
+    query_metrics_service.reset_metrics()
+
+
+def test_track_queries_counts_and_flags_n_plus_one(engine, db, sample_data):
+    instrument_engine(engine)
+    products = db.scalars(select(Product)).all()
+
+    with track_queries() as stats:
+        for _ in range(3):
+            for product in products:
+                db.execute(select(Product.name).where(Product.id == product.id)).all()
+        db.execute(select(Employee.email)).all()
+
+    assert stats.query_count == 3 * len(products) + 1
+    assert stats.db_seconds > 0
+    assert stats.slowest_statement
+    suspects = stats.n_plus_one_suspects(threshold=5)
+    assert len(suspects) == 1 and suspects[0][1] == 3 * len(products)
+    assert stats.n_plus_one_suspects(threshold=7) == []
+
+
+def test_statements_outside_a_request_are_not_attributed(engine, db, sample_data):
+    instrument_engine(engine)
+    instrument_engine(engine)  # idempotent: statements are still timed once
+    before = query_metrics_service.STATEMENT_SECONDS.count()
+    db.execute(select(Product.id)).all()
+    assert query_metrics_service.current_stats() is None
+    assert query_metrics_service.STATEMENT_SECONDS.count() == before + 1
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo", (0.1, 1.0), ("handler",))
+    histogram.observe(0.05, "a")
+    histogram.observe(0.5, "a")
+    histogram.observe(5, "a")
+
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{handler="a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{handler="a",le="1.0"} 2' in lines
+    assert 'demo_seconds_bucket{handler="a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{handler="a"} 3' in lines
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_request_queries(async_db):
+    instrument_engine(async_db.bind.sync_engine)
+
+    async def override_get_async_db():
+        yield async_db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            body = json.dumps({"batch_code": "MISSING", "location": "X", "status": "In Transit"})
+            await client.post("/api/batches/tracking/bulk", content=body,
+                              headers={"content-type": "application/x-ndjson"})
+            response = await client.get("/metrics")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert query_metrics_service.REQUEST_QUERIES.count("bulk_ingest_tracking_events") == 1
+    assert 'db_request_queries_count{handler="bulk_ingest_tracking_events"} 1' in response.text
+    assert "get_metrics" not in response.text
@@ -0,0 +1,182 @@
+"""
+Tests for real-time tracking fan-out (services/realtime_service.py, api/realtime_events.py)
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from api import realtime_events
+from models.user_models import BatchTracking, BatchStatus
+from services import ingestion_service, realtime_service
+from services.realtime_service import TrackingEvent, TrackingHub, encode_events, decode_events
+
+
+@pytest.fixture
+def received():
+    """Events delivered by the in-process notifier, one list per commit"""
+    batches = []
+    realtime_service.local_notifier.subscribe(batches.append)
+    yield batches
+    realtime_service.local_notifier.unsubscribe(batches.append)
+
+
+def _event(tracking_id, batch_id=1, code="VDT-052025-A", product_id=1, location="Bangalore Warehouse",
+           timestamp="2025-06-10T08:00:00+00:00"):
+    return TrackingEvent(tracking_id, batch_id, code, product_id, "In Transit", location, timestamp)
+
+
+def test_committed_tracking_rows_are_published(db, sample_data, received):
+    batch = sample_data["batches"]["PCM-062025-A"]
+    db.add(BatchTracking(batch_id=batch.id, location="Highway NH44", status=BatchStatus.IN_TRANSIT,
+                         handled_by=sample_data["employees"]["bob"].id,
+                         timestamp=datetime(2025, 6, 10, 9, 0, tzinfo=timezone.utc)))
+    db.flush()
+    assert received == []  # nothing leaves before commit
+    db.commit()
+
+    [events] = received
+    assert [(e.batch_code, e.product_id, e.status, e.location) for e in events] == [
+        ("PCM-062025-A", batch.product_id, "In Transit", "Highway NH44")
+    ]
+    assert events[0].timestamp == "2025-06-10T09:00:00+00:00"
+
+
+def test_rolled_back_rows_are_not_published(db, sample_data, received):
+    db.add(BatchTracking(batch_id=sample_data["batches"]["PCM-062025-A"].id, location="Highway NH44",
+                         status=BatchStatus.IN_TRANSIT, handled_by=sample_data["employees"]["bob"].id))
+    db.flush()
+    db.rollback()
+    assert received == []
+
+
+def test_bulk_ingestion_is_published_once_per_commit(db, sample_data, received):
+    bob = str(sample_data["employees"]["bob"].id)
+    lines = [json.dumps({"batch_code": code, "location": "Mysore Depot", "status": "delivered", "handled_by": bob})
+             for code in ("VDT-052025-B", "PCM-062025-A", "NOPE-000000-X")]
+    ingestion_service.ingest_tracking_events(db, ingestion_service.parse_ndjson(lines), chunk_size=2)
+
+    assert len(received) == 1
+    assert sorted(e.batch_code for e in received[0]) == ["PCM-062025-A", "VDT-052025-B"]
+
+
+def test_notify_payloads_stay_under_the_postgres_limit():
+    events = [_event(i, batch_id=i, location="L" * 300) for i in range(100)]
+    payloads = encode_events(events)
+    assert len(payloads) > 1
+    assert all(len(p) <= realtime_service.PAYLOAD_LIMIT for p in payloads)
+    assert [e for p in payloads for e in decode_events(p)] == events
+
+
+@pytest.mark.asyncio
+async def test_hub_coalesces_bursts_and_routes_by_topic():
+    sent = []
+
+    async def send(client_id, events):
+        sent.append((client_id, events))
+
+    hub = TrackingHub(send, interval=0)
+    hub.subscribe("by-code", batch_codes=["VDT-052025-A"])
+    hub.subscribe("by-product", product_ids=[2])
+    hub.subscribe("by-location", locations=["Bangalore Warehouse"], batch_codes=["VDT-052025-A"])
+    hub.subscribe("idle", batch_codes=["ZZZ-000000-0"])
+
+    hub.feed([_event(1), _event(3, timestamp="2025-06-10T10:00:00+00:00"), _event(2)])  # out of order
+    hub.feed([_event(4, batch_id=3, code="PCM-062025-A", product_id=2, location="Hyderabad Depot")])
+    assert await hub.flush() == 3
+
+    messages = {client_id: events for client_id, events in sent}
+    assert [e["tracking_id"] for e in messages["by-code"]] == [3]  # newest of the burst only
+    assert [e["tracking_id"] for e in messages["by-location"]] == [3]  # matched twice, sent once
+    assert [e["batch_code"] for e in messages["by-product"]] == ["PCM-062025-A"]
+    assert "idle" not in messages
+    assert hub.stats()["coalesced"] == 2
+
+    assert await hub.flush() == 0  # nothing new, nothing sent
+
+    hub.unsubscribe("by-code")
+    with pytest.raises(ValueError):
+        TrackingHub(send, max_topics=1).subscribe("greedy", batch_codes=["A", "B"])
+
+
+@pytest.mark.asyncio
+async def test_socketio_subscribe_handlers():
+    ack = await realtime_events.subscribe("sid-1", {"batch_codes": ["VDT-052025-A"], "locations": ["Highway NH48"]})
+    assert ack == {"topics": ["batch:VDT-052025-A", "location:Highway NH48"]}
+
+    ack = await realtime_events.unsubscribe("sid-1", {"topics": ["location:Highway NH48"]})
+    assert ack == {"topics": ["batch:VDT-052025-A"]}
+
+    await realtime_events.disconnect("sid-1")
+    assert "sid-1" not in realtime_events.hub.client_topics
+
+
+class _FakeListenConnection:
+    """Stands in for an asyncpg connection; `fail` is raised from add_listener"""
+
+    def __init__(self, fail=None):
+        self.fail = fail
+        self.closed = False
+        self.on_terminate = None
+
+    def add_termination_listener(self, callback):
+        self.on_terminate = callback
+
+    async def add_listener(self, channel, callback):
+        if self.fail is not None:
+            raise self.fail
+
+    def drop(self):
+        self.closed = True
+        self.on_terminate(self)
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_listener_survives_errors_after_connecting(monkeypatch):
+    asyncpg = pytest.importorskip("asyncpg")
+    connections = [_FakeListenConnection(asyncpg.PostgresError("LISTEN failed")), _FakeListenConnection(),
+                   _FakeListenConnection(), _FakeListenConnection()]
+    handed_out = iter(connections)
+    resyncs = []
+    resynced = asyncio.Event()
+
+    async def connect(dsn):
+        connection = next(handed_out)
+        if connection is connections[1]:
+            asyncio.get_running_loop().call_later(0.01, connection.drop)
+        return connection
+
+    async def on_reconnect():
+        resyncs.append(len(resyncs))
+        if len(resyncs) == 1:
+            raise RuntimeError("emit failed")  # e.g. the resync emit
+        resynced.set()
+
+    monkeypatch.setattr(asyncpg, "connect", connect)
+    listener = realtime_service.PostgresListener("postgresql://user@localhost/db", on_events=lambda events: None,
+                                                 on_reconnect=on_reconnect)
+    listener.initial_retry_seconds = 0.01
+    task = asyncio.create_task(listener.run())
+    try:
+        await asyncio.wait_for(resynced.wait(), 2)
+    finally:
+        task.cancel()
+
+    # add_listener error -> retry; dropped connection -> reconnect; failed resync -> retry and resync again
+    assert resyncs == [0, 1]
+    assert connections[0].closed and connections[2].closed
@@ -0,0 +1,155 @@
+"""
+Tests for primary/replica read-write splitting (database/routing.py)
+Two SQLite files stand in for the primary and the replica (or two local servers, via
+TEST_PRIMARY_DATABASE_URL and TEST_REPLICA_DATABASE_URL). The two are independent databases, so
+every assertion can tell which one answered.
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from test.conftest import populate_sample_data
+from database import database
+from database.database import Base, create_database_engine
+from database.routing import ReplicaRouter, RoutingSession, ROUTER, pin_to_primary
+from models.user_models import BatchTracking, BatchCurrentState, BatchStatus, Product
+from services import cache_service, crud_service
+
+
+@pytest.fixture
+def two_databases(tmp_path):
+    engines = []
+    for name in ("primary", "replica"):
+        url = os.getenv(f"TEST_{name.upper()}_DATABASE_URL", f"sqlite:///{tmp_path / name}.db")
+        engine = create_database_engine(url)
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine)() as session:
+            populate_sample_data(session)
+        engines.append(engine)
+    # only the replica has this product, so reads that find it went to the replica
+    with sessionmaker(bind=engines[1])() as session:
+        session.add(Product(name="Replica Only Syrup", category="Syrups", unit_price=10))
+        session.commit()
+    yield engines
+    for engine in engines:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def _session(router):
+    return sessionmaker(class_=RoutingSession, autoflush=False, bind=router.primary, info={ROUTER: router})()
+
+
+def _replica_only(db):
+    return db.scalar(select(Product).where(Product.name == "Replica Only Syrup")) is not None
+
+
+def _add_tracking(db, code="PCM-062025-A"):
+    batch = crud_service.get_batch_by_code(db, code)
+    db.add(BatchTracking(batch_id=batch.id, location="Highway NH44", status=BatchStatus.IN_TRANSIT,
+                         handled_by=batch.created_by, timestamp=datetime(2025, 6, 10, tzinfo=timezone.utc)))
+
+
+def test_reads_go_to_the_replica_and_writes_to_the_primary(two_databases):
+    primary, replica = two_databases
+    router = ReplicaRouter(primary, [replica], read_your_writes=0)
+
+    with _session(router) as db:
+        assert _replica_only(db)
+        assert [p.name for p in crud_service.search_products(db, "Syrup").hits] == ["Replica Only Syrup"]
+
+    with _session(router) as db:  # the write itself has to read the primary's batch row
+        pin_to_primary(db)
+        _add_tracking(db)
+        db.commit()
+
+    with sessionmaker(bind=primary)() as db:
+        assert db.query(BatchTracking).count() == 7
+    with sessionmaker(bind=replica)() as db:
+        assert db.query(BatchTracking).count() == 6
+    assert router.stats()["writes"] == 1
+
+
+def test_read_your_writes_after_a_tracking_insert(two_databases):
+    primary, replica = two_databases
+    router = ReplicaRouter(primary, [replica], read_your_writes=60)
+
+    with _session(router) as db:
+        pin_to_primary(db)
+        _add_tracking(db)
+        db.commit()
+        # same session: sees its own write
+        assert crud_service.get_batch_current_state(db, "PCM-062025-A").location == "Highway NH44"
+
+    with _session(router) as db:  # next request inside the window: still the primary
+        assert crud_service.get_batch_current_state(db, "PCM-062025-A").location == "Highway NH44"
+        assert not _replica_only(db)
+
+    router.primary_until = 0  # window over
+    with _session(router) as db:
+        assert crud_service.get_batch_current_state(db, "PCM-062025-A").location == "Chennai Plant"
+
+
+def test_cache_fills_read_the_primary_even_when_replica_reads_are_allowed(two_databases):
+    primary, replica = two_databases
+    with sessionmaker(bind=replica)() as db:  # the replica has not replayed the latest move yet
+        db.execute(update(BatchCurrentState).values(location="Stale Depot"))
+        db.commit()
+    router = ReplicaRouter(primary, [replica], read_your_writes=0)
+
+    with _session(router) as db:
+        assert crud_service.get_current_batch_location(db, "VDT-052025-B") == "Highway NH48"
+        assert cache_service.get_batch_record(db, "VDT-052025-B")["current_location"] == "Highway NH48"
+        assert _replica_only(db)  # other reads still use the replica
+
+
+def test_lagging_or_unreachable_replicas_fall_back_to_the_primary(two_databases):
+    primary, replica = two_databases
+    lag = {"value": 30.0}
+
+    def probe(engine):
+        if lag["value"] is None:
+            raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+        return lag["value"]
+
+    router = ReplicaRouter(primary, [replica], lag_probe=probe, max_lag=5, check_interval=0)
+    with _session(router) as db:
+        assert not _replica_only(db)
+
+    lag["value"] = None
+    with _session(router) as db:
+        assert not _replica_only(db)
+    assert router.lag[replica] == float("inf")
+
+    lag["value"] = 0.2
+    with _session(router) as db:
+        assert _replica_only(db)
+    assert router.stats()["fallbacks"] == 2
+
+
+def test_session_factory_routes_when_replicas_are_configured(two_databases):
+    primary, replica = two_databases
+    try:
+        database.configure_engine(primary, replicas=[replica])
+        with database.SessionLocal() as db:
+            assert isinstance(db, RoutingSession)
+            assert db.get_bind() is primary  # no statement: the primary (dialect checks, per-engine caches)
+            assert _replica_only(db)
+
+        database.configure_engine(primary)
+        with database.SessionLocal() as db:
+            assert not isinstance(db, RoutingSession)
+    finally:
+        database.configure_engine(None)
@@ -0,0 +1,73 @@
+"""
+Tests for services/search_service.py
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import pytest
+
+from services import search_service
+
+
+def test_batch_code_prefix_fast_path(db, sample_data):
+    page = search_service.search_batches(db, "vdt-05")
+    assert [hit.batch_code for hit in page.hits] == ["VDT-052025-A", "VDT-052025-B"]
+    assert page.hits[0].product_name == "Vitamin D Tablets"
+    assert page.hits[0].status == "Delivered"
+    assert page.next_cursor is None
+
+
+def test_prefix_pagination(db, sample_data):
+    first = search_service.search_batches(db, "VDT-", limit=1)
+    assert [hit.batch_code for hit in first.hits] == ["VDT-052025-A"]
+    second = search_service.search_batches(db, "VDT-", limit=1, cursor=first.next_cursor)
+    assert [hit.batch_code for hit in second.hits] == ["VDT-052025-B"]
+    assert second.next_cursor is None
+
+
+def test_ranked_search_orders_by_relevance(db, sample_data):
+    page = search_service.search_batches(db, "Chennai")
+    assert [hit.batch_code for hit in page.hits] == ["PCM-062025-A"]
+
+    page = search_service.search_batches(db, "PCM-062025-A")
+    assert page.hits[0].batch_code == "PCM-062025-A"
+
+    page = search_service.search_batches(db, "vitamin")
+    assert {hit.batch_code for hit in page.hits} == {"VDT-052025-A", "VDT-052025-B"}
+    assert all(hit.score == pytest.approx(0.6) for hit in page.hits)
+
+
+def test_ranked_pagination_is_stable(db, sample_data):
+    seen = []
+    cursor = None
+    while True:
+        page = search_service.search_batches(db, "a", limit=1, cursor=cursor)
+        seen.extend(hit.batch_id for hit in page.hits)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 3
+
+
+def test_search_products(db, sample_data):
+    page = search_service.search_products(db, "para")
+    assert [hit.name for hit in page.hits] == ["Paracetamol 500mg"]
+
+    page = search_service.search_products(db, "supplements")
+    assert [hit.name for hit in page.hits] == ["Vitamin D Tablets"]
+
+    assert search_service.search_products(db, "   ").hits == []
+
+
+def test_like_wildcards_are_escaped(db, sample_data):
+    assert search_service.search_products(db, "%").hits == []
+
+
+def test_invalid_cursor(db, sample_data):
+    with pytest.raises(ValueError):
+        search_service.search_batches(db, "vitamin", cursor="not-a-cursor")
@@ -0,0 +1,116 @@
+"""
+Tests for services/tracking_partition_service.py (archival runs over the plain table on SQLite)
+"""
+import sys, os
+
+# Insert the project's root (backend/) into sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
+
+import gzip
+from datetime import datetime, timezone
+
+import pytest
+
+from app.config import settings
+from models.user_models import BatchTracking, BatchStatus, TrackingArchive
+from services import crud_service, tracking_partition_service as partitions
+from services.pagination import encode_cursor
+from services.query_metrics_service import instrument_engine, track_queries
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TRACKING_ARCHIVE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _deliver_everything(db, sample_data):
+    bob = sample_data["employees"]["bob"]
+    for code in ["VDT-052025-B", "PCM-062025-A"]:
+        db.add(BatchTracking(batch_id=sample_data["batches"][code].id, location="Final Depot",
+                             status=BatchStatus.DELIVERED, handled_by=bob.id,
+                             timestamp=datetime(2025, 8, 2, tzinfo=timezone.utc)))
+    db.commit()
+
+
+def test_month_helpers():
+    start = datetime(2025, 12, 1, tzinfo=timezone.utc)
+    assert partitions.add_months(start, 1) == datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert partitions.partition_name(start) == "batch_tracking_y2025m12"
+    assert partitions.partition_range("batch_tracking_y2025m12") == (start, datetime(2026, 1, 1, tzinfo=timezone.utc))
+
+
+def test_months_with_undelivered_batches_stay_live(db, sample_data, archive_dir):
+    archived = partitions.archive_closed_partitions(db, now=datetime(2026, 1, 15, tzinfo=timezone.utc))
+    assert archived == []
+    assert db.query(BatchTracking).count() == 6
+
+
+def test_archive_and_transparent_history(db, sample_data, archive_dir):
+    _deliver_everything(db, sample_data)
+
+    archived = partitions.archive_closed_partitions(db, now=datetime(2026, 1, 15, tzinfo=timezone.utc))
+
+    assert [(a.partition_name, a.row_count) for a in archived] == [("batch_tracking_y2025m06", 6)]
+    assert os.path.exists(archived[0].file_path)
+    assert db.query(BatchTracking).count() == 2
+
+    # Running again is a no-op
+    assert partitions.archive_closed_partitions(db, now=datetime(2026, 1, 15, tzinfo=timezone.utc)) == []
+    assert db.query(TrackingArchive).count() == 1
+
+    history = crud_service.get_batch_tracking_history(db, "VDT-052025-A").items
+    assert [r.location for r in history] == ["Chennai Plant", "Highway NH48", "Bangalore Warehouse"]
+    assert history[1].handler.department.name == "Logistics"
+
+    first = crud_service.get_batch_tracking_history(db, "VDT-052025-B", limit=2)
+    second = crud_service.get_batch_tracking_history(db, "VDT-052025-B", limit=2, cursor=first.next_cursor)
+    assert [r.location for r in first.items + second.items] == ["Chennai Plant", "Highway NH48", "Final Depot"]
+    assert second.next_cursor is None
+
+    # A fully archived batch pages through the archive alone
+    pages, cursor = [], None
+    while True:
+        page = crud_service.get_batch_tracking_history(db, "VDT-052025-A", limit=2, cursor=cursor)
+        pages.append([r.location for r in page.items])
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert pages == [["Chennai Plant", "Highway NH48"], ["Bangalore Warehouse"]]
+
+    # Archived records never leak back into the session
+    assert not any(record in db for record in history)
+
+
+def test_archive_reads_are_cached_and_skipped_past_the_archived_months(engine, db, sample_data, archive_dir,
+                                                                      monkeypatch):
+    _deliver_everything(db, sample_data)
+    partitions.archive_closed_partitions(db, now=datetime(2026, 1, 15, tzinfo=timezone.utc))
+
+    opened = []
+    gzip_open = gzip.open
+    monkeypatch.setattr(gzip, "open", lambda *args, **kwargs: opened.append(args[0]) or gzip_open(*args, **kwargs))
+    for code in ["VDT-052025-A", "VDT-052025-B", "VDT-052025-A"]:
+        assert crud_service.get_batch_tracking_history(db, code).items
+    assert len(opened) == 1  # one pass over the month served both batches
+
+    instrument_engine(engine)
+    past_archives = encode_cursor((datetime(2025, 8, 1, tzinfo=timezone.utc), 0))
+    with track_queries() as stats:
+        page = crud_service.get_batch_tracking_history(db, "VDT-052025-B", cursor=past_archives)
+    assert [r.location for r in page.items] == ["Final Depot"]
+    assert not any("batch_tracking_archive_batches" in sql for sql in stats.statement_counts)  # no catalog join
+
+
+def test_history_reads_see_an_archival_right_away(db, sample_data, archive_dir):
+    _deliver_everything(db, sample_data)
+    assert len(crud_service.get_batch_tracking_history(db, "VDT-052025-A").items) == 3  # all live
+    partitions.archive_closed_partitions(db, now=datetime(2026, 1, 15, tzinfo=timezone.utc))
+    assert len(crud_service.get_batch_tracking_history(db, "VDT-052025-A").items) == 3  # all archived
+
+
+def test_ensure_future_partitions_is_a_noop_without_partitioning(db):
+    assert partitions.ensure_future_partitions(db) == []